@@ -0,0 +1,154 @@
+import copy
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+
+def _resolve_settings_path():
+    if getattr(sys, "frozen", False):
+        # Prefer a user-editable settings file next to the exe.
+        return os.path.join(os.path.dirname(sys.executable), "app_settings.json")
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_settings.json")
+
+
+def _resolve_bundled_settings_path():
+    if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
+        return os.path.join(sys._MEIPASS, "app_settings.json")
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_settings.json")
+
+
+_SETTINGS_PATH = _resolve_settings_path()
+_BUNDLED_SETTINGS_PATH = _resolve_bundled_settings_path()
+
+# How often (seconds) get()/load() may stat the file to notice external edits.
+_MTIME_CHECK_INTERVAL = 1.0
+
+_lock = threading.RLock()
+_cache = None
+_cache_stamp = None
+_last_check = 0.0
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".app_settings.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, indent=2, sort_keys=True, ensure_ascii=False)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _read_from_disk():
+    # First try the editable settings file next to the exe (or project root).
+    if os.path.exists(_SETTINGS_PATH):
+        return _read_json(_SETTINGS_PATH)
+    # If missing in frozen mode, fall back to the bundled default.
+    if os.path.exists(_BUNDLED_SETTINGS_PATH):
+        data = _read_json(_BUNDLED_SETTINGS_PATH)
+        # Try to persist a user-editable copy next to the exe.
+        try:
+            _write_atomic(_SETTINGS_PATH, data)
+        except Exception:
+            pass
+        return data
+    return {}
+
+
+def _current():
+    global _cache, _cache_stamp, _last_check
+    now = time.monotonic()
+    if _cache is not None and now - _last_check < _MTIME_CHECK_INTERVAL:
+        return _cache
+    with _lock:
+        stamp = _file_stamp(_SETTINGS_PATH)
+        if _cache is None or stamp != _cache_stamp:
+            _cache = _read_from_disk()
+            _cache_stamp = _file_stamp(_SETTINGS_PATH)
+        _last_check = now
+        return _cache
+
+
+def reload():
+    """Drop the in-memory copy and read app_settings.json again."""
+    global _cache, _cache_stamp
+    with _lock:
+        _cache = None
+        _cache_stamp = None
+        return load()
+
+
+def load():
+    """Return a copy of all settings; safe for callers to mutate."""
+    return copy.deepcopy(_current())
+
+
+def get(key, default=None):
+    return copy.deepcopy(_current().get(key, default))
+
+
+def get_section(name):
+    """Return a copy of a nested settings dict such as "db" or "logging" ({} when missing)."""
+    section = _current().get(name)
+    return dict(section) if isinstance(section, dict) else {}
+
+
+def get_value(section, key, default=None):
+    """Read one value from a nested section without copying the whole settings tree."""
+    data = _current().get(section)
+    if not isinstance(data, dict):
+        return default
+    return data.get(key, default)
+
+
+def _update(mutate):
+    global _cache, _cache_stamp, _last_check
+    with _lock:
+        # Re-read under the lock so concurrent writers never clobber each other.
+        data = _read_from_disk()
+        mutate(data)
+        _write_atomic(_SETTINGS_PATH, data)
+        _cache = data
+        _cache_stamp = _file_stamp(_SETTINGS_PATH)
+        _last_check = time.monotonic()
+
+
+def save_value(key, value):
+    _update(lambda data: data.__setitem__(key, value))
+
+
+def update_section(name, **values):
+    def mutate(data):
+        section = data.get(name)
+        section = dict(section) if isinstance(section, dict) else {}
+        section.update(values)
+        data[name] = section
+
+    _update(mutate)
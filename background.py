@@ -0,0 +1,134 @@
+import itertools
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from error_middleware import handle_db_error
+
+
+# How often (ms) the Tk loop picks up finished work.
+_POLL_MS = 30
+
+_root = None
+_executor = None
+_results = queue.Queue()
+_tokens = itertools.count(1)
+
+# Only touched on the Tk thread: token -> (key, on_done, on_error, busy), key -> (token, future).
+_pending = {}
+_latest = {}
+_idle_callbacks = []
+
+
+def init(root, max_workers=4):
+    """Start the worker pool. Results are delivered through `root`'s event loop."""
+    global _root, _executor
+    if _executor is not None:
+        return
+    _root = root
+    _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+    root.after(_POLL_MS, _poll)
+
+
+def _run(token, work):
+    try:
+        _results.put((token, work(), None))
+    except Exception as exc:
+        _results.put((token, None, exc))
+
+
+def _call(callback, value, context):
+    try:
+        callback(value)
+    except Exception:
+        logging.exception("BACKGROUND | callback for %s failed", context)
+
+
+def _default_on_error(context):
+    return lambda exc: handle_db_error(exc, context)
+
+
+def submit(work, on_done=None, on_error=None, key=None, busy=None):
+    """
+    Run work() on a worker thread; on_done(result) or on_error(exc) is then
+    called on the Tk thread. A newer request with the same key supersedes the
+    older one: it is cancelled if it has not started, otherwise its result is
+    dropped. busy.begin()/busy.end() bracket the request.
+
+    work() must not touch Tk widgets or variables; read them before submitting.
+    Without init() (tests, scripts) the work runs inline.
+    """
+    context = key or getattr(work, "__name__", "task")
+    on_error = on_error or _default_on_error(context)
+    if _executor is None:
+        try:
+            result = work()
+        except Exception as exc:
+            on_error(exc)
+            return None
+        if on_done:
+            on_done(result)
+        return None
+
+    if key is not None:
+        cancel(key)
+    token = next(_tokens)
+    _pending[token] = (key, on_done, on_error, busy)
+    if busy is not None:
+        busy.begin()
+    future = _executor.submit(_run, token, work)
+    if key is not None:
+        _latest[key] = (token, future)
+    return token
+
+
+def on_idle(callback):
+    """Call callback() on the Tk thread once no request is in flight."""
+    if _executor is None:
+        callback()
+        return
+    _idle_callbacks.append(callback)
+
+
+def cancel(key):
+    """Forget the in-flight request for `key`; its result will be ignored."""
+    previous = _latest.pop(key, None)
+    if previous is None:
+        return
+    token, future = previous
+    if future.cancel():
+        _, _, _, busy = _pending.pop(token, (None, None, None, None))
+        if busy is not None:
+            busy.end()
+
+
+def _poll():
+    while True:
+        try:
+            token, result, exc = _results.get_nowait()
+        except queue.Empty:
+            break
+        entry = _pending.pop(token, None)
+        if entry is None:
+            continue
+        key, on_done, on_error, busy = entry
+        if busy is not None:
+            busy.end()
+        if key is not None:
+            latest = _latest.get(key)
+            if latest is None or latest[0] != token:
+                continue
+            del _latest[key]
+        if exc is not None:
+            _call(on_error, exc, key)
+        elif on_done is not None:
+            _call(on_done, result, key)
+    if _idle_callbacks and not _pending:
+        callbacks = list(_idle_callbacks)
+        del _idle_callbacks[:]
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logging.exception("BACKGROUND | idle callback failed")
+    _root.after(_POLL_MS, _poll)
@@ -0,0 +1,114 @@
+import json
+import logging
+import select
+import threading
+
+import db
+
+
+# Channel and tables covered by migrations/0004_change_notifications.sql.
+CHANNEL = "bjj_changes"
+WATCHED_TABLES = ("t_students", "t_locations", "t_classes", "t_class_sessions", "t_attendance")
+
+# Seconds between checks of the stop flag while waiting for notifications.
+_POLL_TIMEOUT = 1.0
+_RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+
+_stop = threading.Event()
+_thread = None
+
+
+def parse_payload(payload):
+    """Return (table, op, id) from a NOTIFY payload, or None if it is not ours."""
+    try:
+        data = json.loads(payload)
+        table = data["table"]
+    except (TypeError, ValueError, KeyError):
+        return None
+    if table not in WATCHED_TABLES:
+        return None
+    return table, data.get("op"), data.get("id")
+
+
+def coalesce(events):
+    """
+    Merge (table, op, id) events into {table: ids}. ids is None when the whole
+    table must be reloaded (an event without an id, e.g. after a reconnect).
+    """
+    changes = {}
+    for table, _, row_id in events:
+        if row_id is None:
+            changes[table] = None
+        elif table not in changes:
+            changes[table] = {row_id}
+        elif changes[table] is not None:
+            changes[table].add(row_id)
+    return changes
+
+
+def _deliver(on_changes, events):
+    db.invalidate_cache(*{table for table, _, _ in events})
+    try:
+        on_changes(events)
+    except Exception:
+        logging.exception("CHANGE FEED | change handler failed")
+
+
+def _listen(conn, on_changes):
+    with conn.cursor() as cur:
+        cur.execute(f"LISTEN {CHANNEL}")
+    while not _stop.is_set():
+        if select.select([conn], [], [], _POLL_TIMEOUT) == ([], [], []):
+            continue
+        conn.poll()
+        events = []
+        while conn.notifies:
+            event = parse_payload(conn.notifies.pop(0).payload)
+            if event is not None:
+                events.append(event)
+        if events:
+            _deliver(on_changes, events)
+
+
+def _run(on_changes):
+    attempt = 0
+    connected_before = False
+    while not _stop.is_set():
+        conn = None
+        try:
+            conn = db.open_dedicated_connection()
+            if connected_before:
+                # Anything could have changed while we were disconnected.
+                _deliver(on_changes, [(table, "RESYNC", None) for table in WATCHED_TABLES])
+            connected_before = True
+            attempt = 0
+            _listen(conn, on_changes)
+        except Exception as exc:
+            logging.error("CHANGE FEED | listener disconnected: %s", exc)
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        _stop.wait(_RECONNECT_DELAYS[min(attempt, len(_RECONNECT_DELAYS) - 1)])
+        attempt += 1
+
+
+def start(on_changes):
+    """
+    Listen for row changes made by any client. on_changes(events) is called on
+    the listener thread with a list of (table, op, id) after the result cache
+    was invalidated; GUI callers must hand the events over to the Tk main loop.
+    """
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return _thread
+    _stop.clear()
+    _thread = threading.Thread(target=_run, args=(on_changes,), name="db-change-feed", daemon=True)
+    _thread.start()
+    return _thread
+
+
+def stop():
+    _stop.set()
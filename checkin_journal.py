@@ -0,0 +1,248 @@
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+import psycopg2
+
+
+# Rows sent to Postgres per INSERT; a backlog after an outage drains in a few round trips.
+DEFAULT_BATCH_SIZE = 200
+# Seconds between flushes while the database is reachable.
+DEFAULT_FLUSH_INTERVAL = 2.0
+# Longest wait (seconds) between attempts while it is not; the wait doubles up to this.
+MAX_RETRY_INTERVAL = 60.0
+
+# The database rejected the rows themselves (e.g. a deleted student): retrying
+# the same batch can never succeed. Anything else is treated as transient.
+PERMANENT_ERRORS = (psycopg2.IntegrityError, psycopg2.DataError)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_checkins (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id INTEGER NOT NULL,
+    student_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    checkin_source TEXT NOT NULL,
+    checkin_time TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS failed_checkins (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL,
+    student_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    checkin_source TEXT NOT NULL,
+    checkin_time TEXT NOT NULL,
+    error TEXT NOT NULL,
+    failed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    name TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    saved_at TEXT NOT NULL
+);
+"""
+
+
+class CheckinJournal:
+    """
+    Local write-behind journal for kiosk check-ins (SQLite, WAL, synchronous=FULL).
+    add() returns once the check-in is on disk; Flusher moves pending rows to
+    Postgres and removes them only after the insert committed; rows Postgres
+    rejects are moved to failed_checkins (dead letters). The journal also
+    keeps JSON snapshots (roster, today's sessions) so the kiosk can start
+    without a database link. Safe to use from several threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=FULL")
+            self._conn.executescript(_SCHEMA)
+
+    def add(self, session_id, student_id, checkin_source, status="present", checkin_time=None):
+        """Journal one check-in; checkin_time defaults to now (local time, with offset)."""
+        checkin_time = checkin_time or datetime.now().astimezone()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO pending_checkins (session_id, student_id, status, checkin_source, checkin_time)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (session_id, student_id, status, checkin_source, checkin_time.isoformat()),
+            )
+        return cur.lastrowid
+
+    def pending(self, limit=DEFAULT_BATCH_SIZE):
+        """
+        Oldest pending check-ins as (journal_id, session_id, student_id, status,
+        checkin_source, checkin_time) with checkin_time as a datetime.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, session_id, student_id, status, checkin_source, checkin_time"
+                " FROM pending_checkins ORDER BY id LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [row[:5] + (datetime.fromisoformat(row[5]),) for row in rows]
+
+    def pending_pairs(self):
+        """(session_id, student_id) of every check-in not yet in Postgres."""
+        with self._lock:
+            return set(self._conn.execute("SELECT session_id, student_id FROM pending_checkins"))
+
+    def remove(self, journal_ids):
+        journal_ids = list(journal_ids)
+        if not journal_ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM pending_checkins WHERE id = ?", [(i,) for i in journal_ids])
+
+    def bury(self, journal_id, error):
+        """Move one pending check-in to failed_checkins together with the error that rejected it."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO failed_checkins"
+                    " (id, session_id, student_id, status, checkin_source, checkin_time, error, failed_at)"
+                    " SELECT id, session_id, student_id, status, checkin_source, checkin_time, ?, ?"
+                    " FROM pending_checkins WHERE id = ?",
+                    (str(error).strip(), datetime.now().astimezone().isoformat(), journal_id),
+                )
+                self._conn.execute("DELETE FROM pending_checkins WHERE id = ?", (journal_id,))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def failed(self):
+        """Dead letters as (journal_id, session_id, student_id, status, checkin_source, checkin_time, error)."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, session_id, student_id, status, checkin_source, checkin_time, error"
+                " FROM failed_checkins ORDER BY id"
+            ).fetchall()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pending_checkins").fetchone()[0]
+
+    def save_snapshot(self, name, rows):
+        """Keep `rows` (JSON-serializable) under `name`, replacing the previous snapshot."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (name, payload, saved_at) VALUES (?, ?, ?)",
+                (name, json.dumps(rows), datetime.now().astimezone().isoformat()),
+            )
+
+    def load_snapshot(self, name):
+        """The rows last saved under `name` (lists, as JSON returns them), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM snapshots WHERE name = ?", (name,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def flush(journal, write_batch, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Hand pending check-ins to write_batch(rows) in batches until the journal is
+    empty; rows are (session_id, student_id, status, checkin_source, checkin_time).
+    A batch leaves the journal only after write_batch returned, so a transient
+    failure (connection lost) is raised and keeps it for the next attempt.
+    When Postgres rejects the batch itself (PERMANENT_ERRORS) it is retried
+    row by row and the rows that still fail are moved to the dead-letter table,
+    so one bad check-in cannot block the queue. write_batch must be idempotent
+    (a crash between commit and removal replays the batch). Returns the rows
+    flushed.
+    """
+    flushed = 0
+    while True:
+        batch = journal.pending(batch_size)
+        if not batch:
+            return flushed
+        try:
+            write_batch([row[1:] for row in batch])
+        except PERMANENT_ERRORS:
+            flushed += _flush_rows(journal, write_batch, batch)
+            continue
+        journal.remove(row[0] for row in batch)
+        flushed += len(batch)
+
+
+def _flush_rows(journal, write_batch, batch):
+    # One row per write_batch call; rejected rows become dead letters.
+    flushed = 0
+    for row in batch:
+        try:
+            write_batch([row[1:]])
+        except PERMANENT_ERRORS as exc:
+            logging.error("KIOSK | check-in %s rejected by the database, moved to failed_checkins: %s", row, exc)
+            journal.bury(row[0], exc)
+            continue
+        journal.remove([row[0]])
+        flushed += 1
+    return flushed
+
+
+class Flusher:
+    """
+    Background thread that flushes `journal` every `interval` seconds, or right
+    away after wake(). While write_batch fails transiently the wait doubles up
+    to MAX_RETRY_INTERVAL; last_error holds the latest failure (None once a
+    flush succeeded). Rejected rows do not stop it: flush() dead-letters them.
+    """
+
+    def __init__(self, journal, write_batch, interval=DEFAULT_FLUSH_INTERVAL, batch_size=DEFAULT_BATCH_SIZE):
+        self.journal = journal
+        self.write_batch = write_batch
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="checkin-flusher", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout=5.0):
+        """Stop the thread after one last flush attempt (check-ins left over stay journaled)."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def flush_once(self):
+        """One flush attempt; returns True when the journal was emptied."""
+        try:
+            flush(self.journal, self.write_batch, self.batch_size)
+        except Exception as exc:
+            if self.last_error is None:
+                logging.exception("KIOSK | flushing check-ins failed, keeping them in the journal")
+            self.last_error = exc
+            return False
+        self.last_error = None
+        return True
+
+    def _loop(self):
+        delay = self.interval
+        while not self._stopped.is_set():
+            if self.last_error is None:
+                self._wake.wait(delay)
+            else:
+                # Backing off: new check-ins do not cut the wait short, only stop() does.
+                self._stopped.wait(delay)
+            self._wake.clear()
+            ok = self.flush_once()
+            delay = self.interval if ok else min(delay * 2, MAX_RETRY_INTERVAL)
@@ -1,109 +1,53 @@
-import json
 import logging
 import os
-import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 
 import keyring
 import psycopg2
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 from dotenv import load_dotenv
-from psycopg2 import OperationalError
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from psycopg2.extensions import QueryCanceledError, TRANSACTION_STATUS_IDLE
 
-_env = os.getenv("APP_ENV", "default").lower()
-_base_dir = os.path.dirname(os.path.abspath(__file__))
-_dev_env = os.path.join(_base_dir, ".env.dev")
-_default_env = os.path.join(_base_dir, ".env")
-_prod_env = os.path.join(_base_dir, ".env.prod")
-_cloud_env = os.path.join(_base_dir, ".env.cloud")
-_loaded_env_path = None
-
-if _env == "prod":
-    if os.path.exists(_prod_env):
-        load_dotenv(_prod_env, override=True)
-        _loaded_env_path = _prod_env
-    else:
-        load_dotenv(_default_env, override=True)
-        _loaded_env_path = _default_env
-elif _env == "dev":
-    if os.path.exists(_dev_env):
-        load_dotenv(_dev_env, override=True)
-        _loaded_env_path = _dev_env
-    else:
-        load_dotenv(_default_env, override=True)
-        _loaded_env_path = _default_env
-elif _env == "cloud":
-    if os.path.exists(_cloud_env):
-        load_dotenv(_cloud_env, override=True)
-        _loaded_env_path = _cloud_env
-    else:
-        load_dotenv(_default_env, override=True)
-        _loaded_env_path = _default_env
-else:
-    load_dotenv(_default_env, override=True)
-    _loaded_env_path = _default_env
+import app_settings
+import query_stats
+from query_cache import QueryCache, tables_read
 
-if _loaded_env_path:
-    print(f"DB config loaded from: {_loaded_env_path}")
+_base_dir = os.path.dirname(os.path.abspath(__file__))
+_env_loaded = False
 
-def _resolve_settings_path():
-    if getattr(sys, "frozen", False):
-        # Prefer a user-editable settings file next to the exe.
-        return os.path.join(os.path.dirname(sys.executable), "app_settings.json")
-    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_settings.json")
 
+def _load_env():
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
 
-def _resolve_bundled_settings_path():
-    if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
-        return os.path.join(sys._MEIPASS, "app_settings.json")
-    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_settings.json")
+    env = os.getenv("APP_ENV", "default").lower()
+    env_files = {
+        "prod": os.path.join(_base_dir, ".env.prod"),
+        "dev": os.path.join(_base_dir, ".env.dev"),
+        "cloud": os.path.join(_base_dir, ".env.cloud"),
+    }
+    default_env = os.path.join(_base_dir, ".env")
+    loaded_env_path = env_files.get(env)
+    if not loaded_env_path or not os.path.exists(loaded_env_path):
+        loaded_env_path = default_env
+    load_dotenv(loaded_env_path, override=True)
+    print(f"DB config loaded from: {loaded_env_path}")
 
 
-_APP_SETTINGS_PATH = _resolve_settings_path()
-_BUNDLED_SETTINGS_PATH = _resolve_bundled_settings_path()
 _KEYRING_SERVICE = "bjjvienna_postgres"
 _KEYRING_USER_KEY = "__db_user__"
 
 
-def _load_app_settings():
-    # First try the editable settings file next to the exe (or project root).
-    if os.path.exists(_APP_SETTINGS_PATH):
-        try:
-            with open(_APP_SETTINGS_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data if isinstance(data, dict) else {}
-        except Exception:
-            return {}
-    # If missing in frozen mode, fall back to the bundled default.
-    if os.path.exists(_BUNDLED_SETTINGS_PATH):
-        try:
-            with open(_BUNDLED_SETTINGS_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                data = data if isinstance(data, dict) else {}
-            # Try to persist a user-editable copy next to the exe.
-            try:
-                with open(_APP_SETTINGS_PATH, "w", encoding="utf-8") as out:
-                    json.dump(data, out, indent=2, ensure_ascii=False)
-            except Exception:
-                pass
-            return data
-        except Exception:
-            return {}
-    return {}
-
-
 def _load_db_settings():
-    settings = _load_app_settings()
-    db_settings = settings.get("db")
-    return db_settings if isinstance(db_settings, dict) else {}
-
-
-def _save_app_settings(settings):
-    try:
-        with open(_APP_SETTINGS_PATH, "w", encoding="utf-8") as handle:
-            json.dump(settings, handle, indent=2, ensure_ascii=False)
-    except Exception:
-        pass
+    return app_settings.get_section("db")
 
 
 def _get_keyring_user():
@@ -121,10 +65,17 @@ def _save_keyring_credentials(user, password):
     keyring.set_password(_KEYRING_SERVICE, user, password)
 
 
-def _prompt_for_credentials(default_user=None):
+def _dialog_root(parent):
+    if parent is not None:
+        return parent, False
     root = tk.Tk()
     root.withdraw()
     root.attributes("-topmost", True)
+    return root, True
+
+
+def _prompt_for_credentials(default_user=None, parent=None):
+    root, owns_root = _dialog_root(parent)
 
     user = default_user
     if not user:
@@ -143,18 +94,18 @@ def _prompt_for_credentials(default_user=None):
     )
 
     if not user or not password:
-        messagebox.showerror("Database Login", "Database credentials are required.")
-        root.destroy()
+        messagebox.showerror("Database Login", "Database credentials are required.", parent=root)
+        if owns_root:
+            root.destroy()
         raise RuntimeError("Database credentials are required.")
 
-    root.destroy()
+    if owns_root:
+        root.destroy()
     return user, password
 
 
-def _prompt_for_db_settings(current):
-    root = tk.Tk()
-    root.withdraw()
-    root.attributes("-topmost", True)
+def _prompt_for_db_settings(current, parent=None):
+    root, owns_root = _dialog_root(parent)
 
     host = simpledialog.askstring(
         "Database Settings",
@@ -181,7 +132,8 @@ def _prompt_for_db_settings(current):
         parent=root,
     )
 
-    root.destroy()
+    if owns_root:
+        root.destroy()
 
     if not host or not port or not name:
         raise RuntimeError("Database host, port, and name are required.")
@@ -205,26 +157,51 @@ def _require(value, name, hint):
     return value
 
 
-_db_settings = _load_db_settings()
+class CredentialsRequiredError(RuntimeError):
+    """No DB credentials in the environment or keyring and prompting is not allowed here."""
 
-_host = os.getenv("DB_HOST") or _db_settings.get("host")
-_port = os.getenv("DB_PORT") or _db_settings.get("port")
-_dbname = os.getenv("DB_NAME") or _db_settings.get("name")
-_sslmode = os.getenv("DB_SSLMODE") or _db_settings.get("sslmode")
+    def __init__(self, user=None):
+        super().__init__("Database credentials are required.")
+        self.user = user
 
-_host = _require(_host, "host", "Set DB_HOST or app_settings.json db.host")
-_dbname = _require(_dbname, "name", "Set DB_NAME or app_settings.json db.name")
-_port = _require(_port, "port", "Set DB_PORT or app_settings.json db.port")
 
-_env_user = os.getenv("DB_USER")
-_env_password = os.getenv("DB_PASSWORD")
+def _resolve_config():
+    _load_env()
+    db_settings = _load_db_settings()
+    config = {
+        "host": os.getenv("DB_HOST") or db_settings.get("host"),
+        "port": os.getenv("DB_PORT") or db_settings.get("port"),
+        "dbname": os.getenv("DB_NAME") or db_settings.get("name"),
+        "sslmode": os.getenv("DB_SSLMODE") or db_settings.get("sslmode"),
+    }
+    if _edited_db_settings:
+        # Settings typed into the connection-failed dialog win over .env values.
+        config.update(
+            host=_edited_db_settings.get("host"),
+            port=_edited_db_settings.get("port"),
+            dbname=_edited_db_settings.get("name"),
+            sslmode=_edited_db_settings.get("sslmode"),
+        )
+    _require(config["host"], "host", "Set DB_HOST or app_settings.json db.host")
+    _require(config["dbname"], "name", "Set DB_NAME or app_settings.json db.name")
+    _require(config["port"], "port", "Set DB_PORT or app_settings.json db.port")
+    return config
+
+
+def _resolve_credentials(interactive):
+    env_user = os.getenv("DB_USER")
+    env_password = os.getenv("DB_PASSWORD")
 
-_user = _env_user or _get_keyring_user()
-_password = _env_password or _get_keyring_password(_env_user or _user)
+    user = env_user or _get_keyring_user()
+    password = env_password or _get_keyring_password(env_user or user)
+
+    if not user or not password:
+        if not interactive:
+            raise CredentialsRequiredError(user)
+        user, password = _prompt_for_credentials(default_user=user)
+        _save_keyring_credentials(user, password)
+    return user, password
 
-if not _user or not _password:
-    _user, _password = _prompt_for_credentials(default_user=_user)
-    _save_keyring_credentials(_user, _password)
 
 def _connect(host, port, dbname, user, password, sslmode):
     return psycopg2.connect(
@@ -237,65 +214,523 @@ def _connect(host, port, dbname, user, password, sslmode):
     )
 
 
-try:
-    _conn = _connect(_host, _port, _dbname, _user, _password, _sslmode)
-except OperationalError as exc:
-    root = tk.Tk()
-    root.withdraw()
-    root.attributes("-topmost", True)
-    should_edit = messagebox.askyesno(
-        "Database Connection Failed",
-        "Database connection failed.\n\nDo you want to edit the DB settings?",
-        parent=root,
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection becomes free within the checkout timeout."""
+    pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of autocommit connections:
+    - keeps at least `minconn` connections open and never more than `maxconn`
+    - blocks up to `timeout` seconds on checkout when the pool is exhausted
+    - pings connections that sat idle longer than `health_check_after` seconds
+    """
+
+    def __init__(self, connect, minconn=1, maxconn=5, timeout=10.0, health_check_after=30.0):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Invalid pool size: need 0 <= minconn <= maxconn and maxconn >= 1")
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        for _ in range(minconn):
+            self._idle.append((self._new_connection(), time.monotonic()))
+            self._size += 1
+
+    def _new_connection(self):
+        conn = self._connect()
+        conn.autocommit = True
+        return conn
+
+    def _is_healthy(self, conn, idle_for):
+        if conn.closed:
+            return False
+        if idle_for < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def getconn(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed.")
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.maxconn:
+                        self._size += 1
+                        conn, last_used = None, None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No database connection available after {self.timeout:g}s "
+                            f"(pool size {self.maxconn})."
+                        )
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                try:
+                    return self._new_connection()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            if self._is_healthy(conn, time.monotonic() - last_used):
+                return conn
+            logging.error("DB POOL | dropping unhealthy connection")
+            self._discard(conn)
+
+    def putconn(self, conn):
+        if conn.closed or self._closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if not conn.autocommit:
+                conn.autocommit = True
+        except Exception:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+def _pool_setting(env_name, key, default, cast):
+    value = os.getenv(env_name) or _load_db_settings().get(key)
+    if value is None or value == "":
+        return default
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _create_pool(interactive):
+    config = _resolve_config()
+    user, password = _resolve_credentials(interactive)
+    return ConnectionPool(
+        lambda: _connect(config["host"], config["port"], config["dbname"], user, password, config["sslmode"]),
+        minconn=_pool_setting("DB_POOL_MIN", "pool_min", 1, int),
+        maxconn=_pool_setting("DB_POOL_MAX", "pool_max", 5, int),
+        timeout=_pool_setting("DB_POOL_TIMEOUT", "pool_timeout", 10.0, float),
     )
-    root.destroy()
-    if should_edit:
-        new_db_settings = _prompt_for_db_settings(_db_settings or {})
-        settings = _load_app_settings()
-        settings["db"] = new_db_settings
-        _save_app_settings(settings)
-        _db_settings = new_db_settings
-        _host = _db_settings.get("host")
-        _port = _db_settings.get("port")
-        _dbname = _db_settings.get("name")
-        _sslmode = _db_settings.get("sslmode")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_edited_db_settings = None
+
+
+def _get_pool(interactive=None):
+    """
+    Open the pool on first use. Dialogs (credentials, DB settings) are only
+    shown when running on the main thread; elsewhere the error is raised.
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+    if interactive is None:
+        interactive = threading.current_thread() is threading.main_thread()
+    with _pool_lock:
+        while _pool is None:
+            try:
+                _pool = _create_pool(interactive)
+            except Exception as exc:
+                if not interactive or not resolve_connection_error(exc):
+                    raise
+    return _pool
+
+
+def is_connected():
+    return _pool is not None
+
+
+def open_dedicated_connection():
+    """
+    Open an autocommit connection outside the pool, for long-lived use such as
+    LISTEN. Never prompts; the caller owns and closes it.
+    """
+    config = _resolve_config()
+    user, password = _resolve_credentials(interactive=False)
+    conn = _connect(config["host"], config["port"], config["dbname"], user, password, config["sslmode"])
+    conn.autocommit = True
+    return conn
+
+
+def connect_async(on_ready=None, on_error=None):
+    """
+    Open the pool on a background thread so imports and window creation never
+    block on the network. on_ready() / on_error(exc) are called from that
+    thread; GUI callers must hand them over to the Tk main loop themselves.
+    """
+    def worker():
         try:
-            _conn = _connect(_host, _port, _dbname, _user, _password, _sslmode)
-        except OperationalError as exc2:
-            messagebox.showerror(
-                "Database Connection Failed",
-                "Unable to connect to the database.\n\n"
-                f"{exc2}\n\n"
-                "Tip: If you see 'no pg_hba.conf entry ... no encryption', "
-                "set sslmode to 'require' or update pg_hba.conf.",
-            )
-            sys.exit(1)
-    else:
+            _get_pool(interactive=False)
+        except Exception as exc:
+            if on_error:
+                on_error(exc)
+            return
+        if on_ready:
+            on_ready()
+
+    thread = threading.Thread(target=worker, name="db-connect", daemon=True)
+    thread.start()
+    return thread
+
+
+def resolve_connection_error(exc, parent=None):
+    """
+    Interactive follow-up for a failed connection attempt (main thread only):
+    asks for credentials or DB settings. Returns True when the caller should retry.
+    """
+    global _edited_db_settings
+    if isinstance(exc, CredentialsRequiredError):
+        user, password = _prompt_for_credentials(default_user=exc.user, parent=parent)
+        _save_keyring_credentials(user, password)
+        return True
+
+    root, owns_root = _dialog_root(parent)
+    try:
+        should_edit = messagebox.askyesno(
+            "Database Connection Failed",
+            "Database connection failed.\n\nDo you want to edit the DB settings?",
+            parent=root,
+        )
+        if should_edit:
+            new_db_settings = _prompt_for_db_settings(_edited_db_settings or _load_db_settings(), parent=root)
+            try:
+                app_settings.update_section("db", **new_db_settings)
+            except Exception:
+                pass
+            _edited_db_settings = new_db_settings
+            return True
         messagebox.showerror(
             "Database Connection Failed",
             "Unable to connect to the database.\n\n"
             f"{exc}\n\n"
             "Tip: If you see 'no pg_hba.conf entry ... no encryption', "
             "set sslmode to 'require' or update pg_hba.conf.",
+            parent=root,
         )
-        sys.exit(1)
+        return False
+    finally:
+        if owns_root:
+            root.destroy()
+
+
+_local = threading.local()
+
+
+@contextmanager
+def connection():
+    """
+    Check out a pooled connection for the duration of the block.
+    execute() calls made on the same thread inside the block reuse it.
+    """
+    held = getattr(_local, "conn", None)
+    if held is not None:
+        yield held
+        return
+    pool = _get_pool()
+    conn = pool.getconn()
+    token = getattr(_local, "token", None)
+    if token is not None:
+        # First statement of a cancellable() block: the connection stays pinned
+        # (and registered) until the block ends.
+        _register_cancellable(pool, conn, token)
+        yield conn
+        return
+    _local.conn = conn
+    try:
+        yield conn
+    finally:
+        _local.conn = None
+        pool.putconn(conn)
+
+
+_cancellable = {}
+_cancellable_lock = threading.Lock()
+
+
+@contextmanager
+def cancellable(token):
+    """
+    Register the block's statements under `token`, so cancel_query(token) from
+    another thread can interrupt the one running (execute() then raises
+    QueryCanceledError). The pooled connection is checked out by the first
+    statement that reaches the server, so a block served from the result cache
+    takes none.
+    """
+    held = getattr(_local, "conn", None)
+    with _cancellable_lock:
+        _cancellable[token] = held
+    if held is None:
+        _local.token = token
+    try:
+        yield
+    finally:
+        owned = None
+        if held is None:
+            _local.token = None
+            owned, _local.conn = getattr(_local, "conn", None), None
+        conn = held or owned
+        # Unregistered before the connection goes back to the pool; cancel_query
+        # holds the same lock, so after this no new cancel can be sent to it.
+        with _cancellable_lock:
+            signalled = token not in _cancellable
+            if not signalled:
+                del _cancellable[token]
+        try:
+            if signalled and conn is not None:
+                _absorb_cancel(conn)
+        finally:
+            if owned is not None:
+                _get_pool().putconn(owned)
+
+
+def _register_cancellable(pool, conn, token):
+    with _cancellable_lock:
+        if token in _cancellable:
+            _cancellable[token] = conn
+            _local.conn = conn
+            return
+    # Cancelled before its first statement started: run nothing.
+    pool.putconn(conn)
+    raise QueryCanceledError("canceling statement due to user request")
+
+
+def _absorb_cancel(conn):
+    # A cancel sent as the block's last statement finished can still reach the server
+    # afterwards; let it hit a throwaway round trip instead of the next caller's statement.
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+    except QueryCanceledError:
+        pass
+    except Exception:
+        logging.exception("DB CANCEL | round trip after cancel failed")
+
+
+def cancel_query(token):
+    """Cancel the statement running inside cancellable(token), if any. Returns True when one was signalled."""
+    with _cancellable_lock:
+        if token not in _cancellable:
+            return False
+        conn = _cancellable.pop(token)
+        if conn is None:
+            # No statement has started; the block's first one will not run.
+            return True
+        try:
+            conn.cancel()
+        except Exception:
+            logging.exception("DB CANCEL | failed to cancel query")
+            return False
+    return True
+
+
+def _capture_psql(cur, query, bound_params):
+    if not app_settings.get_value("logging", "capture_psql", False):
+        return
+    try:
+        rendered_sql = cur.mogrify(query, bound_params).decode("utf-8", errors="replace")
+    except Exception:
+        rendered_sql = f"{query} | params={bound_params!r}"
+    logging.error("<PSQL> %s", rendered_sql)
 
-_conn.autocommit = True
 
+# Reference lists (locations, coaches, classes) change rarely; writes evict them anyway.
+LOOKUP_CACHE_TTL = 300
 
-def execute(query, params=None):
-    with _conn.cursor() as cur:
+_result_cache = QueryCache(max_entries=256)
+
+
+def invalidate_cache(*tables):
+    """Evict cached results that read any of `tables` (all results when none given)."""
+    if tables:
+        _result_cache.invalidate_tables(tables)
+    else:
+        _result_cache.clear()
+
+
+def cache_generation():
+    """Snapshot to pass to cache_result() so a result that raced a write is not stored."""
+    return _result_cache.generation
+
+
+def cached_result(query, params=None):
+    """Return (hit, rows) for a result stored under `query` + `params`."""
+    key = _result_cache.make_key(query, params)
+    if key is None:
+        return False, None
+    hit, rows = _result_cache.get(key)
+    return hit, (list(rows) if hit else None)
+
+
+def cache_result(query, params, rows, ttl, generation=None):
+    """
+    Store rows computed another way (e.g. a window count) as the result of
+    `query`, so execute(query, params, cache_ttl=...) and cached_result() see it.
+    """
+    key = _result_cache.make_key(query, params)
+    _result_cache.put(key, tuple(rows), tables_read(query), ttl, generation)
+
+
+def execute(query, params=None, cache_ttl=None):
+    """
+    Run a statement and return fetchall() rows ([] when there is no result set).
+    With cache_ttl (seconds), SELECT results are served from the table-aware
+    result cache; any write through this module evicts entries for its tables.
+    """
+    cache_key = None
+    if cache_ttl:
+        cache_key = _result_cache.make_key(query, params)
+        if cache_key is not None:
+            hit, rows = _result_cache.get(cache_key)
+            if hit:
+                return list(rows)
+    generation = _result_cache.generation
+
+    with connection() as conn, conn.cursor() as cur:
         bound_params = params or ()
-        settings = _load_app_settings()
-        logging_settings = settings.get("logging", {}) if isinstance(settings.get("logging"), dict) else {}
-        capture_psql = bool(logging_settings.get("capture_psql", False))
-        if capture_psql:
-            try:
-                rendered_sql = cur.mogrify(query, bound_params).decode("utf-8", errors="replace")
-            except Exception:
-                rendered_sql = f"{query} | params={bound_params!r}"
-            logging.error("<PSQL> %s", rendered_sql)
-        cur.execute(query, bound_params)
-        if cur.description:
-            return cur.fetchall()
+        _capture_psql(cur, query, bound_params)
+        with query_stats.timed(query):
+            cur.execute(query, bound_params)
+            rows = cur.fetchall() if cur.description else None
+
+    _result_cache.invalidate_for(query)
+    if rows is None:
         return []
+    if cache_key is not None:
+        _result_cache.put(cache_key, tuple(rows), tables_read(query), cache_ttl, generation)
+    return rows
+
+
+def execute_iter(query, params=None, itersize=2000, batches=False):
+    """
+    Stream a SELECT through a server-side (named) cursor instead of fetchall().
+    Yields rows one by one, or lists of up to `itersize` rows when batches=True.
+    The cursor runs on its own pooled connection, checked out until the
+    generator is exhausted or closed and never pinned to the thread: execute()
+    calls made while iterating use another connection and are not rolled back
+    with the cursor's transaction.
+    """
+    site = query_stats.call_site()
+    db_ms = 0.0
+    pool = _get_pool()
+    conn = pool.getconn()
+    try:
+        # Named cursors only live inside a transaction.
+        conn.autocommit = False
+        with conn.cursor(name=f"bjj_iter_{uuid.uuid4().hex}") as cur:
+            cur.itersize = itersize
+            bound_params = params or ()
+            _capture_psql(cur, query, bound_params)
+            # Only time spent waiting on the server counts, not the consumer's work.
+            start = time.perf_counter()
+            cur.execute(query, bound_params)
+            db_ms += (time.perf_counter() - start) * 1000.0
+            while True:
+                start = time.perf_counter()
+                rows = cur.fetchmany(itersize)
+                db_ms += (time.perf_counter() - start) * 1000.0
+                if not rows:
+                    break
+                if batches:
+                    yield rows
+                else:
+                    yield from rows
+    finally:
+        query_stats.record(site, db_ms, query)
+        try:
+            conn.rollback()
+            conn.autocommit = True
+        except Exception:
+            pass
+        pool.putconn(conn)
+
+
+@contextmanager
+def _transaction(conn):
+    was_autocommit = conn.autocommit
+    conn.autocommit = False
+    try:
+        yield
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = was_autocommit
+
+
+def execute_many(query, params_seq, template=None, page_size=100, fetch=False):
+    """
+    Run a multi-row statement written with a single "VALUES %s" placeholder
+    through psycopg2's execute_values: one round trip per `page_size` rows,
+    all pages in one transaction. Returns the RETURNING rows when fetch=True.
+    """
+    params_seq = list(params_seq)
+    if not params_seq:
+        return []
+    with connection() as conn, conn.cursor() as cur:
+        if app_settings.get_value("logging", "capture_psql", False):
+            rendered_sql = query.as_string(conn) if isinstance(query, sql.Composable) else query
+            logging.error("<PSQL> %s | rows=%d page_size=%d", rendered_sql, len(params_seq), page_size)
+        try:
+            with query_stats.timed(query), _transaction(conn):
+                result = execute_values(cur, query, params_seq, template=template, page_size=page_size, fetch=fetch)
+        finally:
+            _result_cache.invalidate_for(query.as_string(conn) if isinstance(query, sql.Composable) else query)
+        return result or []
+
+
+def insert_values(table, columns, rows, returning=None, on_conflict=None, page_size=100):
+    """
+    Bulk INSERT `rows` (sequences matching `columns`) into `table`.
+    `on_conflict` is a literal clause such as "ON CONFLICT DO NOTHING";
+    `returning` is a list of column names whose values are returned per inserted row.
+    """
+    query = sql.SQL("INSERT INTO {} ({}) VALUES %s").format(
+        sql.Identifier(*table.split(".")),
+        sql.SQL(", ").join(sql.Identifier(c) for c in columns),
+    )
+    if on_conflict:
+        query += sql.SQL(" ") + sql.SQL(on_conflict)
+    if returning:
+        query += sql.SQL(" RETURNING {}").format(sql.SQL(", ").join(sql.Identifier(c) for c in returning))
+    return execute_many(query, rows, page_size=page_size, fetch=bool(returning))
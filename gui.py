@@ -1,14 +1,47 @@
+import startup_timing  # First import: startup is timed from here.
+
 import logging
+import queue
+import sys
 import tkinter as tk
 import traceback
 from tkinter import ttk, messagebox
 
+import background
+import change_feed
+import db
+import lazy_imports
+import schema_migrations
+import student_directory
 from version import __version__
 from i18n import init_i18n, t
-from ui import about, attendance, locations, news_notifications, reports, sessions, settings, students, teachers
+from ui import settings
+
+
+def _show_startup_error(exc=None):
+    details = traceback.format_exc() if exc is None else "".join(traceback.format_exception(exc))
+    logging.error("APP STARTUP ERROR\n%s", details)
+    try:
+        messagebox.showerror(
+            "Startup error",
+            "The app failed to start. Check app.log for details."
+        )
+    except Exception:
+        pass
+
+
+def check_imports():
+    """`gui.exe --check-imports`: exit 1 when a lazily loaded module is missing from the build."""
+    failed = lazy_imports.check_bundled()
+    for name, exc in failed:
+        print(f"MISSING {name}: {exc!r}")
+    print(f"{len(lazy_imports.BUNDLED) - len(failed)}/{len(lazy_imports.BUNDLED)} lazy imports OK")
+    return 1 if failed else 0
 
 
 def main():
+    if "--check-imports" in sys.argv[1:]:
+        sys.exit(check_imports())
     logging.basicConfig(
         level=logging.ERROR,
         format="%(asctime)s | %(levelname)s | %(message)s",
@@ -19,7 +52,7 @@ def main():
         force=True,
     )
     logging.error("TEST ERROR: console logging works")
-    
+
 
     try:
         init_i18n()
@@ -54,37 +87,192 @@ def main():
 
         root.title(f"{t('app.title')} v{__version__}")
 
-        teachers_api = teachers.build(tab_teachers)
-        locations_api = locations.build(tab_locations)
-        students_api = students.build(tab_students)
-        attendance.build(tab_attendance)
-        sessions_api = sessions.build(tab_sessions)
-        news_api = news_notifications.build(tab_news)
-        reports.build(tab_reports)
+        # Settings needs no DB and applies the theme, so it is built right away.
         settings.build(tab_settings, style)
-        about_api = about.build(tab_about)
-
-        teachers_api["load_teachers"]()
-        locations_api["load_locations"]()
-        students_api["load_students_view"]()
-        students_api["refresh_charts"]()
-        sessions_api["refresh_coach_options"]()
-        sessions_api["refresh_location_options"]()
-        sessions_api["load_classes"]()
-        sessions_api["load_sessions"]()
-        news_api["load_birthdays"]()
-        about_api["refresh_about_panel"]()
 
+        connecting_lbl = ttk.Label(tab_students, text=t("label.connecting_db"))
+        connecting_lbl.grid(row=0, column=0, sticky="w", padx=10, pady=10)
+
+        # Each builder creates its tab and starts the tab's initial loads.
+        # Tab modules are imported and built on first visit, so startup only pays for the visible one.
+        def build_students():
+            api = lazy_imports.load("ui.students").build(tab_students)
+            api["load_students_view"]()
+            api["refresh_charts"]()
+            return api
+
+        def build_teachers():
+            api = lazy_imports.load("ui.teachers").build(tab_teachers)
+            api["load_teachers"]()
+            return api
+
+        def build_locations():
+            api = lazy_imports.load("ui.locations").build(tab_locations)
+            api["load_locations"]()
+            return api
+
+        def build_sessions():
+            api = lazy_imports.load("ui.sessions").build(tab_sessions)
+            api["refresh_coach_options"]()
+            api["load_classes"]()
+            api["load_sessions"]()
+            return api
+
+        def build_about():
+            api = lazy_imports.load("ui.about").build(tab_about)
+            api["refresh_about_panel"]()
+            return api
+
+        tab_builders = {
+            tab_students: ("students", build_students),
+            tab_teachers: ("teachers", build_teachers),
+            tab_locations: ("locations", build_locations),
+            tab_attendance: ("attendance", lambda: lazy_imports.load("ui.attendance").build(tab_attendance)),
+            tab_sessions: ("sessions", build_sessions),
+            tab_news: ("news", lambda: lazy_imports.load("ui.news_notifications").build(tab_news)),
+            tab_reports: ("reports", lambda: lazy_imports.load("ui.reports").build(tab_reports)),
+            tab_about: ("about", build_about),
+        }
+        tab_apis = {}
+
+        def ensure_tab_built(tab):
+            if tab in tab_apis or tab not in tab_builders:
+                return
+            name, builder = tab_builders[tab]
+            try:
+                tab_apis[tab] = builder()
+            except Exception:
+                logging.exception("TAB BUILD ERROR | %s", name)
+                messagebox.showerror("Error", f"The {name} tab failed to load. Check app.log for details.")
+                return
+            startup_timing.mark(f"{name} tab built")
+
+        def on_tab_changed(event):
+            ensure_tab_built(root.nametowidget(notebook.select()))
+
+        # Call a tab API function, skipping tabs that were not opened yet
+        # (they load fresh data when they are).
+        def call_tab(tab, name, *args):
+            api = tab_apis.get(tab)
+            if api is not None:
+                api[name](*args)
+
+        # Catch up on student changes the change feed may have missed (updated_at watermark).
+        def refresh_directory():
+            background.submit(student_directory.refresh, on_error=directory_error)
+            root.after(student_directory.REFRESH_INTERVAL_MS, refresh_directory)
+
+        # Name suggestions are a convenience: a failed refresh is logged and retried later.
+        def directory_error(exc):
+            logging.error("STUDENT DIRECTORY | refresh failed: %s", exc)
+
+        # Runs once the DB pool is open: visible tab first, the rest on demand.
+        def start_app():
+            ensure_tab_built(root.nametowidget(notebook.select()))
+            notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
+
+            def first_tab_loaded():
+                startup_timing.mark("first tab loaded")
+                logging.error("STARTUP | %s", startup_timing.summary())
+                # The student name directory loads after the first tab, off the Tk thread.
+                background.submit(student_directory.load, on_error=directory_error)
+                root.after(student_directory.REFRESH_INTERVAL_MS, refresh_directory)
+
+            background.on_idle(first_tab_loaded)
+
+            start_change_feed({
+                "t_students": [
+                    lambda ids: background.submit(lambda: student_directory.refresh(ids), on_error=directory_error),
+                    lambda ids: call_tab(tab_students, "refresh_student_rows", ids),
+                    lambda ids: call_tab(tab_students, "refresh_charts"),
+                ],
+                "t_locations": [lambda ids: call_tab(tab_locations, "refresh_location_rows", ids)],
+                "t_classes": [lambda ids: call_tab(tab_sessions, "refresh_class_rows", ids)],
+                "t_class_sessions": [lambda ids: call_tab(tab_sessions, "refresh_session_rows", ids)],
+                "t_attendance": [lambda ids: call_tab(tab_attendance, "refresh_attendance_rows", ids)],
+            })
+
+        # Row changes from other clients arrive on the listener thread and are
+        # applied here in batches, so a burst of writes costs one refresh per table.
+        change_events = queue.Queue()
+
+        def start_change_feed(refreshers):
+            # Drain queued events and hand {table: ids} to the tab refreshers.
+            def poll_changes():
+                events = []
+                while True:
+                    try:
+                        events.extend(change_events.get_nowait())
+                    except queue.Empty:
+                        break
+                for table, ids in change_feed.coalesce(events).items():
+                    for refresh in refreshers.get(table, ()):
+                        try:
+                            refresh(ids)
+                        except Exception:
+                            logging.exception("CHANGE FEED | refresh of %s failed", table)
+                root.after(500, poll_changes)
+
+            change_feed.start(change_events.put)
+            root.after(500, poll_changes)
+
+        # The connection is opened, and pending schema migrations applied, on a
+        # worker thread; (kind, value) results are handed back through a queue
+        # polled from the Tk main loop.
+        connect_results = queue.Queue()
+
+        def connected():
+            startup_timing.mark("db connected")
+            try:
+                schema_migrations.ensure_current(
+                    on_pending=lambda pending: connect_results.put(("migrating", len(pending)))
+                )
+            except Exception as exc:
+                connect_results.put(("schema_error", exc))
+                return
+            connect_results.put(("ready", None))
+
+        def start_connect():
+            db.connect_async(
+                on_ready=connected,
+                on_error=lambda exc: connect_results.put(("connect_error", exc)),
+            )
+            root.after(50, poll_connect)
+
+        def poll_connect():
+            try:
+                kind, value = connect_results.get_nowait()
+            except queue.Empty:
+                root.after(50, poll_connect)
+                return
+            if kind == "migrating":
+                connecting_lbl.config(text=t("label.updating_schema", count=value))
+                root.after(50, poll_connect)
+                return
+            if kind == "connect_error":
+                if db.resolve_connection_error(value, parent=root):
+                    start_connect()
+                else:
+                    root.destroy()
+                return
+            if kind == "schema_error":
+                _show_startup_error(value)
+                root.destroy()
+                return
+            startup_timing.mark("schema checked")
+            connecting_lbl.destroy()
+            background.init(root)
+            try:
+                start_app()
+            except Exception:
+                _show_startup_error()
+                root.destroy()
+
+        start_connect()
+        root.after_idle(lambda: startup_timing.mark("window shown"))
         root.mainloop()
     except Exception:
-        logging.error("APP STARTUP ERROR\n%s", traceback.format_exc())
-        try:
-            messagebox.showerror(
-                "Startup error",
-                "The app failed to start. Check app.log for details."
-            )
-        except Exception:
-            pass
+        _show_startup_error()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,12 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import sys
 
+sys.path.insert(0, SPECPATH)
+from lazy_imports import BUNDLED
+
+# app_settings.json is optional: without it the app falls back to environment settings.
+settings_datas = [('app_settings.json', '.')] if os.path.exists(os.path.join(SPECPATH, 'app_settings.json')) else []
 
 a = Analysis(
     ['gui.py'],
@@ -7,13 +14,15 @@ a = Analysis(
     binaries=[],
     datas=[
         ('i18n\\*.json', 'i18n'),
-        ('app_settings.json', '.'),
-    ],
+        ('migrations\\*.sql', 'migrations'),
+    ] + settings_datas,
     hiddenimports=[
         'keyring',
         'keyring.backends',
         'keyring.backends.Windows',
         'win32cred',
+        # Loaded through lazy_imports.load(), which PyInstaller cannot follow.
+        *BUNDLED,
     ],
     hookspath=[],
     hooksconfig={},
@@ -2,6 +2,8 @@ import json
 import os
 import sys
 
+import app_settings
+
 
 def _resolve_i18n_dir():
     if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
@@ -9,14 +11,7 @@ def _resolve_i18n_dir():
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), "i18n")
 
 
-def _resolve_settings_path():
-    if getattr(sys, "frozen", False):
-        return os.path.join(os.path.dirname(sys.executable), "app_settings.json")
-    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_settings.json")
-
-
 _I18N_DIR = _resolve_i18n_dir()
-_SETTINGS_PATH = _resolve_settings_path()
 _DEFAULT_LANG = "en"
 
 _language = _DEFAULT_LANG
@@ -33,15 +28,6 @@ def _load_json(path):
         return {}
 
 
-def _save_settings(data):
-    with open(_SETTINGS_PATH, "w", encoding="utf-8") as handle:
-        json.dump(data, handle, indent=2, sort_keys=True)
-
-
-def _load_settings():
-    return _load_json(_SETTINGS_PATH)
-
-
 def _load_translations(lang):
     path = os.path.join(_I18N_DIR, f"{lang}.json")
     return _load_json(path)
@@ -52,9 +38,7 @@ def set_language(lang, persist=True):
     _language = lang or _DEFAULT_LANG
     _translations = _load_translations(_language)
     if persist:
-        settings = _load_settings()
-        settings["language"] = _language
-        _save_settings(settings)
+        app_settings.save_value("language", _language)
 
 
 def get_language():
@@ -72,6 +56,5 @@ def t(key, default=None, **kwargs):
 
 
 def init_i18n():
-    settings = _load_settings()
-    lang = settings.get("language", _DEFAULT_LANG)
+    lang = app_settings.get("language", _DEFAULT_LANG)
     set_language(lang, persist=False)
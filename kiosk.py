@@ -0,0 +1,365 @@
+import logging
+import os
+import queue
+import sys
+import threading
+import tkinter as tk
+import traceback
+from datetime import date, datetime
+from tkinter import ttk, messagebox
+
+import app_settings
+import checkin_journal
+import db
+from i18n import init_i18n, t
+from student_directory import StudentDirectory
+
+
+# A session counts as current from this many minutes before its start until its end.
+EARLY_CHECKIN_MINUTES = 30
+# How long (ms) a check-in acknowledgement stays on screen.
+ACK_MS = 4000
+# How often (ms) the roster and today's sessions are re-read from Postgres.
+ROSTER_REFRESH_MS = 5 * 60 * 1000
+# How long (ms) to wait before connecting again once the staff declined to fix the settings.
+CONNECT_RETRY_MS = 60 * 1000
+# Name matches offered as buttons when the input is ambiguous.
+MAX_MATCHES = 6
+
+_STUDENTS = "SELECT id, name FROM t_students WHERE active = true ORDER BY name, id"
+_SESSIONS = """
+    SELECT cs.id, cs.start_time, cs.end_time, c.name
+    FROM t_class_sessions cs
+    JOIN t_classes c ON cs.class_id = c.id
+    WHERE cs.session_date = %s AND cs.cancelled = false
+    ORDER BY cs.start_time, cs.id
+"""
+_REGISTERED = """
+    SELECT a.session_id, a.student_id
+    FROM t_attendance a
+    JOIN t_class_sessions cs ON a.session_id = cs.id
+    WHERE cs.session_date = %s
+"""
+
+
+def _journal_path():
+    path = app_settings.get_value("kiosk", "journal_path")
+    if path:
+        return path
+    if getattr(sys, "frozen", False):
+        base = os.path.dirname(sys.executable)
+    else:
+        base = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base, "kiosk_journal.sqlite3")
+
+
+def _time_text(value):
+    return value.strftime("%H:%M") if value else ""
+
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def pick_session(sessions, now):
+    """
+    Id of the session to check into at `now` (a datetime.time) from today's
+    (id, "HH:MM" start, "HH:MM" end, label) rows: the one running (or starting
+    within EARLY_CHECKIN_MINUTES), else the next one, else the last one; None
+    when there are no sessions.
+    """
+    current = now.hour * 60 + now.minute
+    upcoming = None
+    for session_id, start, end, _ in sessions:
+        if not start:
+            continue
+        opens = _minutes(start) - EARLY_CHECKIN_MINUTES
+        if opens <= current and (not end or current <= _minutes(end)):
+            return session_id
+        if upcoming is None and opens > current:
+            upcoming = session_id
+    if upcoming is not None:
+        return upcoming
+    return sessions[-1][0] if sessions else None
+
+
+def roster_directory(students):
+    """
+    StudentDirectory over the kiosk roster ((id, name) rows of active students).
+    Its search() resolves kiosk input: a member number (as typed or scanned from
+    a QR card) matches the id; otherwise every word of the input must start a
+    word of the name, ignoring case and accents ("muller" finds "Müller").
+    """
+    directory = StudentDirectory()
+    directory.load((student_id, name, True, None) for student_id, name in students)
+    return directory
+
+
+def _write_batch(rows):
+    # Idempotent: a replayed batch hits the (session_id, student_id) key and is skipped.
+    db.insert_values(
+        "t_attendance",
+        ("session_id", "student_id", "status", "checkin_source", "checkin_time"),
+        rows,
+        on_conflict="ON CONFLICT DO NOTHING",
+        page_size=checkin_journal.DEFAULT_BATCH_SIZE,
+    )
+
+
+def _load_from_db(today):
+    students = [list(row) for row in db.execute(_STUDENTS)]
+    sessions = [
+        [session_id, _time_text(start), _time_text(end), f"{_time_text(start)} {name}".strip()]
+        for session_id, start, end, name in db.execute(_SESSIONS, (today,))
+    ]
+    registered = {tuple(row) for row in db.execute(_REGISTERED, (today,))}
+    return students, sessions, registered
+
+
+def main():
+    logging.basicConfig(
+        level=logging.ERROR,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+        handlers=[logging.FileHandler("app.log"), logging.StreamHandler()],
+        force=True,
+    )
+    try:
+        init_i18n()
+        journal = checkin_journal.CheckinJournal(_journal_path())
+        flusher = checkin_journal.Flusher(
+            journal,
+            _write_batch,
+            interval=float(app_settings.get_value("kiosk", "flush_interval", checkin_journal.DEFAULT_FLUSH_INTERVAL)),
+            batch_size=int(app_settings.get_value("kiosk", "batch_size", checkin_journal.DEFAULT_BATCH_SIZE)),
+        )
+
+        root = tk.Tk()
+        root.title(t("kiosk.title"))
+        root.attributes("-fullscreen", True)
+
+        style = ttk.Style(root)
+        style.configure("Kiosk.TLabel", font=("Segoe UI", 20))
+        style.configure("KioskTitle.TLabel", font=("Segoe UI", 32, "bold"))
+        style.configure("KioskAck.TLabel", font=("Segoe UI", 36, "bold"))
+        style.configure("Kiosk.TButton", font=("Segoe UI", 20), padding=12)
+        style.configure("Kiosk.TEntry", padding=10)
+
+        # The roster lives in memory; check-ins only touch the local journal.
+        state = {
+            "students": [],
+            "directory": roster_directory([]),
+            "sessions": [],
+            "online": False,
+            "ack_after": None,
+            # Offer the connection dialogs until the staff declines once.
+            "prompt": True,
+        }
+        # (session_id, student_id) already checked in, in Postgres or still journaled.
+        checked_in = set(journal.pending_pairs())
+        session_var = tk.StringVar()
+        input_var = tk.StringVar()
+        db_results = queue.Queue()
+
+        # Show a roster (from Postgres or the last snapshot) and pick the current session.
+        def apply_roster(students, sessions):
+            state["students"] = students
+            state["sessions"] = sessions
+            state["directory"] = roster_directory(students)
+            labels = [row[3] for row in sessions]
+            session_cb["values"] = labels
+            now = datetime.now().time()
+            current_id = session_id_for(session_var.get())
+            current = next((row for row in sessions if row[0] == current_id), None)
+            # Keep a session the coach picked until it is over.
+            if current is None or (current[2] and _minutes(current[2]) < now.hour * 60 + now.minute):
+                current_id = pick_session(sessions, now)
+            session_var.set(next((row[3] for row in sessions if row[0] == current_id), ""))
+            update_status()
+
+        def session_id_for(label):
+            return next((row[0] for row in state["sessions"] if row[3] == label), None)
+
+        # Re-read the roster on a worker thread; the UI keeps running from memory meanwhile.
+        def refresh_roster():
+            today = date.today()
+
+            def worker():
+                try:
+                    db_results.put((today, _load_from_db(today), None))
+                except Exception as exc:
+                    db_results.put((today, None, exc))
+
+            threading.Thread(target=worker, name="kiosk-roster", daemon=True).start()
+            root.after(ROSTER_REFRESH_MS, refresh_roster)
+
+        def poll_db_results():
+            try:
+                today, result, exc = db_results.get_nowait()
+            except queue.Empty:
+                root.after(200, poll_db_results)
+                return
+            if exc is not None:
+                logging.error("KIOSK | roster refresh failed: %s", exc)
+                state["online"] = False
+            else:
+                students, sessions, registered = result
+                state["online"] = True
+                checked_in.update(registered)
+                journal.save_snapshot("students", students)
+                journal.save_snapshot("sessions", {"date": today.isoformat(), "rows": sessions})
+                apply_roster(students, sessions)
+            update_status()
+            root.after(200, poll_db_results)
+
+        def update_status():
+            pending = journal.count()
+            if flusher.last_error is not None or not state["online"]:
+                text = t("kiosk.offline", count=pending)
+            elif pending:
+                text = t("kiosk.pending", count=pending)
+            else:
+                text = t("kiosk.synced")
+            status_lbl.config(text=f"{text}  ·  {t('kiosk.students', count=len(state['students']))}")
+
+        def poll_status():
+            update_status()
+            root.after(1000, poll_status)
+
+        def acknowledge(text, color):
+            if state["ack_after"] is not None:
+                root.after_cancel(state["ack_after"])
+            ack_lbl.config(text=text, foreground=color)
+            state["ack_after"] = root.after(ACK_MS, lambda: ack_lbl.config(text=""))
+
+        def clear_matches():
+            for child in matches_frame.winfo_children():
+                child.destroy()
+
+        # Journal the check-in and acknowledge at once; Postgres is written behind.
+        def check_in(student_id):
+            clear_matches()
+            input_var.set("")
+            session_id = session_id_for(session_var.get())
+            name = state["directory"].name(student_id) or f"#{student_id}"
+            if session_id is None:
+                acknowledge(t("kiosk.no_session"), "firebrick")
+                return
+            if (session_id, student_id) in checked_in:
+                acknowledge(t("kiosk.already", name=name), "darkorange")
+                return
+            journal.add(session_id, student_id, "kiosk")
+            checked_in.add((session_id, student_id))
+            flusher.wake()
+            acknowledge(t("kiosk.welcome", name=name), "forestgreen")
+            update_status()
+
+        # Enter: one match checks in, several are offered as buttons.
+        def on_submit(event=None):
+            clear_matches()
+            matches = state["directory"].search(input_var.get(), MAX_MATCHES)
+            if not matches:
+                acknowledge(t("kiosk.not_found"), "firebrick")
+                input_var.set("")
+                return
+            if len(matches) == 1:
+                check_in(matches[0][0])
+                return
+            ack_lbl.config(text=t("kiosk.choose"), foreground="black")
+            for student_id, name in matches:
+                ttk.Button(
+                    matches_frame,
+                    text=name,
+                    style="Kiosk.TButton",
+                    command=lambda sid=student_id: check_in(sid),
+                ).pack(fill="x", pady=4)
+
+        # Ctrl+Shift+Q leaves the kiosk after one last flush attempt.
+        def quit_kiosk(event=None):
+            if not messagebox.askyesno(t("kiosk.title"), t("kiosk.confirm_quit")):
+                return
+            flusher.stop()
+            journal.close()
+            root.destroy()
+
+        frame = ttk.Frame(root, padding=40)
+        frame.pack(fill="both", expand=True)
+        frame.columnconfigure(0, weight=1)
+
+        ttk.Label(frame, text=t("kiosk.title"), style="KioskTitle.TLabel").grid(row=0, column=0, pady=(0, 20))
+
+        session_cb = ttk.Combobox(frame, textvariable=session_var, state="readonly", font=("Segoe UI", 20))
+        session_cb.grid(row=1, column=0, sticky="ew", pady=10)
+        session_cb.bind("<<ComboboxSelected>>", lambda event: entry.focus_set())
+
+        ttk.Label(frame, text=t("kiosk.prompt"), style="Kiosk.TLabel").grid(row=2, column=0, pady=(30, 5))
+        entry = ttk.Entry(frame, textvariable=input_var, font=("Segoe UI", 32), justify="center", style="Kiosk.TEntry")
+        entry.grid(row=3, column=0, sticky="ew")
+        entry.bind("<Return>", on_submit)
+        entry.bind("<KP_Enter>", on_submit)
+
+        ack_lbl = ttk.Label(frame, text="", style="KioskAck.TLabel")
+        ack_lbl.grid(row=4, column=0, pady=30)
+
+        matches_frame = ttk.Frame(frame)
+        matches_frame.grid(row=5, column=0, sticky="ew")
+
+        status_lbl = ttk.Label(frame, text="", style="Kiosk.TLabel", foreground="gray")
+        status_lbl.grid(row=6, column=0, sticky="s", pady=(40, 0))
+        frame.rowconfigure(6, weight=1)
+
+        root.bind("<Control-Shift-Q>", quit_kiosk)
+        root.protocol("WM_DELETE_WINDOW", quit_kiosk)
+
+        # Start from the last snapshot so check-in works before (or without) the database.
+        students = journal.load_snapshot("students") or []
+        sessions = journal.load_snapshot("sessions") or {}
+        if sessions.get("date") != date.today().isoformat():
+            sessions = {"rows": []}
+        apply_roster([tuple(row) for row in students], [tuple(row) for row in sessions["rows"]])
+
+        # The pool is opened on a worker thread and any dialog (credentials, DB
+        # settings) shown here on the Tk thread; the flusher and the roster refresh
+        # only start once it is open, so they never prompt from a worker.
+        connect_results = queue.Queue()
+
+        def start_connect():
+            db.connect_async(
+                on_ready=lambda: connect_results.put(None),
+                on_error=connect_results.put,
+            )
+            root.after(50, poll_connect)
+
+        def poll_connect():
+            try:
+                exc = connect_results.get_nowait()
+            except queue.Empty:
+                root.after(50, poll_connect)
+                return
+            if exc is None:
+                flusher.start()
+                refresh_roster()
+                root.after(200, poll_db_results)
+                return
+            logging.error("KIOSK | connecting to the database failed: %s", exc)
+            if state["prompt"] and db.resolve_connection_error(exc, parent=root):
+                start_connect()
+                return
+            # Keep checking in offline and try again later without asking.
+            state["prompt"] = False
+            root.after(CONNECT_RETRY_MS, start_connect)
+
+        start_connect()
+        root.after(1000, poll_status)
+        entry.focus_set()
+        root.mainloop()
+    except Exception:
+        logging.error("KIOSK STARTUP ERROR\n%s", traceback.format_exc())
+        try:
+            messagebox.showerror("Startup error", "The kiosk failed to start. Check app.log for details.")
+        except Exception:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import importlib
+import sys
+import time
+
+
+# Every module the app loads through load(). PyInstaller cannot follow these imports:
+# gui.spec bundles them as hidden imports and "gui.exe --check-imports" tries them
+# in the frozen build.
+BUNDLED = (
+    "ui.about",
+    "ui.attendance",
+    "ui.locations",
+    "ui.news_notifications",
+    "ui.reports",
+    "ui.sessions",
+    "ui.students",
+    "ui.teachers",
+    "matplotlib",
+    "matplotlib.figure",
+    "matplotlib.backends.backend_tkagg",
+    "tkcalendar",
+    "reportlab.lib.pagesizes",
+    "reportlab.pdfgen.canvas",
+    "openpyxl",
+)
+
+# name -> cumulative import time in ms (includes everything the module pulled in).
+_timings = {}
+
+
+def load(name):
+    """
+    Import `name` on first use and record how long it took. Heavy dependencies
+    (matplotlib, tkcalendar, reportlab, openpyxl) and the tab modules go through
+    here so they are only paid for when a tab or feature needs them.
+    Modules loaded this way must be listed in BUNDLED.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    _timings[name] = (time.perf_counter() - started) * 1000
+    return module
+
+
+def timings():
+    """Recorded imports, slowest first, as (name, ms)."""
+    return sorted(_timings.items(), key=lambda item: item[1], reverse=True)
+
+
+def summary():
+    return " | ".join(f"{name} {ms:.0f} ms" for name, ms in timings()) or "--"
+
+
+def check_bundled():
+    """Import every BUNDLED module; returns (name, error) for the ones that fail."""
+    failed = []
+    for name in BUNDLED:
+        try:
+            importlib.import_module(name)
+        except Exception as exc:
+            failed.append((name, exc))
+    return failed
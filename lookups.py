@@ -0,0 +1,54 @@
+import db
+
+
+# Active rows of each reference table, as shown in the comboboxes.
+_QUERIES = {
+    "locations": "SELECT id, name FROM t_locations WHERE active = true ORDER BY name",
+    # Filters (reports, sessions list) also offer inactive rows.
+    "locations_all": "SELECT id, name FROM t_locations ORDER BY name",
+    "coaches": "SELECT id, name FROM public.t_coaches WHERE active = true ORDER BY name",
+    "classes": "SELECT id, name FROM t_classes WHERE active = true ORDER BY name",
+    "classes_all": "SELECT id, name FROM t_classes ORDER BY name",
+}
+
+# entity -> Lookup built from the last rows read.
+_lookups = {}
+
+
+def make_label(row_id, name):
+    return f"{name} (#{row_id})"
+
+
+class Lookup:
+    """id -> label and label -> id maps for one reference table; labels keep the query order."""
+
+    def __init__(self, rows):
+        self.rows = tuple(tuple(row) for row in rows)
+        self.labels = [make_label(row_id, name) for row_id, name in self.rows]
+        self.label_by_id = dict(zip((row_id for row_id, _ in self.rows), self.labels))
+        self.id_by_label = {label: row_id for row_id, label in self.label_by_id.items()}
+
+    def label(self, row_id):
+        """Combobox label for an id; "" when the id is unknown or inactive."""
+        return self.label_by_id.get(row_id, "")
+
+    def id(self, label):
+        return self.id_by_label.get(label)
+
+
+def load(entity):
+    """
+    Re-read `entity` through the lookup result cache and return its Lookup. The
+    maps are rebuilt only when the rows changed (a write evicts the cached rows).
+    """
+    rows = db.execute(_QUERIES[entity], cache_ttl=db.LOOKUP_CACHE_TTL)
+    current = _lookups.get(entity)
+    if current is None or current.rows != tuple(tuple(row) for row in rows):
+        current = _lookups[entity] = Lookup(rows)
+    return current
+
+
+def get(entity):
+    """The last loaded Lookup for `entity`, without a query once it has been loaded."""
+    current = _lookups.get(entity)
+    return current if current is not None else load(entity)
@@ -0,0 +1,23 @@
+-- Locations table and the optional student -> location link.
+CREATE TABLE IF NOT EXISTS t_locations (
+    id serial PRIMARY KEY,
+    name text NOT NULL UNIQUE,
+    phone text,
+    address text,
+    active boolean NOT NULL DEFAULT true,
+    created_at timestamp NOT NULL DEFAULT now(),
+    updated_at timestamp
+);
+
+ALTER TABLE t_students
+ADD COLUMN IF NOT EXISTS location_id integer;
+
+DO $$
+BEGIN
+    ALTER TABLE t_students
+    ADD CONSTRAINT fk_students_location
+    FOREIGN KEY (location_id)
+    REFERENCES t_locations(id);
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
@@ -0,0 +1,13 @@
+-- Newsletter consent, minor flag and guardian contact columns on students.
+ALTER TABLE t_students
+ADD COLUMN IF NOT EXISTS newsletter_opt_in boolean NOT NULL DEFAULT true;
+
+ALTER TABLE t_students
+ADD COLUMN IF NOT EXISTS is_minor boolean NOT NULL DEFAULT false;
+
+ALTER TABLE t_students
+ADD COLUMN IF NOT EXISTS guardian_name varchar(120),
+ADD COLUMN IF NOT EXISTS guardian_email varchar(120),
+ADD COLUMN IF NOT EXISTS guardian_phone varchar(50),
+ADD COLUMN IF NOT EXISTS guardian_phone2 varchar(50),
+ADD COLUMN IF NOT EXISTS guardian_relationship varchar(50);
@@ -0,0 +1,13 @@
+-- Sessions can be held at a specific location.
+ALTER TABLE t_class_sessions
+ADD COLUMN IF NOT EXISTS location_id integer;
+
+DO $$
+BEGIN
+    ALTER TABLE t_class_sessions
+    ADD CONSTRAINT fk_sessions_location
+    FOREIGN KEY (location_id)
+    REFERENCES t_locations(id);
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
@@ -0,0 +1,47 @@
+-- Tell other clients which rows changed: NOTIFY bjj_changes '{"table": ..., "op": ..., "id": ...}'.
+-- The trigger argument names the column sent as "id" (attendance rows are keyed by session).
+CREATE OR REPLACE FUNCTION bjj_notify_change() RETURNS trigger AS $$
+DECLARE
+    row_data jsonb;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
+    ELSE
+        row_data := to_jsonb(NEW);
+    END IF;
+    PERFORM pg_notify(
+        'bjj_changes',
+        json_build_object(
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'id', row_data -> TG_ARGV[0]
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_students_notify ON t_students;
+CREATE TRIGGER trg_students_notify
+AFTER INSERT OR UPDATE OR DELETE ON t_students
+FOR EACH ROW EXECUTE PROCEDURE bjj_notify_change('id');
+
+DROP TRIGGER IF EXISTS trg_locations_notify ON t_locations;
+CREATE TRIGGER trg_locations_notify
+AFTER INSERT OR UPDATE OR DELETE ON t_locations
+FOR EACH ROW EXECUTE PROCEDURE bjj_notify_change('id');
+
+DROP TRIGGER IF EXISTS trg_classes_notify ON t_classes;
+CREATE TRIGGER trg_classes_notify
+AFTER INSERT OR UPDATE OR DELETE ON t_classes
+FOR EACH ROW EXECUTE PROCEDURE bjj_notify_change('id');
+
+DROP TRIGGER IF EXISTS trg_class_sessions_notify ON t_class_sessions;
+CREATE TRIGGER trg_class_sessions_notify
+AFTER INSERT OR UPDATE OR DELETE ON t_class_sessions
+FOR EACH ROW EXECUTE PROCEDURE bjj_notify_change('id');
+
+DROP TRIGGER IF EXISTS trg_attendance_notify ON t_attendance;
+CREATE TRIGGER trg_attendance_notify
+AFTER INSERT OR UPDATE OR DELETE ON t_attendance
+FOR EACH ROW EXECUTE PROCEDURE bjj_notify_change('session_id');
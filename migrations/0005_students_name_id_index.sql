@@ -0,0 +1,2 @@
+-- Supports keyset pagination of the reports search: ORDER BY name, id with a (name, id) > (...) seek.
+CREATE INDEX IF NOT EXISTS idx_students_name_id ON t_students (name, id);
@@ -0,0 +1,21 @@
+-- Trigram search over every student contact field (reports smart search).
+-- The search text is wrapped in an IMMUTABLE function so it can be indexed;
+-- queries must use the same call (ui/reports.py STUDENT_SEARCH_TEXT) to hit the index.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION bjj_student_search_text(
+    name TEXT,
+    email TEXT,
+    phone TEXT,
+    phone2 TEXT,
+    guardian_name TEXT,
+    guardian_email TEXT,
+    guardian_phone TEXT
+) RETURNS TEXT AS $$
+    SELECT concat_ws(' ', name, email, phone, phone2, guardian_name, guardian_email, guardian_phone)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- Serves both ILIKE '%term%' and the word-similarity (<%) typo match.
+CREATE INDEX IF NOT EXISTS idx_students_search_trgm ON t_students USING gin (
+    bjj_student_search_text(name, email, phone, phone2, guardian_name, guardian_email, guardian_phone) gin_trgm_ops
+);
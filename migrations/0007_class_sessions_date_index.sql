@@ -0,0 +1,3 @@
+-- Supports the sessions tab date window: session_date BETWEEN ... ORDER BY session_date, start_time, id DESC
+-- with a (session_date, start_time, id) < (...) seek while scrolling.
+CREATE INDEX IF NOT EXISTS idx_class_sessions_date_time ON t_class_sessions (session_date, start_time, id);
@@ -0,0 +1,19 @@
+-- The in-memory student directory (student_directory.py) re-reads only rows with
+-- updated_at >= its last watermark: keep updated_at set on every insert and update,
+-- whoever writes, and index it for that range scan.
+ALTER TABLE t_students ADD COLUMN IF NOT EXISTS updated_at timestamp;
+ALTER TABLE t_students ALTER COLUMN updated_at SET DEFAULT now();
+
+CREATE OR REPLACE FUNCTION bjj_touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_students_touch ON t_students;
+CREATE TRIGGER trg_students_touch
+BEFORE UPDATE ON t_students
+FOR EACH ROW EXECUTE PROCEDURE bjj_touch_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_students_updated_at ON t_students (updated_at);
@@ -0,0 +1,6 @@
+-- The sessions tab sorts and seeks on (session_date, COALESCE(start_time, TIME '00:00'), id)
+-- so sessions without a start time page correctly; index that expression instead of the
+-- plain start_time from 0007.
+CREATE INDEX IF NOT EXISTS idx_class_sessions_date_start_key
+    ON t_class_sessions (session_date, (COALESCE(start_time, TIME '00:00')), id);
+DROP INDEX IF EXISTS idx_class_sessions_date_time;
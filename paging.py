@@ -0,0 +1,141 @@
+import db
+
+
+# Counts are cached until a write to a counted table (local or via change_feed) evicts them.
+COUNT_CACHE_TTL = 300
+# Below this many rows an exact count is cheap enough even for unfiltered views.
+APPROX_COUNT_MIN_ROWS = 10000
+
+
+def seek_where(where, columns, key, descending=False):
+    """
+    Add a keyset predicate "(columns) > (key)" ("<" for descending order) to an
+    existing WHERE clause ("WHERE ..." or ""). Returns (where_sql, params); key
+    None means first page.
+    """
+    if key is None:
+        return where, []
+    op = "<" if descending else ">"
+    clause = f"({', '.join(columns)}) {op} ({', '.join(['%s'] * len(columns))})"
+    if where.strip():
+        return f"{where} AND {clause}", list(key)
+    return f"WHERE {clause}", list(key)
+
+
+def page_count(total, page_size):
+    return max(1, (total + page_size - 1) // page_size)
+
+
+class KeysetPager:
+    """
+    Page boundaries for keyset pagination. The boundary of page n is the sort
+    key of the last row before it (page 0 has none). Boundaries are learned as
+    pages are fetched, so Prev/Next and revisits seek straight to their rows;
+    a jump lands on the nearest known boundary and skips forward from there.
+    """
+
+    def __init__(self, page_size):
+        self.page_size = page_size
+        self.reset()
+
+    def reset(self):
+        """Forget all boundaries (filter or sort order changed)."""
+        self.page = 0
+        self._boundaries = {0: None}
+
+    def nearest(self, page):
+        """Return (known_page, key) for the closest known boundary at or before page."""
+        known = max(p for p in self._boundaries if p <= page)
+        return known, self._boundaries[known]
+
+    def remember(self, page, key):
+        self._boundaries[page] = key
+
+    def record_page(self, page, rows, key_of):
+        """Store the boundary of the next page after fetching `page`."""
+        if len(rows) >= self.page_size:
+            self._boundaries[page + 1] = key_of(rows[-1])
+
+
+def estimated_row_count(table):
+    """Planner estimate from pg_class.reltuples; None when the table was never analyzed."""
+    rows = db.execute(
+        "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+        (table,),
+        cache_ttl=COUNT_CACHE_TTL,
+    )
+    if not rows or rows[0][0] is None or rows[0][0] < 0:
+        return None
+    return rows[0][0]
+
+
+def fetch_page(columns, from_sql, where, params, order_by, after_key, page_start, page_size,
+               count_from=None, approx_table=None, cache_ttl=None):
+    """
+    Fetch one keyset page and the total row count for `where` in one statement.
+
+    The page query carries COUNT(*) OVER (), which counts the rows from this
+    page to the end; adding page_start (rows on earlier pages) gives the total.
+    The total is cached under "SELECT COUNT(*) FROM <count_from> <where>", so
+    later pages with the same filter skip the window. Unfiltered views of
+    `approx_table` with many rows use the planner estimate instead.
+
+    With cache_ttl the whole page is kept in the db result cache as well, so
+    revisiting a filter (e.g. backspacing in a search box) needs no query; a
+    write to any table the page reads evicts it.
+
+    Returns (rows, total, exact).
+    """
+    count_sql = f"SELECT COUNT(*) FROM {count_from or from_sql} {where}"
+    seek_sql, seek_params = seek_where(where, order_by, after_key)
+    page_params = tuple(list(params) + seek_params + [page_size])
+    order_sql = ", ".join(order_by)
+
+    def page_query(window):
+        extra = ", COUNT(*) OVER ()" if window else ""
+        return f"""
+            SELECT {columns}{extra}
+            FROM {from_sql}
+            {seek_sql}
+            ORDER BY {order_sql}
+            LIMIT %s
+        """
+
+    page_key = (page_query(False), page_params + (page_start,))
+    if cache_ttl:
+        hit, cached = db.cached_result(*page_key)
+        if hit:
+            rows, total, exact = cached[0]
+            return list(rows), total, exact
+        generation = db.cache_generation()
+        rows, total, exact = fetch_page(
+            columns, from_sql, where, params, order_by, after_key, page_start, page_size, count_from, approx_table
+        )
+        db.cache_result(*page_key, [(tuple(rows), total, exact)], cache_ttl, generation)
+        return rows, total, exact
+
+    hit, cached = db.cached_result(count_sql, tuple(params))
+    if hit:
+        return db.execute(page_query(False), page_params), cached[0][0], True
+
+    if approx_table and not where.strip():
+        estimate = estimated_row_count(approx_table)
+        if estimate is not None and estimate >= APPROX_COUNT_MIN_ROWS:
+            rows = db.execute(page_query(False), page_params)
+            if len(rows) < page_size:
+                # The last page pins the exact total.
+                return rows, page_start + len(rows), True
+            return rows, max(estimate, page_start + len(rows)), False
+
+    generation = db.cache_generation()
+    rows = db.execute(page_query(True), page_params)
+    if rows:
+        total = page_start + rows[0][-1]
+        rows = [row[:-1] for row in rows]
+    elif after_key is None:
+        total = 0
+    else:
+        # Seeked past the end: the window has nothing to count.
+        return rows, db.execute(count_sql, tuple(params), cache_ttl=COUNT_CACHE_TTL)[0][0], True
+    db.cache_result(count_sql, tuple(params), [(total,)], COUNT_CACHE_TTL, generation)
+    return rows, total, True
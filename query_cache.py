@@ -0,0 +1,152 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+_WHITESPACE = re.compile(r"\s+")
+# A (schema-qualified) table name; a following "(" makes it a function call (unnest(...)).
+_TABLE = r"((?:[a-z_]\w*\.)?[a-z_]\w*)(?![\w.])"
+_READ_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+" + _TABLE + r"(?!\s*\()", re.IGNORECASE)
+_WRITE_TABLES = re.compile(
+    r"\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?|ALTER\s+TABLE(?:\s+IF\s+EXISTS)?"
+    r"|DROP\s+TABLE(?:\s+IF\s+EXISTS)?)\s+(?:ONLY\s+)?" + _TABLE,
+    re.IGNORECASE,
+)
+# FROM inside EXTRACT(MONTH FROM s.birthday), SUBSTRING(x FROM 2), TRIM(... FROM x) names no table.
+_FROM_IN_FUNCTION = re.compile(r"\b(?:EXTRACT|SUBSTRING|TRIM|OVERLAY|POSITION)\s*\([^()]*\)", re.IGNORECASE)
+# Neither does UPDATE in ON CONFLICT ... DO UPDATE SET or SELECT ... FOR UPDATE.
+_UPDATE_CLAUSE = re.compile(r"\b(?:DO|FOR(?:\s+NO\s+KEY)?)\s+UPDATE\b", re.IGNORECASE)
+_READ_ONLY_START = re.compile(r"^\s*(?:SELECT|WITH|VALUES|SHOW|EXPLAIN)\b", re.IGNORECASE)
+_WRITE_KEYWORD = re.compile(r"\b(?:INSERT|UPDATE|DELETE|TRUNCATE|ALTER|DROP|CREATE)\b", re.IGNORECASE)
+
+
+def normalize_sql(query):
+    return _WHITESPACE.sub(" ", str(query)).strip()
+
+
+def _table_name(name):
+    name = name.lower()
+    return name[len("public."):] if name.startswith("public.") else name
+
+
+def tables_read(query):
+    text = _FROM_IN_FUNCTION.sub(" ", str(query))
+    return {_table_name(m) for m in _READ_TABLES.findall(text)}
+
+
+def tables_written(query):
+    """
+    Tables a statement may modify. Returns None for writes whose targets can't
+    be determined (DO blocks, DDL, functions), meaning "invalidate everything".
+    """
+    text = _UPDATE_CLAUSE.sub(" ", str(query))
+    if _READ_ONLY_START.match(text) and not _WRITE_KEYWORD.search(text):
+        return set()
+    tables = {_table_name(m) for m in _WRITE_TABLES.findall(text)}
+    return tables or None
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    hash(value)
+    return value
+
+
+class QueryCache:
+    """
+    LRU cache of query results with per-entry TTL. Every entry is tagged with
+    the tables it read so a write to any of them evicts it.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query, params=None):
+        """Key on normalized SQL + params; None when params are not hashable."""
+        try:
+            return (normalize_sql(query), _freeze(params or ()))
+        except TypeError:
+            return None
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        """Return (hit, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            value, tables, expires = entry
+            if expires <= time.monotonic():
+                self._drop(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key, value, tables, ttl, generation=None):
+        """
+        Store a result. Pass the `generation` read before running the query so a
+        result that raced with a write (and may already be stale) is not stored.
+        """
+        if key is None or ttl is None or ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            tables = frozenset(tables)
+            self._entries[key] = (value, tables, time.monotonic() + ttl)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        _, tables, _ = self._entries.pop(key)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def invalidate_tables(self, tables):
+        with self._lock:
+            self._generation += 1
+            for table in {_table_name(t) for t in tables}:
+                for key in list(self._by_table.get(table, ())):
+                    self._drop(key)
+
+    def invalidate_for(self, query):
+        """Evict whatever a statement may have changed."""
+        tables = tables_written(query)
+        if tables is None:
+            self.clear()
+        elif tables:
+            self.invalidate_tables(tables)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_table.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,139 @@
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+import app_settings
+
+
+# Upper bounds (ms) of the latency histogram buckets; one extra open-ended bucket follows.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+DEFAULT_SLOW_QUERY_MS = 200
+SLOW_QUERY_LOG = "slow_queries.log"
+
+# Frames from these modules are skipped when looking for the caller of a query, so
+# a page fetched through paging/lookups/VirtualTreeview is charged to the screen asking for it.
+_INTERNAL_MODULES = {__name__, "db", "contextlib", "paging", "lookups", "ui.virtual_tree"}
+
+_lock = threading.Lock()
+_stats = {}
+_slow_logger = None
+
+
+class _SiteStats:
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, pct):
+        # Resolution is the bucket bound; the open-ended bucket reports the observed max.
+        target = self.count * pct / 100.0
+        seen = 0
+        for idx, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return float(BUCKETS_MS[idx]) if idx < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+
+def call_site():
+    """Return "module.function" of the first caller outside the query helpers (_INTERNAL_MODULES)."""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") in _INTERNAL_MODULES:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+def slow_query_threshold_ms():
+    value = app_settings.get_value("logging", "slow_query_ms", DEFAULT_SLOW_QUERY_MS)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float(DEFAULT_SLOW_QUERY_MS)
+
+
+def slow_query_log_path():
+    # Next to the exe when frozen (it may be started from any directory), else in the project root.
+    if getattr(sys, "frozen", False):
+        base = os.path.dirname(sys.executable)
+    else:
+        base = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base, SLOW_QUERY_LOG)
+
+
+def _get_slow_logger():
+    global _slow_logger
+    if _slow_logger is None:
+        logger = logging.getLogger("bjj.slow_queries")
+        logger.setLevel(logging.WARNING)
+        logger.propagate = False
+        if not logger.handlers:
+            handler = logging.FileHandler(slow_query_log_path(), encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s | %(message)s"))
+            logger.addHandler(handler)
+        _slow_logger = logger
+    return _slow_logger
+
+
+def record(site, elapsed_ms, query=None):
+    """Add one query timing; returns True when it crossed the slow-query threshold."""
+    with _lock:
+        stats = _stats.get(site)
+        if stats is None:
+            stats = _stats[site] = _SiteStats()
+        stats.add(elapsed_ms)
+    if elapsed_ms < slow_query_threshold_ms():
+        return False
+    sql_text = " ".join(str(query or "").split())
+    _get_slow_logger().warning("%.1f ms | %s | %s", elapsed_ms, site, sql_text[:500])
+    return True
+
+
+@contextmanager
+def timed(query):
+    site = call_site()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(site, (time.perf_counter() - start) * 1000.0, query)
+
+
+def snapshot():
+    """Per call site: count, avg/p50/p95/max/total ms, slowest total first."""
+    with _lock:
+        items = list(_stats.items())
+        rows = [
+            {
+                "site": site,
+                "count": s.count,
+                "avg_ms": s.total_ms / s.count if s.count else 0.0,
+                "p50_ms": s.percentile(50),
+                "p95_ms": s.percentile(95),
+                "max_ms": s.max_ms,
+                "total_ms": s.total_ms,
+            }
+            for site, s in items
+        ]
+    rows.sort(key=lambda r: r["total_ms"], reverse=True)
+    return rows
+
+
+def reset():
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,135 @@
+import hashlib
+import logging
+import os
+import re
+import sys
+
+from psycopg2 import errors
+
+from db import connection
+
+
+_MIGRATION_FILE = re.compile(r"^(\d{4})_([A-Za-z0-9_]+)\.sql$")
+
+# Serializes migration runs when several desktop clients start at the same time.
+_ADVISORY_LOCK_KEY = 7302419
+
+
+class MigrationError(RuntimeError):
+    """Migration files on disk do not match what the database recorded."""
+    pass
+
+
+def _resolve_migrations_dir():
+    if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
+        return os.path.join(sys._MEIPASS, "migrations")
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+_MIGRATIONS_DIR = _resolve_migrations_dir()
+
+
+def checksum(sql_text):
+    # Normalize line endings so a Windows checkout hashes the same as a Linux one.
+    normalized = sql_text.replace("\r\n", "\n").strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def load_migrations(directory=None):
+    """Return [(version, name, checksum, sql)] for every NNNN_name.sql file, ordered by version."""
+    directory = directory or _MIGRATIONS_DIR
+    migrations = []
+    seen = {}
+    for filename in sorted(os.listdir(directory)):
+        match = _MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in seen:
+            raise MigrationError(f"Duplicate migration version {version}: {seen[version]} and {filename}")
+        seen[version] = filename
+        with open(os.path.join(directory, filename), "r", encoding="utf-8") as handle:
+            sql_text = handle.read()
+        migrations.append((version, match.group(2), checksum(sql_text), sql_text))
+    return migrations
+
+
+def pending_migrations(migrations, applied):
+    """
+    Compare migration files with the {version: checksum} rows from schema_migrations
+    and return the migrations that still need to run.
+    """
+    known = {version for version, _, _, _ in migrations}
+    for version, name, digest, _ in migrations:
+        if version in applied and applied[version] != digest:
+            raise MigrationError(
+                f"Migration {version:04d}_{name}.sql was changed after it was applied. "
+                "Add a new migration instead of editing an applied one."
+            )
+    unknown = sorted(set(applied) - known)
+    if unknown:
+        logging.error("SCHEMA | database has migrations this app does not know: %s", unknown)
+    return [m for m in migrations if m[0] not in applied]
+
+
+def _applied_versions(cur):
+    try:
+        cur.execute("SELECT version, checksum FROM schema_migrations")
+    except errors.UndefinedTable:
+        return {}
+    return {version: digest.strip() for version, digest in cur.fetchall()}
+
+
+def is_current(migrations=None):
+    migrations = load_migrations() if migrations is None else migrations
+    with connection() as conn, conn.cursor() as cur:
+        return not pending_migrations(migrations, _applied_versions(cur))
+
+
+def ensure_current(on_pending=None):
+    """
+    Bring the schema up to date. When nothing is pending this is a single
+    SELECT on schema_migrations and no DDL runs. Otherwise on_pending(pending)
+    is called first (DDL such as index builds can take a while). Returns the
+    versions applied.
+    """
+    migrations = load_migrations()
+    with connection() as conn:
+        with conn.cursor() as cur:
+            pending = pending_migrations(migrations, _applied_versions(cur))
+        if not pending:
+            return []
+        if on_pending is not None:
+            on_pending(pending)
+
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (_ADVISORY_LOCK_KEY,))
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version integer PRIMARY KEY,
+                        name text NOT NULL,
+                        checksum char(64) NOT NULL,
+                        applied_at timestamp NOT NULL DEFAULT now()
+                    )
+                """)
+                # Another client may have migrated while we waited for the lock.
+                pending = pending_migrations(migrations, _applied_versions(cur))
+                for version, name, digest, sql_text in pending:
+                    cur.execute(sql_text)
+                    cur.execute(
+                        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                        (version, name, digest),
+                    )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.autocommit = True
+
+    applied = [version for version, _, _, _ in pending]
+    if applied:
+        logging.error("SCHEMA | applied migrations %s", applied)
+    return applied
@@ -0,0 +1,21 @@
+import time
+
+
+# Import this module first; startup is measured from here.
+_START = time.perf_counter()
+_marks = []
+
+
+def mark(name):
+    """Record the first time `name` happens, in seconds since startup."""
+    if any(existing == name for existing, _ in _marks):
+        return
+    _marks.append((name, time.perf_counter() - _START))
+
+
+def marks():
+    return list(_marks)
+
+
+def summary():
+    return " | ".join(f"{name} {seconds:.2f} s" for name, seconds in _marks) or "--"
@@ -0,0 +1,205 @@
+import bisect
+import threading
+import unicodedata
+from datetime import timedelta
+
+import db
+from lookups import make_label
+
+
+# How often (ms) the GUI catches up on changes the change feed may have missed.
+REFRESH_INTERVAL_MS = 60 * 1000
+# Rows changed this long before the newest updated_at seen are read again, so a
+# transaction that committed after a later one is not missed.
+REFRESH_OVERLAP = timedelta(minutes=1)
+
+_COLUMNS = "SELECT id, name, active, updated_at FROM t_students"
+
+
+def fold(text):
+    """
+    Accent- and case-folded form used for matching; punctuation separates words:
+    "Zoë  Müller-Ries" -> "zoe muller ries".
+    """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(
+        (ch if ch.isalnum() else " ") for ch in decomposed if not unicodedata.combining(ch)
+    )
+    return " ".join(stripped.casefold().split())
+
+
+def _keys(words):
+    # The folded name from each word on: ("maria", "anders") -> "maria anders", "anders".
+    return {" ".join(words[i:]) for i in range(len(words))}
+
+
+class StudentDirectory:
+    """
+    In-memory student name index: a sorted list of (folded key, id) with one
+    key per word start, so search() is a bisect plus a short scan. Rows are
+    (id, name, active, updated_at); upsert()/remove() keep the list sorted
+    without a rebuild. Safe to share between the Tk thread and workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        # id -> (name, active, folded name words)
+        self._students = {}
+        self.watermark = None
+        self.max_id = 0
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._students)
+
+    def load(self, rows):
+        """Replace the whole index with `rows`."""
+        students = {}
+        entries = []
+        watermark = None
+        for student_id, name, active, updated_at in rows:
+            words = tuple(fold(name).split())
+            students[student_id] = (name, bool(active), words)
+            entries.extend((key, student_id) for key in _keys(words))
+            if updated_at is not None and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+        entries.sort()
+        with self._lock:
+            self._entries = entries
+            self._students = students
+            self.watermark = watermark
+            self.max_id = max(students, default=0)
+            self.loaded = True
+
+    def upsert(self, rows):
+        """Add or replace the given rows."""
+        with self._lock:
+            for student_id, name, active, updated_at in rows:
+                if updated_at is not None and (self.watermark is None or updated_at > self.watermark):
+                    self.watermark = updated_at
+                current = self._students.get(student_id)
+                if current is not None and current[:2] == (name, bool(active)):
+                    continue
+                self._remove_keys(student_id)
+                words = tuple(fold(name).split())
+                self._students[student_id] = (name, bool(active), words)
+                for key in _keys(words):
+                    bisect.insort(self._entries, (key, student_id))
+                self.max_id = max(self.max_id, student_id)
+
+    def remove(self, ids):
+        with self._lock:
+            for student_id in ids:
+                self._remove_keys(student_id)
+                self._students.pop(student_id, None)
+
+    def _remove_keys(self, student_id):
+        current = self._students.get(student_id)
+        if current is None:
+            return
+        for key in _keys(current[2]):
+            index = bisect.bisect_left(self._entries, (key, student_id))
+            if index < len(self._entries) and self._entries[index] == (key, student_id):
+                del self._entries[index]
+
+    def _range(self, prefix):
+        # [start, end) of the entries whose key starts with `prefix`.
+        start = bisect.bisect_left(self._entries, (prefix,))
+        return start, bisect.bisect_left(self._entries, (prefix + "\U0010ffff",), start)
+
+    def name(self, student_id):
+        current = self._students.get(student_id)
+        return None if current is None else current[0]
+
+    def search(self, text, limit=20, active_only=True):
+        """
+        (id, name) of the students matching `text`, ordered by name: a member
+        number matches the id; otherwise every word of `text` must start some
+        word of the name.
+        """
+        text = (text or "").strip()
+        if text.isdigit():
+            current = self._students.get(int(text))
+            if current is None or (active_only and not current[1]):
+                return []
+            return [(int(text), current[0])]
+        words = fold(text).split()
+        if not words:
+            return []
+        found = {}
+        with self._lock:
+            # Names with the words in the typed order first (one range of keys), then
+            # the range of the rarest word; candidates are checked against every word.
+            ranges = [self._range(" ".join(words))] if len(words) > 1 else []
+            ranges.append(min((self._range(word) for word in words), key=lambda bounds: bounds[1] - bounds[0]))
+            for index, end in ranges:
+                while index < end and len(found) < limit:
+                    student_id = self._entries[index][1]
+                    index += 1
+                    if student_id in found:
+                        continue
+                    name, active, name_words = self._students[student_id]
+                    if active_only and not active:
+                        continue
+                    if all(any(part.startswith(word) for part in name_words) for word in words):
+                        found[student_id] = (name_words, name)
+        ordered = sorted(found.items(), key=lambda item: (item[1][0], item[0]))
+        return [(student_id, name) for student_id, (_, name) in ordered]
+
+
+_directory = StudentDirectory()
+
+
+def load():
+    """Read every student into the shared directory (once at startup)."""
+    _directory.load(db.execute(f"{_COLUMNS} ORDER BY id"))
+
+
+def refresh(ids=None):
+    """
+    Bring the shared directory up to date: the rows changed since the last read
+    (by updated_at, plus ids above the highest known id for rows inserted
+    without one), or exactly `ids` when given (change feed), dropping ids that
+    no longer exist.
+    """
+    if not _directory.loaded:
+        load()
+        return
+    if ids is not None:
+        ids = list(ids)
+        rows = db.execute(f"{_COLUMNS} WHERE id = ANY(%s)", (ids,))
+        _directory.remove(set(ids) - {row[0] for row in rows})
+        _directory.upsert(rows)
+        return
+    watermark = _directory.watermark
+    max_id = _directory.max_id
+    if watermark is None:
+        rows = db.execute(f"{_COLUMNS} WHERE id > %s", (max_id,))
+    else:
+        rows = db.execute(
+            f"{_COLUMNS} WHERE updated_at >= %s OR id > %s",
+            (watermark - REFRESH_OVERLAP, max_id),
+        )
+    _directory.upsert(rows)
+
+
+def search(text, limit=20, active_only=True):
+    return _directory.search(text, limit, active_only)
+
+
+def labels(text, limit=20, active_only=True):
+    """Combobox labels ("name (#id)") for `text`."""
+    return [make_label(student_id, name) for student_id, name in search(text, limit, active_only)]
+
+
+def id_from_label(label):
+    """The id in a "name (#id)" label or a bare member number; None otherwise."""
+    label = (label or "").strip()
+    if label.isdigit():
+        return int(label)
+    if label.endswith(")") and "(#" in label:
+        number = label[label.rindex("(#") + 2:-1]
+        if number.isdigit():
+            return int(number)
+    return None
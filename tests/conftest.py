@@ -1,5 +1,160 @@
 import sys
 from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from psycopg2 import OperationalError
+from psycopg2.extensions import QueryCanceledError, TRANSACTION_STATUS_IDLE
 
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
+
+import db  # noqa: E402
+
+
+class FakeCursor:
+    """
+    Cursor of a FakeConnection. Statements are recorded in conn.executed (and
+    their parameters in conn.params); the result rows come from
+    conn.respond(query, params), None meaning "no result set". A pending
+    conn.cancel() fails the next statement with QueryCanceledError.
+    """
+
+    def __init__(self, conn, name=None):
+        self.conn = conn
+        self.name = name
+        self.itersize = None
+        self.description = None
+        self.closed = False
+        self.fetches = []
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+        return False
+
+    @property
+    def connection(self):
+        return self.conn
+
+    def mogrify(self, template, args):
+        # Enough for psycopg2.extras.execute_values: every value rendered with str().
+        return template % tuple(str(arg).encode() for arg in args)
+
+    def execute(self, query, params=None):
+        conn = self.conn
+        if conn.broken:
+            raise OperationalError("server closed the connection unexpectedly")
+        conn.executed.append(query)
+        conn.params.append(params)
+        if conn.cancel_pending:
+            conn.cancel_pending = False
+            raise QueryCanceledError("canceling statement due to user request")
+        rows = conn.respond(query, params)
+        self.description = None if rows is None else (("column",),)
+        self._rows = list(rows or [])
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size):
+        self.fetches.append(size)
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+
+class FakeConnection:
+    """
+    Stand-in for a psycopg2 connection. By default every statement returns
+    `rows`; set `respond` to a callable (query, params) -> rows to act like a
+    server (it may also raise).
+    """
+
+    encoding = "UTF8"
+
+    def __init__(self, number=1, rows=None, respond=None):
+        self.number = number
+        self.rows = rows
+        self.respond = respond or (lambda query, params: self.rows)
+        self.autocommit = False
+        self.closed = 0
+        self.broken = False
+        self.executed = []
+        self.params = []
+        self.cursors = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.cancelled = 0
+        # A cancel the server has not acted on yet (no statement was running).
+        self.cancel_pending = False
+        self.info = SimpleNamespace(transaction_status=TRANSACTION_STATUS_IDLE)
+
+    def cursor(self, name=None):
+        cur = FakeCursor(self, name)
+        self.cursors.append(cur)
+        return cur
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def cancel(self):
+        self.cancelled += 1
+        self.cancel_pending = True
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeConnect:
+    """`connect` callable for ConnectionPool: each call opens a new FakeConnection."""
+
+    def __init__(self):
+        self.made = []
+
+    def __call__(self):
+        conn = FakeConnection(len(self.made) + 1)
+        self.made.append(conn)
+        return conn
+
+
+class FakePool:
+    """
+    Stand-in for db's pool. Hands out `conn` (in autocommit mode, like
+    ConnectionPool), or a new FakeConnection while `conn` is checked out;
+    `made` lists every connection in order.
+    """
+
+    def __init__(self, conn=None):
+        self.conn = conn or FakeConnection()
+        self.conn.autocommit = True
+        self.made = [self.conn]
+        self.returned = []
+        self._idle = [self.conn]
+
+    def getconn(self):
+        if self._idle:
+            return self._idle.pop()
+        conn = FakeConnection(len(self.made) + 1)
+        conn.autocommit = True
+        self.made.append(conn)
+        return conn
+
+    def putconn(self, conn):
+        self.returned.append(conn)
+        self._idle.append(conn)
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    """A FakePool installed as db's connection pool; its connection is fake_pool.conn."""
+    pool = FakePool()
+    monkeypatch.setattr(db, "_pool", pool)
+    return pool
@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+import app_settings
+
+
+@pytest.fixture
+def settings_file(tmp_path, monkeypatch):
+    path = tmp_path / "app_settings.json"
+    monkeypatch.setattr(app_settings, "_SETTINGS_PATH", str(path))
+    monkeypatch.setattr(app_settings, "_BUNDLED_SETTINGS_PATH", str(tmp_path / "missing.json"))
+    monkeypatch.setattr(app_settings, "_MTIME_CHECK_INTERVAL", 0.0)
+    app_settings.reload()
+    return path
+
+
+def test_missing_file_is_empty(settings_file):
+    assert app_settings.load() == {}
+    assert app_settings.get_section("db") == {}
+    assert app_settings.get_value("logging", "capture_psql", False) is False
+
+
+def test_save_value_persists_and_caches(settings_file):
+    app_settings.save_value("language", "de-AT")
+    assert json.loads(settings_file.read_text(encoding="utf-8")) == {"language": "de-AT"}
+    assert app_settings.get("language") == "de-AT"
+
+
+def test_update_section_merges(settings_file):
+    settings_file.write_text(json.dumps({"logging": {"level": "error"}, "language": "en"}), encoding="utf-8")
+    app_settings.update_section("logging", capture_psql=True)
+    data = json.loads(settings_file.read_text(encoding="utf-8"))
+    assert data == {"language": "en", "logging": {"level": "error", "capture_psql": True}}
+
+
+def test_writers_do_not_clobber_each_other(settings_file):
+    app_settings.save_value("language", "en")
+    # Another process edits the file behind our back.
+    settings_file.write_text(json.dumps({"language": "en", "logo_path": "logo.jpg"}), encoding="utf-8")
+    app_settings.update_section("logging", capture_psql=True)
+    data = json.loads(settings_file.read_text(encoding="utf-8"))
+    assert data["logo_path"] == "logo.jpg"
+    assert data["logging"] == {"capture_psql": True}
+
+
+def test_external_change_detected_by_mtime(settings_file):
+    app_settings.save_value("language", "en")
+    settings_file.write_text(json.dumps({"language": "de-AT", "x": 1}), encoding="utf-8")
+    st = os.stat(settings_file)
+    os.utime(settings_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert app_settings.get("language") == "de-AT"
+
+
+def test_load_returns_copy(settings_file):
+    app_settings.update_section("db", host="localhost")
+    data = app_settings.load()
+    data["db"]["host"] = "changed"
+    assert app_settings.get_section("db") == {"host": "localhost"}
+
+
+def test_invalid_json_reads_as_empty(settings_file):
+    settings_file.write_text("{not json", encoding="utf-8")
+    assert app_settings.reload() == {}
+
+
+def test_atomic_write_leaves_no_temp_files(settings_file):
+    app_settings.save_value("language", "en")
+    assert sorted(os.listdir(settings_file.parent)) == ["app_settings.json"]
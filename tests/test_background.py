@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+import background
+
+
+class FakeRoot:
+    def after(self, ms, callback):
+        pass
+
+
+class CountingBusy:
+    def __init__(self):
+        self.active = 0
+        self.calls = 0
+
+    def begin(self):
+        self.active += 1
+        self.calls += 1
+
+    def end(self):
+        self.active -= 1
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    monkeypatch.setattr(background, "_executor", None)
+    monkeypatch.setattr(background, "_pending", {})
+    monkeypatch.setattr(background, "_latest", {})
+    background.init(FakeRoot(), max_workers=2)
+    yield background
+    background._executor.shutdown(wait=True)
+
+
+def _drain(until, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not until() and time.monotonic() < deadline:
+        background._poll()
+        time.sleep(0.01)
+    background._poll()
+
+
+def test_inline_without_init(monkeypatch):
+    monkeypatch.setattr(background, "_executor", None)
+    results = []
+    background.submit(lambda: 42, results.append)
+    assert results == [42]
+
+
+def test_result_and_error_are_delivered(executor):
+    results, errors = [], []
+    busy = CountingBusy()
+    executor.submit(lambda: "rows", results.append, busy=busy)
+    executor.submit(lambda: 1 / 0, results.append, errors.append, busy=busy)
+    _drain(lambda: results and errors)
+    assert results == ["rows"]
+    assert isinstance(errors[0], ZeroDivisionError)
+    assert busy.active == 0
+
+
+def test_superseded_request_is_dropped(executor):
+    release = threading.Event()
+    results = []
+    busy = CountingBusy()
+
+    def slow():
+        release.wait(2)
+        return "old"
+
+    executor.submit(slow, results.append, key="page", busy=busy)
+    executor.submit(lambda: "new", results.append, key="page", busy=busy)
+    _drain(lambda: results)
+    release.set()
+    _drain(lambda: busy.active == 0)
+    assert results == ["new"]
+    assert busy.calls == 2 and busy.active == 0
+
+
+def test_on_idle_waits_for_pending_requests(executor):
+    release = threading.Event()
+    idle = []
+    executor.submit(lambda: release.wait(2))
+    executor.on_idle(lambda: idle.append(True))
+    background._poll()
+    assert idle == []
+    release.set()
+    _drain(lambda: idle)
+    assert idle == [True]
@@ -0,0 +1,33 @@
+import json
+
+from change_feed import coalesce, parse_payload
+
+
+def test_parse_payload():
+    payload = json.dumps({"table": "t_students", "op": "UPDATE", "id": 7})
+    assert parse_payload(payload) == ("t_students", "UPDATE", 7)
+
+
+def test_parse_payload_ignores_foreign_or_broken_messages():
+    assert parse_payload("not json") is None
+    assert parse_payload(json.dumps({"op": "INSERT"})) is None
+    assert parse_payload(json.dumps({"table": "t_unrelated", "op": "INSERT", "id": 1})) is None
+
+
+def test_coalesce_groups_ids_per_table():
+    events = [
+        ("t_students", "UPDATE", 1),
+        ("t_students", "UPDATE", 1),
+        ("t_students", "INSERT", 2),
+        ("t_attendance", "INSERT", 10),
+    ]
+    assert coalesce(events) == {"t_students": {1, 2}, "t_attendance": {10}}
+
+
+def test_coalesce_missing_id_means_reload_table():
+    events = [
+        ("t_locations", "UPDATE", 3),
+        ("t_locations", "RESYNC", None),
+        ("t_locations", "UPDATE", 4),
+    ]
+    assert coalesce(events) == {"t_locations": None}
@@ -0,0 +1,119 @@
+from datetime import datetime, timezone
+
+import psycopg2
+import pytest
+
+import checkin_journal
+from checkin_journal import CheckinJournal, Flusher, flush
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = CheckinJournal(str(tmp_path / "journal.sqlite3"))
+    yield journal
+    journal.close()
+
+
+def test_add_and_pending_in_order(journal):
+    when = datetime(2026, 10, 18, 18, 5, tzinfo=timezone.utc)
+    journal.add(4, 12, "kiosk", checkin_time=when)
+    journal.add(4, 15, "qr", status="late", checkin_time=when)
+    rows = journal.pending()
+    assert [row[1:] for row in rows] == [
+        (4, 12, "present", "kiosk", when),
+        (4, 15, "late", "qr", when),
+    ]
+    assert journal.count() == 2
+    assert journal.pending_pairs() == {(4, 12), (4, 15)}
+
+
+def test_journal_survives_reopen(tmp_path):
+    path = str(tmp_path / "journal.sqlite3")
+    first = CheckinJournal(path)
+    first.add(1, 2, "kiosk")
+    first.save_snapshot("students", [[2, "Ana"]])
+    first.close()
+    second = CheckinJournal(path)
+    assert second.count() == 1
+    assert second.load_snapshot("students") == [[2, "Ana"]]
+    assert second.load_snapshot("sessions") is None
+    second.close()
+
+
+def test_flush_writes_batches_and_empties_journal(journal):
+    for student_id in range(5):
+        journal.add(7, student_id, "kiosk")
+    batches = []
+    assert flush(journal, batches.append, batch_size=2) == 5
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [row[1] for batch in batches for row in batch] == [0, 1, 2, 3, 4]
+    assert journal.count() == 0
+
+
+def test_failed_flush_keeps_rows(journal):
+    journal.add(7, 1, "kiosk")
+
+    def down(rows):
+        raise ConnectionError("db unreachable")
+
+    flusher = Flusher(journal, down)
+    assert flusher.flush_once() is False
+    assert isinstance(flusher.last_error, ConnectionError)
+    assert journal.count() == 1
+
+    written = []
+    flusher.write_batch = written.extend
+    assert flusher.flush_once() is True
+    assert flusher.last_error is None
+    assert [row[:2] for row in written] == [(7, 1)]
+    assert journal.count() == 0
+
+
+def test_flusher_thread_flushes_on_wake_and_stop(journal, monkeypatch):
+    monkeypatch.setattr(checkin_journal, "MAX_RETRY_INTERVAL", 0.05)
+    written = []
+    flusher = Flusher(journal, written.extend, interval=30.0)
+    flusher.start()
+    journal.add(3, 9, "kiosk")
+    flusher.wake()
+    flusher.stop()
+    assert [row[:2] for row in written] == [(3, 9)]
+    assert journal.count() == 0
+
+
+def test_rejected_row_is_dead_lettered_and_the_rest_flushed(journal):
+    for student_id in range(1, 6):
+        journal.add(7, student_id, "kiosk")
+    written = []
+
+    def write_batch(rows):
+        if any(row[1] == 3 for row in rows):
+            raise psycopg2.IntegrityError('insert or update on table "t_attendance" violates foreign key constraint')
+        written.extend(rows)
+
+    flusher = Flusher(journal, write_batch, batch_size=2)
+    assert flusher.flush_once() is True
+    assert flusher.last_error is None
+    assert [row[1] for row in written] == [1, 2, 4, 5]
+    assert journal.count() == 0
+    [dead] = journal.failed()
+    assert dead[1:5] == (7, 3, "present", "kiosk")
+    assert "foreign key" in dead[6]
+
+
+def test_transient_error_during_row_retry_keeps_the_rest(journal):
+    for student_id in range(1, 4):
+        journal.add(7, student_id, "kiosk")
+    calls = []
+
+    def write_batch(rows):
+        calls.append(rows)
+        if len(rows) > 1:
+            raise psycopg2.DataError("invalid input syntax")
+        if rows[0][1] == 2:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    with pytest.raises(psycopg2.OperationalError):
+        flush(journal, write_batch)
+    assert journal.pending_pairs() == {(7, 2), (7, 3)}
+    assert journal.failed() == []
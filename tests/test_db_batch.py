@@ -0,0 +1,99 @@
+import pytest
+from psycopg2 import sql
+
+import db
+
+
+def _fail_on(conn, statement):
+    # The `statement`-th statement on conn fails like a constraint violation.
+    def respond(query, params):
+        if len(conn.executed) == statement:
+            raise RuntimeError("duplicate key value violates unique constraint")
+        return None
+
+    conn.respond = respond
+
+
+def _echo_first_column(query, params):
+    # RETURNING id: the first column of every row in the page.
+    values = query.split(b" VALUES ", 1)[1].split(b" RETURNING")[0]
+    return [(int(row.split(b",")[0]),) for row in values.strip(b"()").split(b"),(")]
+
+
+def test_execute_many_sends_one_statement_per_page_in_one_transaction(fake_pool):
+    conn = fake_pool.conn
+    autocommit_seen = []
+    conn.respond = lambda query, params: autocommit_seen.append(conn.autocommit)
+
+    result = db.execute_many("INSERT INTO t_attendance (session_id, student_id) VALUES %s",
+                             [(1, i) for i in range(5)], page_size=2)
+
+    assert result == []
+    assert len(conn.executed) == 3
+    assert conn.executed[0] == b"INSERT INTO t_attendance (session_id, student_id) VALUES (1,0),(1,1)"
+    assert conn.executed[2].endswith(b"VALUES (1,4)")
+    assert autocommit_seen == [False, False, False]
+    assert conn.commits == 1
+    assert conn.rollbacks == 0
+    assert conn.autocommit is True
+    assert fake_pool.returned == [conn]
+
+
+def test_execute_many_collects_returning_rows_across_pages(fake_pool):
+    conn = fake_pool.conn
+    conn.respond = _echo_first_column
+
+    result = db.execute_many("INSERT INTO t_students (id, name) VALUES %s RETURNING id",
+                             [(i, f"s{i}") for i in range(1, 6)], page_size=2, fetch=True)
+
+    assert result == [(1,), (2,), (3,), (4,), (5,)]
+    assert len(conn.executed) == 3
+
+
+def test_execute_many_failure_rolls_back_every_page(fake_pool):
+    conn = fake_pool.conn
+    _fail_on(conn, 2)
+
+    with pytest.raises(RuntimeError):
+        db.execute_many("INSERT INTO t_attendance (session_id, student_id) VALUES %s",
+                        [(1, i) for i in range(5)], page_size=2)
+
+    assert len(conn.executed) == 2
+    assert conn.commits == 0
+    assert conn.rollbacks == 1
+    assert conn.autocommit is True
+    assert fake_pool.returned == [conn]
+
+
+def test_execute_many_without_rows_does_not_touch_the_pool(fake_pool):
+    assert db.execute_many("INSERT INTO t_attendance (session_id, student_id) VALUES %s", []) == []
+    assert fake_pool.conn.executed == []
+    assert fake_pool.returned == []
+
+
+def test_insert_values_passes_page_size_and_fetches_only_with_returning(monkeypatch):
+    calls = []
+
+    def fake_execute_many(query, rows, page_size, fetch):
+        calls.append((query, rows, page_size, fetch))
+        return []
+
+    monkeypatch.setattr(db, "execute_many", fake_execute_many)
+    rows = [(1, 2), (1, 3)]
+
+    db.insert_values("t_attendance", ("session_id", "student_id"), rows, page_size=50)
+    db.insert_values("t_attendance", ("session_id", "student_id"), rows,
+                     returning=["student_id"], on_conflict="ON CONFLICT DO NOTHING")
+
+    insert = sql.SQL("INSERT INTO {} ({}) VALUES %s").format(
+        sql.Identifier("t_attendance"),
+        sql.SQL(", ").join([sql.Identifier("session_id"), sql.Identifier("student_id")]),
+    )
+    assert calls[0] == (insert, rows, 50, False)
+    assert calls[1] == (
+        insert + sql.SQL(" ") + sql.SQL("ON CONFLICT DO NOTHING")
+        + sql.SQL(" RETURNING {}").format(sql.SQL(", ").join([sql.Identifier("student_id")])),
+        rows,
+        100,
+        True,
+    )
@@ -0,0 +1,66 @@
+import pytest
+from psycopg2.extensions import QueryCanceledError
+
+import db
+from paging import fetch_page
+from query_cache import QueryCache
+
+
+def test_cancel_query_signals_the_registered_connection(fake_pool):
+    token = object()
+    with db.cancellable(token):
+        db.execute("SELECT id FROM t_students")
+        assert db.cancel_query(token) is True
+        # Already signalled: a second cancel is a no-op.
+        assert db.cancel_query(token) is False
+    assert fake_pool.conn.cancelled == 1
+    assert fake_pool.returned == [fake_pool.conn]
+
+
+def test_late_cancel_is_absorbed_before_the_connection_is_reused(fake_pool):
+    conn = fake_pool.conn
+    token = object()
+    with db.cancellable(token):
+        db.execute("SELECT id FROM t_students")
+        # The statement finished just before the cancel was sent.
+        assert db.cancel_query(token) is True
+        assert fake_pool.returned == []
+    assert conn.executed == ["SELECT id FROM t_students", "SELECT 1"]
+    assert conn.cancel_pending is False
+    assert fake_pool.returned == [conn]
+
+
+def test_cancel_after_the_block_does_nothing(fake_pool):
+    token = object()
+    with db.cancellable(token):
+        db.execute("SELECT id FROM t_students")
+    assert db.cancel_query(token) is False
+    assert fake_pool.conn.cancelled == 0
+    assert fake_pool.conn.executed == ["SELECT id FROM t_students"]
+
+
+def test_cancel_before_the_first_statement_runs_nothing(fake_pool):
+    token = object()
+    with db.cancellable(token):
+        assert db.cancel_query(token) is True
+        with pytest.raises(QueryCanceledError):
+            db.execute("SELECT id FROM t_students")
+    assert fake_pool.conn.executed == []
+    assert fake_pool.conn.cancelled == 0
+    assert fake_pool.returned == [fake_pool.conn]
+
+
+def test_cached_page_takes_no_connection(fake_pool, monkeypatch):
+    monkeypatch.setattr(db, "_result_cache", QueryCache())
+    fake_pool.conn.rows = [(1, "Ana", 1)]
+
+    def fetch():
+        with db.cancellable(object()):
+            return fetch_page("s.id, s.name", "t_students s", "", [], ["s.id"], None, 0, 50, cache_ttl=60)
+
+    assert fetch() == ([(1, "Ana")], 1, True)
+    assert fake_pool.returned == [fake_pool.conn]
+    assert fetch() == ([(1, "Ana")], 1, True)
+    assert fake_pool.returned == [fake_pool.conn]
+    assert len(fake_pool.conn.executed) == 1
+    assert db._cancellable == {}
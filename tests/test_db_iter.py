@@ -0,0 +1,58 @@
+import db
+
+
+def test_execute_iter_yields_batches_through_a_named_cursor(fake_pool):
+    conn = fake_pool.conn
+    conn.rows = [(i,) for i in range(5)]
+
+    batches = list(db.execute_iter("SELECT id FROM t_students", itersize=2, batches=True))
+
+    assert batches == [[(0,), (1,)], [(2,), (3,)], [(4,)]]
+    (cur,) = conn.cursors
+    assert cur.name.startswith("bjj_iter_")
+    assert cur.itersize == 2
+    assert cur.fetches == [2, 2, 2, 2]
+    assert cur.closed
+    assert conn.autocommit is True
+    assert fake_pool.returned == [conn]
+
+
+def test_execute_iter_yields_single_rows_by_default(fake_pool):
+    fake_pool.conn.rows = [(i,) for i in range(3)]
+
+    assert list(db.execute_iter("SELECT id FROM t_students", itersize=2)) == [(0,), (1,), (2,)]
+
+
+def test_execute_iter_closed_early_releases_the_connection(fake_pool):
+    conn = fake_pool.conn
+    conn.rows = [(i,) for i in range(10)]
+
+    rows = db.execute_iter("SELECT id FROM t_students", itersize=3)
+    assert next(rows) == (0,)
+    assert conn.autocommit is False
+    assert fake_pool.returned == []
+    rows.close()
+
+    (cur,) = conn.cursors
+    assert cur.closed
+    assert cur.fetches == [3]
+    assert conn.rollbacks == 1
+    assert conn.autocommit is True
+    assert fake_pool.returned == [conn]
+
+
+def test_execute_while_iterating_does_not_join_the_cursor_transaction(fake_pool):
+    fake_pool.conn.rows = [(1,), (2,)]
+
+    rows = db.execute_iter("SELECT id FROM t_students")
+    assert next(rows) == (1,)
+    db.execute("UPDATE t_students SET active = false WHERE id = %s", (1,))
+    rows.close()
+
+    reader, writer = fake_pool.made
+    assert reader.executed == ["SELECT id FROM t_students"]
+    assert reader.rollbacks == 1
+    # The write ran on its own autocommit connection, untouched by the cursor's rollback.
+    assert writer.executed == ["UPDATE t_students SET active = false WHERE id = %s"]
+    assert writer.autocommit is True
+    assert writer.rollbacks == 0
@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_INTRANS
+
+import db
+from conftest import FakeConnect, FakeConnection
+from db import ConnectionPool, PoolTimeoutError
+
+
+def test_opens_minconn_up_front_in_autocommit():
+    connect = FakeConnect()
+    ConnectionPool(connect, minconn=2, maxconn=4)
+    assert len(connect.made) == 2
+    assert all(conn.autocommit for conn in connect.made)
+
+
+def test_rejects_invalid_sizes():
+    with pytest.raises(ValueError):
+        ConnectionPool(FakeConnect(), minconn=3, maxconn=2)
+    with pytest.raises(ValueError):
+        ConnectionPool(FakeConnect(), minconn=0, maxconn=0)
+
+
+def test_grows_to_maxconn_and_reuses_returned_connections():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, minconn=0, maxconn=2, timeout=0.05)
+    first = pool.getconn()
+    second = pool.getconn()
+    assert len(connect.made) == 2
+    pool.putconn(first)
+    assert pool.getconn() is first
+    assert len(connect.made) == 2
+    pool.putconn(second)
+
+
+def test_exhausted_pool_times_out():
+    pool = ConnectionPool(FakeConnect(), minconn=0, maxconn=1, timeout=0.05)
+    pool.getconn()
+    started = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        pool.getconn()
+    assert time.monotonic() - started >= 0.05
+
+
+def test_checkout_waits_for_a_returned_connection():
+    pool = ConnectionPool(FakeConnect(), minconn=0, maxconn=1, timeout=2.0)
+    conn = pool.getconn()
+    timer = threading.Timer(0.05, pool.putconn, args=(conn,))
+    timer.start()
+    assert pool.getconn() is conn
+    timer.join()
+
+
+def test_unhealthy_idle_connection_is_replaced():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, minconn=1, maxconn=1, health_check_after=0.0)
+    stale = connect.made[0]
+    stale.broken = True
+    conn = pool.getconn()
+    assert conn is not stale
+    assert stale.closed
+    assert len(connect.made) == 2
+
+
+def test_healthy_idle_connection_is_pinged():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, minconn=1, maxconn=1, health_check_after=0.0)
+    conn = pool.getconn()
+    assert conn is connect.made[0]
+    assert conn.executed == ["SELECT 1"]
+
+
+def test_closed_connection_is_not_returned_to_the_pool():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, minconn=0, maxconn=1, timeout=0.05)
+    conn = pool.getconn()
+    conn.closed = 1
+    pool.putconn(conn)
+    assert pool.getconn() is not conn
+
+
+def test_dirty_transaction_is_rolled_back_on_return():
+    pool = ConnectionPool(FakeConnect(), minconn=0, maxconn=1)
+    conn = pool.getconn()
+    conn.autocommit = False
+    conn.info.transaction_status = TRANSACTION_STATUS_INTRANS
+    pool.putconn(conn)
+    assert conn.rollbacks == 1
+    assert conn.autocommit is True
+    assert pool.getconn() is conn
+
+
+def test_failed_reset_discards_the_connection():
+    pool = ConnectionPool(FakeConnect(), minconn=0, maxconn=1, timeout=0.05)
+    conn = pool.getconn()
+    conn.info.transaction_status = TRANSACTION_STATUS_INTRANS
+
+    def fail():
+        raise RuntimeError("connection lost")
+
+    conn.rollback = fail
+    pool.putconn(conn)
+    assert conn.closed
+    assert pool.getconn() is not conn
+
+
+def test_failed_connect_frees_the_slot():
+    calls = []
+
+    def connect():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("could not connect")
+        return FakeConnection(len(calls))
+
+    pool = ConnectionPool(connect, minconn=0, maxconn=1, timeout=0.05)
+    with pytest.raises(RuntimeError):
+        pool.getconn()
+    assert pool.getconn().number == 2
+
+
+def test_closeall_closes_idle_connections_and_refuses_checkout():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, minconn=2, maxconn=2)
+    pool.closeall()
+    assert all(conn.closed for conn in connect.made)
+    with pytest.raises(RuntimeError):
+        pool.getconn()
+
+
+def test_connection_context_returns_connection_to_pool(monkeypatch):
+    pool = ConnectionPool(FakeConnect(), minconn=0, maxconn=1, timeout=0.05)
+    monkeypatch.setattr(db, "_pool", pool)
+    with db.connection() as conn:
+        with db.connection() as inner:
+            # Nested blocks on one thread share the pinned connection.
+            assert inner is conn
+    assert pool.getconn() is conn
+
+
+def test_execute_returns_rows_and_releases_the_connection(fake_pool):
+    fake_pool.conn.rows = [(1, "Ana")]
+    assert db.execute("SELECT id, name FROM t_students WHERE id = %s", (1,)) == [(1, "Ana")]
+    assert fake_pool.conn.params == [(1,)]
+    assert fake_pool.returned == [fake_pool.conn]
@@ -0,0 +1,51 @@
+from datetime import time
+
+from kiosk import pick_session, roster_directory
+
+SESSIONS = [
+    (1, "10:00", "11:30", "10:00 Fundamentals"),
+    (2, "18:00", "19:30", "18:00 Advanced"),
+    (3, "19:30", "21:00", "19:30 Open Mat"),
+]
+
+STUDENTS = [
+    (5, "Ana Silva"),
+    (8, "Anton Berger"),
+    (12, "Maria Anders"),
+    (15, "Zoë Müller-Ries"),
+]
+
+
+def test_pick_session_running_or_opening_soon():
+    assert pick_session(SESSIONS, time(10, 45)) == 1
+    assert pick_session(SESSIONS, time(17, 40)) == 2
+    assert pick_session(SESSIONS, time(19, 20)) == 2
+
+
+def test_pick_session_next_then_last():
+    assert pick_session(SESSIONS, time(13, 0)) == 2
+    assert pick_session(SESSIONS, time(22, 0)) == 3
+    assert pick_session([], time(12, 0)) is None
+
+
+def test_roster_directory_by_member_number():
+    directory = roster_directory(STUDENTS)
+    assert directory.search(" 8 ") == [(8, "Anton Berger")]
+    assert directory.search("99") == []
+    assert directory.name(15) == "Zoë Müller-Ries"
+
+
+def test_roster_directory_by_name_word_prefixes():
+    directory = roster_directory(STUDENTS)
+    assert directory.search("an") == STUDENTS[:3]
+    assert directory.search("an s") == [(5, "Ana Silva")]
+    assert directory.search("ANDERS") == [(12, "Maria Anders")]
+    assert len(directory.search("an", limit=2)) == 2
+    assert directory.search("  ") == []
+
+
+def test_roster_directory_ignores_accents():
+    directory = roster_directory(STUDENTS)
+    assert directory.search("muller") == [(15, "Zoë Müller-Ries")]
+    assert directory.search("zoe ries") == [(15, "Zoë Müller-Ries")]
+    assert directory.search("MÜLL") == [(15, "Zoë Müller-Ries")]
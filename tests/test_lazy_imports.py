@@ -0,0 +1,46 @@
+import re
+import sys
+from pathlib import Path
+
+import lazy_imports
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_load_records_time_once(monkeypatch):
+    monkeypatch.setattr(lazy_imports, "_timings", {})
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    module = lazy_imports.load("colorsys")
+    assert module is sys.modules["colorsys"]
+    assert list(lazy_imports._timings) == ["colorsys"]
+    assert lazy_imports.load("colorsys") is module
+    assert len(lazy_imports._timings) == 1
+
+
+def test_already_imported_modules_are_not_timed(monkeypatch):
+    monkeypatch.setattr(lazy_imports, "_timings", {})
+    assert lazy_imports.load("os") is sys.modules["os"]
+    assert lazy_imports.summary() == "--"
+
+
+def test_summary_lists_slowest_first(monkeypatch):
+    monkeypatch.setattr(lazy_imports, "_timings", {"tkcalendar": 40.2, "matplotlib": 310.7})
+    assert lazy_imports.summary() == "matplotlib 311 ms | tkcalendar 40 ms"
+
+
+def test_every_lazy_load_in_the_app_is_bundled():
+    loaded = set()
+    for path in ROOT.rglob("*.py"):
+        if "tests" in path.relative_to(ROOT).parts:
+            continue
+        loaded.update(re.findall(r'lazy_imports\.load\("([^"]+)"\)', path.read_text(encoding="utf-8-sig")))
+    assert "ui.students" in loaded
+    assert loaded - set(lazy_imports.BUNDLED) == set()
+
+
+def test_check_bundled_reports_missing_modules(monkeypatch):
+    monkeypatch.setattr(lazy_imports, "BUNDLED", ("colorsys", "no_such_module_xyz"))
+    failed = lazy_imports.check_bundled()
+    assert [name for name, _ in failed] == ["no_such_module_xyz"]
+    assert isinstance(failed[0][1], ImportError)
@@ -0,0 +1,47 @@
+import db
+import lookups
+
+
+class FakeExecute:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self, query, params=None, cache_ttl=None):
+        self.calls += 1
+        return list(self.rows)
+
+
+def test_lookup_maps_both_ways():
+    lookup = lookups.Lookup([(2, "Dojo Nord"), (1, "Dojo Süd")])
+    assert lookup.labels == ["Dojo Nord (#2)", "Dojo Süd (#1)"]
+    assert lookup.label(1) == "Dojo Süd (#1)"
+    assert lookup.id("Dojo Nord (#2)") == 2
+    assert lookup.label(99) == ""
+    assert lookup.id("Unknown") is None
+
+
+def test_same_name_resolves_by_id():
+    lookup = lookups.Lookup([(1, "Main"), (2, "Main")])
+    assert lookup.label(2) == "Main (#2)"
+    assert lookup.id("Main (#1)") == 1
+
+
+def test_load_rebuilds_only_when_rows_change(monkeypatch):
+    monkeypatch.setattr(lookups, "_lookups", {})
+    fake = FakeExecute([(1, "Gi")])
+    monkeypatch.setattr(db, "execute", fake)
+    first = lookups.load("classes")
+    assert lookups.load("classes") is first
+    fake.rows = [(1, "Gi"), (2, "No-Gi")]
+    assert lookups.load("classes") is not first
+    assert lookups.load("classes").label(2) == "No-Gi (#2)"
+
+
+def test_get_reuses_the_loaded_lookup(monkeypatch):
+    monkeypatch.setattr(lookups, "_lookups", {})
+    fake = FakeExecute([(3, "Coach")])
+    monkeypatch.setattr(db, "execute", fake)
+    lookups.get("coaches")
+    lookups.get("coaches")
+    assert fake.calls == 1
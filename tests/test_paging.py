@@ -0,0 +1,126 @@
+import pytest
+
+import db
+from paging import KeysetPager, fetch_page, page_count, seek_where
+from query_cache import QueryCache
+
+
+def test_seek_where_first_page_keeps_filter():
+    assert seek_where("WHERE s.active = true", ("s.id",), None) == ("WHERE s.active = true", [])
+
+
+def test_seek_where_adds_row_comparison():
+    assert seek_where("", ("s.id",), (40,)) == ("WHERE (s.id) > (%s)", [40])
+    where, params = seek_where(" WHERE 1=1 AND s.location_id = %s", ("s.name", "s.id"), ("Anna", 7))
+    assert where == " WHERE 1=1 AND s.location_id = %s AND (s.name, s.id) > (%s, %s)"
+    assert params == ["Anna", 7]
+
+
+def test_page_count():
+    assert page_count(0, 50) == 1
+    assert page_count(50, 50) == 1
+    assert page_count(51, 50) == 2
+
+
+def test_pager_learns_boundaries():
+    pager = KeysetPager(page_size=2)
+    assert pager.nearest(0) == (0, None)
+    pager.record_page(0, [(1,), (2,)], lambda row: (row[0],))
+    pager.record_page(1, [(3,), (5,)], lambda row: (row[0],))
+    assert pager.nearest(1) == (1, (2,))
+    assert pager.nearest(2) == (2, (5,))
+    # Unknown pages fall back to the closest boundary before them.
+    assert pager.nearest(7) == (2, (5,))
+
+
+def test_short_page_has_no_next_boundary():
+    pager = KeysetPager(page_size=2)
+    pager.record_page(0, [(1,)], lambda row: (row[0],))
+    assert pager.nearest(1) == (0, None)
+
+
+def test_reset_forgets_boundaries():
+    pager = KeysetPager(page_size=1)
+    pager.remember(1, (4,))
+    assert pager.nearest(3) == (1, (4,))
+    pager.page = 1
+    pager.reset()
+    assert pager.page == 0 and pager.nearest(1) == (0, None)
+
+
+class FakeExecute:
+    def __init__(self, responses):
+        self.responses = responses
+        self.queries = []
+
+    def __call__(self, query, params=None, cache_ttl=None):
+        self.queries.append(" ".join(query.split()))
+        for marker, rows in self.responses:
+            if marker in query:
+                return rows
+        raise AssertionError(f"unexpected query: {query}")
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(db, "_result_cache", QueryCache())
+
+
+def _fetch(**overrides):
+    args = dict(
+        columns="s.id, s.name",
+        from_sql="t_students s",
+        where="WHERE s.active = %s",
+        params=[True],
+        order_by=("s.id",),
+        after_key=None,
+        page_start=0,
+        page_size=2,
+    )
+    args.update(overrides)
+    return fetch_page(**args)
+
+
+def test_fetch_page_counts_with_window_and_caches_total(monkeypatch, fresh_cache):
+    fake = FakeExecute([("COUNT(*) OVER ()", [(1, "Ana", 5), (2, "Ben", 5)]), ("LIMIT", [(3, "Cleo"), (4, "Dan")])])
+    monkeypatch.setattr(db, "execute", fake)
+
+    assert _fetch() == ([(1, "Ana"), (2, "Ben")], 5, True)
+    # Second page: total comes from the cache, the page query has no window.
+    assert _fetch(after_key=(2,), page_start=2) == ([(3, "Cleo"), (4, "Dan")], 5, True)
+    assert "COUNT(*) OVER ()" not in fake.queries[-1]
+    assert "(s.id) > (%s)" in fake.queries[-1]
+
+
+def test_write_invalidates_cached_total(monkeypatch, fresh_cache):
+    fake = FakeExecute([("COUNT(*) OVER ()", [(1, "Ana", 1)])])
+    monkeypatch.setattr(db, "execute", fake)
+    _fetch()
+    db.invalidate_cache("t_students")
+    _fetch()
+    assert sum("COUNT(*) OVER ()" in q for q in fake.queries) == 2
+
+
+def test_unfiltered_large_table_uses_estimate(monkeypatch, fresh_cache):
+    fake = FakeExecute([("reltuples", [(50000,)]), ("LIMIT", [(1, "Ana"), (2, "Ben")])])
+    monkeypatch.setattr(db, "execute", fake)
+    rows, total, exact = _fetch(where="", params=[], approx_table="t_students")
+    assert (total, exact) == (50000, False)
+    assert not any("OVER ()" in q for q in fake.queries)
+
+
+def test_estimate_last_page_is_exact(monkeypatch, fresh_cache):
+    fake = FakeExecute([("reltuples", [(50000,)]), ("LIMIT", [(9, "Zoe")])])
+    monkeypatch.setattr(db, "execute", fake)
+    assert _fetch(where="", params=[], approx_table="t_students", after_key=(8,), page_start=40) == ([(9, "Zoe")], 41, True)
+
+
+def test_cached_page_is_served_without_queries(monkeypatch, fresh_cache):
+    fake = FakeExecute([("COUNT(*) OVER ()", [(1, "Ana", 1)])])
+    monkeypatch.setattr(db, "execute", fake)
+    assert _fetch(cache_ttl=60) == ([(1, "Ana")], 1, True)
+    assert _fetch(cache_ttl=60) == ([(1, "Ana")], 1, True)
+    assert len(fake.queries) == 1
+    db.invalidate_cache("t_students")
+    _fetch(cache_ttl=60)
+    assert len(fake.queries) == 2
@@ -0,0 +1,100 @@
+import time
+
+from query_cache import QueryCache, normalize_sql, tables_read, tables_written
+
+
+def test_normalize_sql_collapses_whitespace():
+    assert normalize_sql("SELECT id,\n       name\n  FROM t_locations ") == "SELECT id, name FROM t_locations"
+
+
+def test_tables_read_and_written():
+    query = """
+        SELECT s.id, l.name
+        FROM t_students s
+        LEFT JOIN public.t_locations l ON s.location_id = l.id
+    """
+    assert tables_read(query) == {"t_students", "t_locations"}
+    assert tables_written(query) == set()
+    assert tables_written("UPDATE public.t_coaches SET active=false WHERE id=%s") == {"t_coaches"}
+    assert tables_written("INSERT INTO t_attendance (session_id) VALUES (%s)") == {"t_attendance"}
+    assert tables_written("DELETE FROM t_classes WHERE id=%s") == {"t_classes"}
+    assert tables_written("DO $$ BEGIN PERFORM 1; END $$;") is None
+
+
+def test_from_inside_functions_is_not_a_table():
+    query = """
+        SELECT s.id, s.name
+        FROM t_students s
+        WHERE EXTRACT(MONTH FROM s.birthday) = %s AND SUBSTRING(s.name FROM 1 FOR 1) = %s
+    """
+    assert tables_read(query) == {"t_students"}
+    roster = """
+        INSERT INTO t_attendance (session_id, student_id, status)
+        SELECT %s, ids.student_id, %s FROM unnest(%s::bigint[]) AS ids(student_id)
+        ON CONFLICT DO NOTHING
+    """
+    assert tables_read(roster) == set()
+    assert tables_written(roster) == {"t_attendance"}
+
+
+def test_upsert_and_locking_clauses_name_no_extra_table():
+    upsert = """
+        INSERT INTO t_attendance (session_id, student_id, status) VALUES %s
+        ON CONFLICT (session_id, student_id) DO UPDATE SET status = EXCLUDED.status
+    """
+    assert tables_written(upsert) == {"t_attendance"}
+    assert tables_written("SELECT id FROM t_students WHERE id = %s FOR UPDATE") == set()
+
+
+def test_same_query_with_different_layout_hits():
+    cache = QueryCache()
+    key = cache.make_key("SELECT id FROM t_locations", (1,))
+    cache.put(key, [(1,)], {"t_locations"}, ttl=60)
+    hit, rows = cache.get(cache.make_key("SELECT id\n  FROM t_locations", [1]))
+    assert hit and rows == [(1,)]
+
+
+def test_write_evicts_tagged_entries_only():
+    cache = QueryCache()
+    loc_key = cache.make_key("SELECT id FROM t_locations")
+    coach_key = cache.make_key("SELECT id FROM public.t_coaches")
+    cache.put(loc_key, [(1,)], tables_read("SELECT id FROM t_locations"), ttl=60)
+    cache.put(coach_key, [(2,)], tables_read("SELECT id FROM public.t_coaches"), ttl=60)
+
+    cache.invalidate_for("UPDATE t_locations SET active=false WHERE id=%s")
+    assert cache.get(loc_key) == (False, None)
+    assert cache.get(coach_key) == (True, [(2,)])
+
+
+def test_ttl_expiry():
+    cache = QueryCache()
+    key = cache.make_key("SELECT 1")
+    cache.put(key, [(1,)], set(), ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get(key) == (False, None)
+
+
+def test_lru_eviction():
+    cache = QueryCache(max_entries=2)
+    keys = [cache.make_key(f"SELECT {i}") for i in range(3)]
+    cache.put(keys[0], 0, set(), ttl=60)
+    cache.put(keys[1], 1, set(), ttl=60)
+    cache.get(keys[0])
+    cache.put(keys[2], 2, set(), ttl=60)
+    assert cache.get(keys[1]) == (False, None)
+    assert cache.get(keys[0]) == (True, 0)
+    assert len(cache) == 2
+
+
+def test_result_racing_a_write_is_not_stored():
+    cache = QueryCache()
+    key = cache.make_key("SELECT id FROM t_students")
+    generation = cache.generation
+    cache.invalidate_tables({"t_students"})
+    cache.put(key, [(1,)], {"t_students"}, ttl=60, generation=generation)
+    assert cache.get(key) == (False, None)
+
+
+def test_param_keys():
+    assert QueryCache.make_key("SELECT %s", ([{"a": [1]}],)) is not None
+    assert QueryCache.make_key("SELECT %s", (bytearray(b"x"),)) is None
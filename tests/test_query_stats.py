@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+import paging
+import query_stats
+
+
+@pytest.fixture(autouse=True)
+def clean_stats(monkeypatch):
+    query_stats.reset()
+    monkeypatch.setattr(query_stats, "slow_query_threshold_ms", lambda: 100.0)
+    logged = []
+    monkeypatch.setattr(query_stats, "_get_slow_logger", lambda: type("L", (), {
+        "warning": lambda self, *args: logged.append(args),
+    })())
+    yield logged
+    query_stats.reset()
+
+
+def test_snapshot_aggregates_per_site():
+    for ms in (1.0, 3.0, 8.0):
+        query_stats.record("ui.students.load_students_paged", ms)
+    query_stats.record("ui.sessions.load_sessions", 40.0)
+
+    rows = query_stats.snapshot()
+    assert [r["site"] for r in rows] == ["ui.sessions.load_sessions", "ui.students.load_students_paged"]
+    students = rows[1]
+    assert students["count"] == 3
+    assert students["avg_ms"] == pytest.approx(4.0)
+    assert students["max_ms"] == 8.0
+    assert students["p50_ms"] == 5.0
+    assert students["p95_ms"] == 10.0
+
+
+def test_slow_queries_are_logged(clean_stats):
+    assert query_stats.record("site", 50.0, "SELECT 1") is False
+    assert query_stats.record("site", 250.0, "SELECT   *\n FROM t_students") is True
+    assert len(clean_stats) == 1
+    assert "SELECT * FROM t_students" in clean_stats[0]
+
+
+def test_call_site_reports_caller():
+    def load_rows():
+        return query_stats.call_site()
+
+    assert load_rows() == f"{__name__}.load_rows"
+
+
+def test_timed_records_caller():
+    def run_query():
+        with query_stats.timed("SELECT 1"):
+            pass
+
+    run_query()
+    assert [r["site"] for r in query_stats.snapshot()] == [f"{__name__}.run_query"]
+
+
+def test_fetch_page_is_charged_to_its_caller(fake_pool):
+    # Page rows carry COUNT(*) OVER () as their last column.
+    fake_pool.conn.rows = [(1, "Ana", 1)]
+
+    def load_students_page():
+        return paging.fetch_page("s.id, s.name", "t_students s", "", [], ["s.name", "s.id"], None, 0, 50)
+
+    assert load_students_page() == ([(1, "Ana")], 1, True)
+    assert [r["site"] for r in query_stats.snapshot()] == [f"{__name__}.load_students_page"]
+
+
+def test_slow_query_log_sits_next_to_the_exe_when_frozen(monkeypatch, tmp_path):
+    monkeypatch.setattr(query_stats.sys, "frozen", True, raising=False)
+    monkeypatch.setattr(query_stats.sys, "executable", str(tmp_path / "gui.exe"))
+    assert query_stats.slow_query_log_path() == str(tmp_path / query_stats.SLOW_QUERY_LOG)
+
+
+def test_slow_query_log_sits_in_the_project_root_from_source():
+    root = os.path.dirname(os.path.abspath(query_stats.__file__))
+    assert query_stats.slow_query_log_path() == os.path.join(root, query_stats.SLOW_QUERY_LOG)
@@ -0,0 +1,142 @@
+import pytest
+from psycopg2 import errors
+
+import schema_migrations
+from schema_migrations import MigrationError, checksum, load_migrations, pending_migrations
+
+
+def _write(directory, name, sql):
+    (directory / name).write_text(sql, encoding="utf-8")
+
+
+def test_load_migrations_orders_by_version(tmp_path):
+    _write(tmp_path, "0002_second.sql", "SELECT 2;")
+    _write(tmp_path, "0001_first.sql", "SELECT 1;")
+    _write(tmp_path, "README.txt", "ignored")
+    migrations = load_migrations(str(tmp_path))
+    assert [(v, name) for v, name, _, _ in migrations] == [(1, "first"), (2, "second")]
+
+
+def test_load_migrations_rejects_duplicate_versions(tmp_path):
+    _write(tmp_path, "0001_a.sql", "SELECT 1;")
+    _write(tmp_path, "0001_b.sql", "SELECT 1;")
+    with pytest.raises(MigrationError):
+        load_migrations(str(tmp_path))
+
+
+def test_checksum_ignores_line_endings():
+    assert checksum("SELECT 1;\r\nSELECT 2;\r\n") == checksum("SELECT 1;\nSELECT 2;\n")
+
+
+def test_pending_skips_applied():
+    migrations = [(1, "a", checksum("A"), "A"), (2, "b", checksum("B"), "B")]
+    pending = pending_migrations(migrations, {1: checksum("A")})
+    assert [m[0] for m in pending] == [2]
+    assert pending_migrations(migrations, {1: checksum("A"), 2: checksum("B")}) == []
+
+
+def test_pending_rejects_edited_migration():
+    migrations = [(1, "a", checksum("A changed"), "A changed")]
+    with pytest.raises(MigrationError):
+        pending_migrations(migrations, {1: checksum("A")})
+
+
+def test_repo_migrations_are_loadable():
+    migrations = load_migrations()
+    versions = [v for v, _, _, _ in migrations]
+    assert versions == sorted(versions)
+    assert versions[0] == 1
+
+
+class MigrationServer:
+    """respond() for the fake connection: a schema_migrations table plus the migrations' DDL."""
+
+    def __init__(self, applied=None, fail_on=None):
+        self.applied = applied
+        self.fail_on = fail_on
+        self.statements = []
+
+    def __call__(self, query, params):
+        query = " ".join(query.split())
+        self.statements.append(query)
+        if query.startswith("SELECT version, checksum"):
+            if self.applied is None:
+                raise errors.UndefinedTable("relation \"schema_migrations\" does not exist")
+            return list(self.applied.items())
+        if query.startswith("CREATE TABLE IF NOT EXISTS schema_migrations"):
+            if self.applied is None:
+                self.applied = {}
+        elif query.startswith("INSERT INTO schema_migrations"):
+            self.applied[params[0]] = params[2]
+        elif self.fail_on and self.fail_on in query:
+            raise RuntimeError("migration failed")
+        return None
+
+
+@pytest.fixture
+def migrations_dir(tmp_path, monkeypatch):
+    _write(tmp_path, "0002_second.sql", "CREATE TABLE second ();")
+    _write(tmp_path, "0001_first.sql", "CREATE TABLE first ();")
+    monkeypatch.setattr(schema_migrations, "_MIGRATIONS_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _serve(fake_pool, **kwargs):
+    server = MigrationServer(**kwargs)
+    fake_pool.conn.respond = server
+    return server
+
+
+def test_ensure_current_applies_pending_in_order_under_lock(migrations_dir, fake_pool):
+    server = _serve(fake_pool)
+    assert schema_migrations.ensure_current() == [1, 2]
+    lock = server.statements.index("SELECT pg_advisory_xact_lock(%s)")
+    first = server.statements.index("CREATE TABLE first ();")
+    second = server.statements.index("CREATE TABLE second ();")
+    assert lock < first < second
+    assert set(server.applied) == {1, 2}
+    assert fake_pool.conn.commits == 1
+    assert fake_pool.conn.autocommit is True
+    assert fake_pool.returned == [fake_pool.conn]
+
+
+def test_ensure_current_reports_pending_before_running_them(migrations_dir, fake_pool):
+    server = _serve(fake_pool)
+    reported = []
+    schema_migrations.ensure_current(on_pending=lambda pending: reported.append(
+        ([version for version, _, _, _ in pending], len(server.statements))))
+    # Reported right after the first read, before the lock and any DDL.
+    assert reported == [([1, 2], 1)]
+
+
+def test_ensure_current_skips_when_everything_is_applied(migrations_dir, fake_pool):
+    applied = {v: digest for v, _, digest, _ in load_migrations(str(migrations_dir))}
+    server = _serve(fake_pool, applied=dict(applied))
+    reported = []
+    assert schema_migrations.ensure_current(on_pending=reported.append) == []
+    assert server.statements == ["SELECT version, checksum FROM schema_migrations"]
+    assert reported == []
+    assert fake_pool.conn.commits == 0
+
+
+def test_ensure_current_runs_only_new_migrations(migrations_dir, fake_pool):
+    first = load_migrations(str(migrations_dir))[0]
+    server = _serve(fake_pool, applied={1: first[2]})
+    assert schema_migrations.ensure_current() == [2]
+    assert "CREATE TABLE first ();" not in server.statements
+
+
+def test_ensure_current_rejects_edited_migration(migrations_dir, fake_pool):
+    server = _serve(fake_pool, applied={1: checksum("CREATE TABLE old ();")})
+    with pytest.raises(MigrationError):
+        schema_migrations.ensure_current()
+    assert "SELECT pg_advisory_xact_lock(%s)" not in server.statements
+
+
+def test_ensure_current_rolls_back_on_failure(migrations_dir, fake_pool):
+    _serve(fake_pool, fail_on="second")
+    with pytest.raises(RuntimeError):
+        schema_migrations.ensure_current()
+    assert fake_pool.conn.rollbacks == 1
+    assert fake_pool.conn.commits == 0
+    assert fake_pool.conn.autocommit is True
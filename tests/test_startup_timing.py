@@ -0,0 +1,19 @@
+import startup_timing
+
+
+def test_marks_are_recorded_once_in_order(monkeypatch):
+    monkeypatch.setattr(startup_timing, "_marks", [])
+    startup_timing.mark("window shown")
+    startup_timing.mark("db connected")
+    startup_timing.mark("window shown")
+    names = [name for name, _ in startup_timing.marks()]
+    assert names == ["window shown", "db connected"]
+    seconds = [value for _, value in startup_timing.marks()]
+    assert seconds == sorted(seconds)
+
+
+def test_summary(monkeypatch):
+    monkeypatch.setattr(startup_timing, "_marks", [])
+    assert startup_timing.summary() == "--"
+    monkeypatch.setattr(startup_timing, "_marks", [("window shown", 0.25), ("db connected", 1.5)])
+    assert startup_timing.summary() == "window shown 0.25 s | db connected 1.50 s"
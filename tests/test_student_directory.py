@@ -0,0 +1,122 @@
+import time
+from datetime import datetime
+
+import pytest
+
+import db
+import student_directory
+from student_directory import StudentDirectory, fold, id_from_label
+
+T0 = datetime(2026, 10, 1, 12, 0)
+T1 = datetime(2026, 10, 2, 9, 30)
+
+ROWS = [
+    (1, "Zoë Müller", True, T0),
+    (2, "Maria Anders", True, T0),
+    (3, "Anton Berger", False, T0),
+    (4, "Ana Silva", True, None),
+]
+
+
+@pytest.fixture
+def directory():
+    directory = StudentDirectory()
+    directory.load(ROWS)
+    return directory
+
+
+def test_fold_strips_accents_case_and_spaces():
+    assert fold("  Zoë   MÜLLER ") == "zoe muller"
+    assert fold("Łukasz Šimić") == "łukasz simic"
+    assert fold("Anders-Ries, O'Neil") == "anders ries o neil"
+    assert fold(None) == ""
+
+
+def test_search_matches_word_starts_accent_insensitive(directory):
+    assert directory.search("mul") == [(1, "Zoë Müller")]
+    assert directory.search("zoe") == [(1, "Zoë Müller")]
+    assert directory.search("an") == [(4, "Ana Silva"), (2, "Maria Anders")]
+    assert directory.search("an", active_only=False) == [(4, "Ana Silva"), (3, "Anton Berger"), (2, "Maria Anders")]
+    assert directory.search("an s") == [(4, "Ana Silva")]
+    assert directory.search("s an") == [(4, "Ana Silva")]
+    assert directory.search("x") == []
+    assert directory.search("  ") == []
+
+
+def test_search_by_member_number(directory):
+    assert directory.search("2") == [(2, "Maria Anders")]
+    assert directory.search("3") == []
+    assert directory.search("3", active_only=False) == [(3, "Anton Berger")]
+
+
+def test_search_respects_limit(directory):
+    assert len(directory.search("a", limit=1)) == 1
+
+
+def test_upsert_renames_and_remove_drops(directory):
+    directory.upsert([(2, "Maria Öberg", True, T1), (5, "Olga Ivanova", True, None)])
+    assert directory.search("anders") == []
+    assert directory.search("ober") == [(2, "Maria Öberg")]
+    assert [row[0] for row in directory.search("o")] == [2, 5]
+    assert directory.watermark == T1
+    assert directory.max_id == 5
+    directory.remove([5])
+    assert directory.search("olga") == []
+    assert len(directory) == 4
+
+
+def test_load_tracks_watermark_and_max_id(directory):
+    assert directory.watermark == T0
+    assert directory.max_id == 4
+    assert directory.name(1) == "Zoë Müller"
+
+
+def test_search_is_fast_on_a_large_directory():
+    directory = StudentDirectory()
+    first = ["Ana", "Jörg", "Lukas", "Sophie", "Emre", "Noah", "Léa", "Mateo"]
+    last = ["Huber", "Gruber", "Bauer", "Wagner", "Müller", "Pichler", "Steiner", "Moser"]
+    directory.load(
+        (i, f"{first[i % 8]} {last[(i // 8) % 8]} {i}", True, None)
+        for i in range(1, 50001)
+    )
+    started = time.perf_counter()
+    for _ in range(100):
+        directory.search("mul")
+    assert (time.perf_counter() - started) / 100 < 0.005
+
+
+def test_id_from_label():
+    assert id_from_label("Ana Silva (#4)") == 4
+    assert id_from_label(" 17 ") == 17
+    assert id_from_label("Ana (Silva)") is None
+    assert id_from_label("") is None
+
+
+def test_refresh_reads_changes_since_watermark(monkeypatch):
+    calls = []
+
+    def fake_execute(query, params=None, cache_ttl=None):
+        calls.append((query, params))
+        if "ORDER BY id" in query:
+            return list(ROWS)
+        return [(2, "Maria Anders-Ries", True, T1)]
+
+    monkeypatch.setattr(db, "execute", fake_execute)
+    monkeypatch.setattr(student_directory, "_directory", StudentDirectory())
+    student_directory.refresh()
+    assert student_directory.search("maria") == [(2, "Maria Anders")]
+
+    student_directory.refresh()
+    query, params = calls[-1]
+    assert "updated_at >= %s OR id > %s" in query
+    assert params == (T0 - student_directory.REFRESH_OVERLAP, 4)
+    assert student_directory.labels("ries") == ["Maria Anders-Ries (#2)"]
+
+
+def test_refresh_ids_drops_deleted_students(monkeypatch):
+    monkeypatch.setattr(db, "execute", lambda query, params=None, cache_ttl=None: [])
+    directory = StudentDirectory()
+    directory.load(ROWS)
+    monkeypatch.setattr(student_directory, "_directory", directory)
+    student_directory.refresh([4])
+    assert student_directory.search("ana") == []
@@ -0,0 +1,97 @@
+from ui.tree_rows import KeyedTree
+
+
+class FakeTree:
+    """Just enough of ttk.Treeview for KeyedTree, recording every Tk call."""
+
+    def __init__(self):
+        self.order = []
+        self.items = {}
+        self.calls = []
+
+    def get_children(self):
+        return tuple(self.order)
+
+    def exists(self, iid):
+        return iid in self.items
+
+    def insert(self, parent, index, iid, values, tags):
+        self.calls.append(("insert", iid))
+        self.order.insert(index, iid)
+        self.items[iid] = (tuple(values), tuple(tags))
+
+    def item(self, iid, values, tags):
+        self.calls.append(("item", iid))
+        self.items[iid] = (tuple(values), tuple(tags))
+
+    def move(self, iid, parent, index):
+        self.calls.append(("move", iid))
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.calls.append(("delete", iid))
+            self.order.remove(iid)
+            del self.items[iid]
+
+
+def _make_item(row):
+    return (row[0], row[1]), ("active",)
+
+
+def _adapter():
+    return KeyedTree(FakeTree(), _make_item, empty_item=(("", "no data"), ("inactive",)))
+
+
+def test_sync_only_touches_changed_rows():
+    rows = _adapter()
+    rows.sync([(1, "Ana"), (2, "Ben"), (3, "Cleo")])
+    rows.tree.calls.clear()
+
+    rows.sync([(1, "Ana"), (2, "Benno"), (3, "Cleo")])
+    assert rows.tree.calls == [("item", "2")]
+
+
+def test_sync_inserts_deletes_and_reorders():
+    rows = _adapter()
+    rows.sync([(1, "Ana"), (2, "Ben"), (3, "Cleo")])
+    rows.tree.calls.clear()
+
+    rows.sync([(3, "Cleo"), (1, "Ana"), (4, "Dan")])
+    assert rows.tree.order == ["3", "1", "4"]
+    assert ("delete", "2") in rows.tree.calls
+    assert ("insert", "4") in rows.tree.calls
+    assert not any(call[0] == "item" for call in rows.tree.calls)
+    assert len(rows) == 3
+
+
+def test_empty_result_shows_placeholder():
+    rows = _adapter()
+    rows.sync([(1, "Ana")])
+    rows.sync([])
+    assert rows.tree.order == [KeyedTree.EMPTY_IID]
+    assert len(rows) == 0
+    rows.sync([(1, "Ana")])
+    assert rows.tree.order == ["1"]
+
+
+def test_patch_updates_removes_and_reports_new_ids():
+    rows = _adapter()
+    rows.sync([(1, "Ana"), (2, "Ben")])
+    rows.tree.calls.clear()
+
+    not_shown = rows.patch([1, 2, 5], [(1, "Anna"), (5, "Eve")])
+    assert not_shown == {"5"}
+    assert rows.tree.items["1"] == ((1, "Anna"), ("active",))
+    assert not rows.tree.exists("2")
+
+
+def test_row_returns_the_source_row():
+    rows = _adapter()
+    rows.sync([(1, "Ana"), (2, "Ben")])
+    rows.patch([2], [(2, "Benno")])
+    assert rows.row("1") == (1, "Ana")
+    assert rows.row(2) == (2, "Benno")
+    rows.patch([1], [])
+    assert rows.row(1) is None
@@ -1,5 +1,5 @@
 import pytest
-from datetime import date, timedelta
+from datetime import date, time, timedelta
 
 from validation_middleware import (
     ValidationError,
@@ -9,9 +9,10 @@ from validation_middleware import (
     validate_weight,
     validate_birthday,
 )
-# NOTE: Disabled below because importing ui.* triggers a DB connection in CI.
-# from ui.reports import build_student_filters
-# from ui.students import default_newsletter_opt_in
+from ui.attendance import build_roster_checkin, session_label_rows
+from ui.reports import STUDENT_SEARCH_TEXT, build_student_filters, build_student_ranking
+from ui.sessions import build_session_filters, session_window
+from ui.students import default_newsletter_opt_in
 
 # ---------------------------
 # Validation helper tests
@@ -85,33 +86,104 @@ def test_full_student_registration_valid():
 # Newsletter defaults
 # ---------------------------
 
-# def test_newsletter_default_opt_in():
-#     assert default_newsletter_opt_in() is True
+def test_newsletter_default_opt_in():
+    assert default_newsletter_opt_in() is True
 
 # ---------------------------
 # Reports filter builder
 # ---------------------------
 
-# def test_reports_filters_name_only():
-#     where_sql, params = build_student_filters("Ana", None, None, None)
-#     assert "s.name ILIKE %s" in where_sql
-#     assert params == ["%Ana%"]
+def test_reports_filters_search_term():
+    where_sql, params = build_student_filters(" Ana ", None, None, None, False, None)
+    assert f"{STUDENT_SEARCH_TEXT} ILIKE %s" in where_sql
+    assert f"%s <%% {STUDENT_SEARCH_TEXT}" in where_sql
+    for field in ("s.name", "s.email", "s.phone", "s.guardian_name", "s.guardian_email", "s.guardian_phone"):
+        assert field in STUDENT_SEARCH_TEXT
+    assert params == ["%Ana%", "Ana"]
 
 
-# def test_reports_filters_location_none():
-#     where_sql, params = build_student_filters("", "NONE", None, None)
-#     assert "s.location_id IS NULL" in where_sql
-#     assert params == []
+def test_reports_ranking_with_term():
+    join_sql, params, order_by = build_student_ranking("Ana")
+    assert "word_similarity(%s" in join_sql
+    assert params == ["Ana"]
+    assert order_by == ("m.distance", "s.name", "s.id")
 
 
-# def test_reports_filters_location_specific():
-#     where_sql, params = build_student_filters("", 5, None, None)
-#     assert "s.location_id = %s" in where_sql
-#     assert params == [5]
+def test_reports_ranking_without_term_keeps_name_order():
+    assert build_student_ranking("  ") == ("", [], ("s.name", "s.id"))
 
 
-# def test_reports_filters_consent_and_status():
-#     where_sql, params = build_student_filters("", None, True, False)
-#     assert "s.newsletter_opt_in = %s" in where_sql
-#     assert "s.active = %s" in where_sql
-#     assert params == [True, False]
+def test_reports_filters_location_none():
+    where_sql, params = build_student_filters("", "NONE", None, None, False, None)
+    assert "s.location_id IS NULL" in where_sql
+    assert params == []
+
+
+def test_reports_filters_location_specific():
+    where_sql, params = build_student_filters("", 5, None, None, False, None)
+    assert "s.location_id = %s" in where_sql
+    assert params == [5]
+
+
+def test_reports_filters_consent_and_status():
+    where_sql, params = build_student_filters("", None, True, False, False, None)
+    assert "s.newsletter_opt_in = %s" in where_sql
+    assert "s.active = %s" in where_sql
+    assert params == [True, False]
+
+
+def test_student_filters_picked_student_uses_id():
+    where_sql, params = build_student_filters("Ana Silva (#4)", None, None, True, False, None, student_id=4)
+    assert "s.id = %s" in where_sql
+    assert "ILIKE" not in where_sql
+    assert params == [4, True]
+
+
+# ---------------------------
+# Sessions window and filters
+# ---------------------------
+
+def test_session_window_spans_whole_weeks():
+    # 2026-10-14 is a Wednesday.
+    first, last = session_window(date(2026, 10, 14), 2)
+    assert first == date(2026, 9, 28)
+    assert last == date(2026, 11, 1)
+    assert first.weekday() == 0 and last.weekday() == 6
+
+
+def test_session_window_zero_weeks_is_this_week():
+    assert session_window(date(2026, 10, 18), 0) == (date(2026, 10, 12), date(2026, 10, 18))
+
+
+def test_session_filters_date_range_only():
+    where_sql, params = build_session_filters(date(2026, 1, 5), date(2026, 1, 11))
+    assert where_sql == "WHERE cs.session_date BETWEEN %s AND %s"
+    assert params == [date(2026, 1, 5), date(2026, 1, 11)]
+
+
+def test_session_filters_all():
+    where_sql, params = build_session_filters(date(2026, 1, 5), date(2026, 1, 11), 3, 7, False)
+    assert "cs.location_id = %s" in where_sql
+    assert "cs.class_id = %s" in where_sql
+    assert "cs.cancelled = %s" in where_sql
+    assert params == [date(2026, 1, 5), date(2026, 1, 11), 3, 7, False]
+
+
+# ---------------------------
+# Attendance roster
+# ---------------------------
+
+def test_roster_checkin_is_one_statement_with_an_id_array():
+    query, params = build_roster_checkin(9, [15, 12, 15, 3], "present", "coach")
+    assert query.count("%s") == 4
+    assert "unnest(%s::bigint[])" in query
+    assert "ON CONFLICT DO NOTHING" in query
+    assert params == (9, "present", "coach", [3, 12, 15])
+
+
+def test_session_label_rows():
+    rows = session_label_rows([
+        (4, date(2026, 10, 16), time(18, 30), "Fundamentals"),
+        (5, date(2026, 10, 17), None, "Open Mat"),
+    ])
+    assert rows == [(4, "2026-10-16 18:30 Fundamentals"), (5, "2026-10-17 Open Mat")]
@@ -0,0 +1,43 @@
+import db
+from ui.virtual_tree import QuerySource
+
+
+def _source():
+    return QuerySource(
+        "cs.id, cs.session_date",
+        "t_class_sessions cs",
+        "WHERE cs.cancelled = %s",
+        [False],
+        ("cs.session_date", "cs.id"),
+        key_of=lambda r: (r[1], r[0]),
+        descending=True,
+    )
+
+
+def test_block_after_loaded_block_seeks(monkeypatch):
+    calls = []
+    monkeypatch.setattr(db, "execute", lambda query, params=None, cache_ttl=None: calls.append((query, params)) or [])
+    _source().fetch(200, 200, after_row=(17, "2026-01-05"))
+    query, params = calls[0]
+    assert "(cs.session_date, cs.id) < (%s, %s)" in query
+    assert "ORDER BY cs.session_date DESC, cs.id DESC LIMIT %s" in query
+    assert "OFFSET" not in query
+    assert params == (False, "2026-01-05", 17, 200)
+
+
+def test_block_without_neighbour_uses_offset(monkeypatch):
+    calls = []
+    monkeypatch.setattr(db, "execute", lambda query, params=None, cache_ttl=None: calls.append((query, params)) or [])
+    _source().fetch(4000, 200)
+    query, params = calls[0]
+    assert query.endswith("LIMIT %s OFFSET %s")
+    assert params == (False, 200, 4000)
+
+
+def test_count_is_cached_per_filter(monkeypatch):
+    calls = []
+    monkeypatch.setattr(db, "execute", lambda query, params=None, cache_ttl=None: calls.append((query, params, cache_ttl)) or [(3,)])
+    assert _source().count() == 3
+    query, params, cache_ttl = calls[0]
+    assert query == "SELECT COUNT(*) FROM t_class_sessions cs WHERE cs.cancelled = %s"
+    assert params == (False,) and cache_ttl
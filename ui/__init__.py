@@ -1,12 +1,5 @@
-from . import about
-from . import attendance
-from . import locations
-from . import news_notifications
-from . import reports
-from . import sessions
-from . import students
-from . import teachers
-
+# Tab modules are imported on demand (see lazy_imports); importing the package
+# must stay cheap.
 __all__ = [
     "about",
     "attendance",
@@ -14,6 +7,7 @@ __all__ = [
     "news_notifications",
     "reports",
     "sessions",
+    "settings",
     "students",
     "teachers",
 ]
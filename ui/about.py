@@ -1,4 +1,3 @@
-import json
 import os
 import platform
 import re
@@ -7,6 +6,10 @@ import subprocess
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
+import app_settings
+import lazy_imports
+import query_stats
+import startup_timing
 from version import __version__
 from i18n import t
 
@@ -24,21 +27,6 @@ def build(tab_about):
     logo_label = ttk.Label(logo_frame)
     logo_label.grid(row=0, column=0, sticky="w")
 
-    def _settings_path():
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        return os.path.join(base_dir, "app_settings.json")
-
-    def _load_settings():
-        try:
-            with open(_settings_path(), "r", encoding="utf-8") as handle:
-                return json.load(handle)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-
-    def _save_settings(data):
-        with open(_settings_path(), "w", encoding="utf-8") as handle:
-            json.dump(data, handle, indent=2, sort_keys=True)
-
     def _load_logo(path):
         try:
             from PIL import Image, ImageTk
@@ -62,9 +50,7 @@ def build(tab_about):
         )
         if not path:
             return
-        settings = _load_settings()
-        settings["logo_path"] = path
-        _save_settings(settings)
+        app_settings.save_value("logo_path", path)
         _load_logo(path)
 
     ttk.Button(logo_frame, text=t("button.choose_logo"), command=choose_logo).grid(
@@ -72,8 +58,7 @@ def build(tab_about):
     )
     logo_frame.columnconfigure(0, weight=1)
 
-    settings = _load_settings()
-    _load_logo(settings.get("logo_path"))
+    _load_logo(app_settings.get("logo_path"))
 
     about_frame = ttk.LabelFrame(tab_about, text=t("label.system_config"), padding=10)
     about_frame.grid(row=2, column=0, sticky="nsew", padx=10, pady=(10, 6))
@@ -87,6 +72,8 @@ def build(tab_about):
         "dns": tk.StringVar(),
         "gateway": tk.StringVar(),
         "os": tk.StringVar(),
+        "startup": tk.StringVar(),
+        "imports": tk.StringVar(),
     }
 
     ttk.Label(about_frame, text=t("label.software_version")).grid(row=0, column=0, sticky="w", padx=5, pady=4)
@@ -107,6 +94,16 @@ def build(tab_about):
     ttk.Label(about_frame, text=t("label.operating_system")).grid(row=5, column=0, sticky="w", padx=5, pady=4)
     ttk.Label(about_frame, textvariable=about_values["os"]).grid(row=5, column=1, sticky="w", padx=5, pady=4)
 
+    ttk.Label(about_frame, text=t("label.startup_time")).grid(row=6, column=0, sticky="nw", padx=5, pady=4)
+    ttk.Label(about_frame, textvariable=about_values["startup"], wraplength=700, justify="left").grid(
+        row=6, column=1, sticky="w", padx=5, pady=4
+    )
+
+    ttk.Label(about_frame, text=t("label.import_times")).grid(row=7, column=0, sticky="nw", padx=5, pady=4)
+    ttk.Label(about_frame, textvariable=about_values["imports"], wraplength=700, justify="left").grid(
+        row=7, column=1, sticky="w", padx=5, pady=4
+    )
+
     about_frame.columnconfigure(1, weight=1)
 
     def _parse_windows_network_config(output):
@@ -203,9 +200,11 @@ def build(tab_about):
         about_values["dns"].set(net.get("dns", "Unknown"))
         about_values["gateway"].set(net.get("gateway", "Unknown"))
         about_values["os"].set(f"{platform.system()} {platform.release()}")
+        about_values["startup"].set(startup_timing.summary())
+        about_values["imports"].set(lazy_imports.summary())
 
     ttk.Button(about_frame, text=t("button.refresh"), command=refresh_about_panel) \
-        .grid(row=6, column=0, columnspan=2, pady=8, sticky="w")
+        .grid(row=8, column=0, columnspan=2, pady=8, sticky="w")
 
     logs_frame = ttk.LabelFrame(tab_about, text=t("label.app_log"), padding=10)
     logs_frame.grid(row=3, column=0, sticky="nsew", padx=10, pady=(0, 10))
@@ -253,16 +252,10 @@ def build(tab_about):
     capture_psql_var = tk.BooleanVar(value=False)
 
     def _load_capture_psql_setting():
-        settings_data = _load_settings()
-        logging_cfg = settings_data.get("logging", {}) if isinstance(settings_data.get("logging"), dict) else {}
-        capture_psql_var.set(bool(logging_cfg.get("capture_psql", False)))
+        capture_psql_var.set(bool(app_settings.get_value("logging", "capture_psql", False)))
 
     def _save_capture_psql_setting():
-        settings_data = _load_settings()
-        logging_cfg = settings_data.get("logging", {}) if isinstance(settings_data.get("logging"), dict) else {}
-        logging_cfg["capture_psql"] = bool(capture_psql_var.get())
-        settings_data["logging"] = logging_cfg
-        _save_settings(settings_data)
+        app_settings.update_section("logging", capture_psql=bool(capture_psql_var.get()))
 
     _load_capture_psql_setting()
 
@@ -276,4 +269,76 @@ def build(tab_about):
         command=_save_capture_psql_setting,
     ).grid(row=2, column=1, sticky="e", pady=(6, 0))
 
-    return {"refresh_about_panel": refresh_about_panel}
+    stats_frame = ttk.LabelFrame(tab_about, text=t("label.query_stats"), padding=10)
+    stats_frame.grid(row=4, column=0, sticky="nsew", padx=10, pady=(0, 10))
+
+    stats_tree = ttk.Treeview(
+        stats_frame,
+        columns=("site", "count", "avg", "p50", "p95", "max", "total"),
+        show="headings",
+        height=6
+    )
+    stats_header_map = {
+        "site": "label.call_site",
+        "count": "label.count",
+        "avg": "label.avg_ms",
+        "p50": "label.p50_ms",
+        "p95": "label.p95_ms",
+        "max": "label.max_ms",
+        "total": "label.total_ms",
+    }
+    for c in stats_tree["columns"]:
+        stats_tree.heading(c, text=t(stats_header_map.get(c, c)))
+        if c != "site":
+            stats_tree.column(c, width=80, anchor="e")
+    stats_tree.column("site", width=320)
+    stats_tree.grid(row=0, column=0, columnspan=3, sticky="nsew")
+
+    stats_scroll_y = ttk.Scrollbar(stats_frame, orient="vertical", command=stats_tree.yview)
+    stats_tree.configure(yscrollcommand=stats_scroll_y.set)
+    stats_scroll_y.grid(row=0, column=3, sticky="ns")
+
+    slow_query_lbl = ttk.Label(stats_frame)
+    slow_query_lbl.grid(row=1, column=2, sticky="e", pady=(6, 0))
+
+    stats_frame.columnconfigure(0, weight=1)
+
+    # Show per-call-site query latency collected by db.execute since startup (or last reset).
+    def refresh_query_stats():
+        stats_tree.delete(*stats_tree.get_children())
+        for row in query_stats.snapshot():
+            stats_tree.insert(
+                "", tk.END,
+                values=(
+                    row["site"],
+                    row["count"],
+                    f"{row['avg_ms']:.1f}",
+                    f"{row['p50_ms']:.0f}",
+                    f"{row['p95_ms']:.0f}",
+                    f"{row['max_ms']:.1f}",
+                    f"{row['total_ms']:.0f}",
+                )
+            )
+        slow_query_lbl.config(text=t(
+            "label.slow_query_threshold",
+            ms=f"{query_stats.slow_query_threshold_ms():g}",
+            path=query_stats.SLOW_QUERY_LOG,
+        ))
+
+    def reset_query_stats():
+        query_stats.reset()
+        refresh_query_stats()
+
+    ttk.Button(stats_frame, text=t("button.refresh"), command=refresh_query_stats).grid(
+        row=1, column=0, sticky="w", pady=(6, 0)
+    )
+    ttk.Button(stats_frame, text=t("button.reset"), command=reset_query_stats).grid(
+        row=1, column=1, sticky="w", padx=(6, 0), pady=(6, 0)
+    )
+
+    refresh_query_stats()
+
+    return {
+        "refresh_about_panel": refresh_about_panel,
+        "refresh_query_stats": refresh_query_stats,
+    }
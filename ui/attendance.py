@@ -1,8 +1,84 @@
 import tkinter as tk
+from datetime import date, timedelta
 from tkinter import ttk, messagebox
 
-from db import execute
+import background
+import db
+import lookups
+from db import insert_values
+from error_middleware import handle_db_error
 from i18n import t
+from ui.busy_indicator import BusyIndicator
+from ui.student_combobox import StudentCombobox
+from ui.tree_rows import KeyedTree
+from ui.virtual_tree import QuerySource, VirtualTreeview
+
+
+# Sessions offered in the roster picker: this many days back and ahead of today.
+ROSTER_DAYS_BACK = 7
+ROSTER_DAYS_AHEAD = 1
+# Students who attended the same class within this many weeks are on the roster.
+ROSTER_RECENT_WEEKS = 8
+
+TICK_OFF = "\u2610"
+TICK_ON = "\u2611"
+
+_ROSTER_SESSIONS = """
+    SELECT cs.id, cs.session_date, cs.start_time, c.name
+    FROM t_class_sessions cs
+    JOIN t_classes c ON cs.class_id = c.id
+    WHERE cs.session_date BETWEEN %s AND %s AND cs.cancelled = false
+    ORDER BY cs.session_date DESC, cs.start_time DESC, cs.id DESC
+"""
+
+# Active students at the session's location or recently in the same class, plus
+# anyone already registered; `registered` marks the latter.
+_ROSTER_STUDENTS = """
+    WITH s AS (
+        SELECT id, class_id, location_id, session_date FROM t_class_sessions WHERE id = %s
+    ), registered AS (
+        SELECT student_id FROM t_attendance WHERE session_id = %s
+    ), recent AS (
+        SELECT DISTINCT a.student_id
+        FROM t_attendance a
+        JOIN t_class_sessions cs ON a.session_id = cs.id
+        JOIN s ON cs.class_id = s.class_id
+        WHERE cs.session_date BETWEEN s.session_date - %s AND s.session_date
+    )
+    SELECT st.id, st.name, st.belt, st.id IN (SELECT student_id FROM registered) AS registered
+    FROM t_students st
+    CROSS JOIN s
+    WHERE (st.active AND (st.location_id = s.location_id OR st.id IN (SELECT student_id FROM recent)))
+       OR st.id IN (SELECT student_id FROM registered)
+    ORDER BY st.name, st.id
+"""
+
+
+def build_roster_checkin(session_id, student_ids, status, source):
+    """
+    One INSERT for a whole roster: the ids travel as a single array parameter and
+    are expanded server-side, so a full class is one round trip. Students that
+    are already registered are skipped; RETURNING lists the ones inserted.
+    """
+    query = """
+        INSERT INTO t_attendance (session_id, student_id, status, checkin_source)
+        SELECT %s, ids.student_id, %s, %s FROM unnest(%s::bigint[]) AS ids(student_id)
+        ON CONFLICT DO NOTHING
+        RETURNING student_id
+    """
+    return query, (session_id, status, source, sorted(set(student_ids)))
+
+
+def session_label_rows(rows):
+    """(id, "date start class") rows for a lookups.Lookup over roster sessions."""
+    return [
+        (session_id, " ".join(part for part in (
+            session_date.isoformat(),
+            start_time.strftime("%H:%M") if start_time else "",
+            class_name,
+        ) if part))
+        for session_id, session_date, start_time, class_name in rows
+    ]
 
 
 def build(tab_attendance):
@@ -15,64 +91,272 @@ def build(tab_attendance):
     tab_attendance.grid_rowconfigure(1, weight=1)
     tab_attendance.grid_columnconfigure(0, weight=1)
 
+    busy = BusyIndicator(tab_attendance, row=0, column=0, sticky="w", padx=10, pady=(0, 5))
+
     attendance_frame.columnconfigure(0, weight=1)
     attendance_frame.rowconfigure(3, weight=1)
 
     session_id = tk.IntVar()
-    student_id = tk.IntVar()
+    student_ids = tk.StringVar()
     status = tk.StringVar(value="present")
     source = tk.StringVar(value="coach")
     query_value = tk.IntVar()
+    # ("session" | "student", id) of the search currently shown in the table.
+    last_search = None
+
+    # Parse "12, 15 18" into a de-duplicated list of student ids.
+    def _parse_student_ids(text):
+        ids = []
+        for token in text.replace(",", " ").split():
+            value = int(token)
+            if value not in ids:
+                ids.append(value)
+        return ids
 
-    # Register a single attendance record for the selected session/student/status.
+    # Register attendance for one or more students in a single batched insert.
     def register_attendance():
         try:
-            execute("""
-                INSERT INTO t_attendance (session_id, student_id, status, checkin_source)
-                VALUES (%s,%s,%s,%s)
-                ON CONFLICT DO NOTHING
-            """, (
-                session_id.get(),
-                student_id.get(),
-                status.get(),
-                source.get()
-            ))
-            messagebox.showinfo("OK", "Attendance registered")
+            ids = _parse_student_ids(student_ids.get())
+            if not ids:
+                raise ValueError("Enter at least one student ID")
+            sid = session_id.get()
+            inserted = insert_values(
+                "t_attendance",
+                ("session_id", "student_id", "status", "checkin_source"),
+                [(sid, st_id, status.get(), source.get()) for st_id in ids],
+                returning=("student_id",),
+                on_conflict="ON CONFLICT DO NOTHING",
+            )
+            skipped = len(ids) - len(inserted)
+            message = f"Attendance registered: {len(inserted)}"
+            if skipped:
+                message += f" (already registered: {skipped})"
+            messagebox.showinfo("OK", message)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    # Add a student picked by name to the ids being registered.
+    def add_picked_student(student_id):
+        try:
+            ids = _parse_student_ids(student_ids.get())
+        except ValueError:
+            ids = []
+        if student_id not in ids:
+            ids.append(student_id)
+        student_ids.set(", ".join(str(i) for i in ids))
+        student_picker.set("")
+
+    # Enter in the picker adds a chosen label or a typed member number.
+    def add_typed_student(event=None):
+        picked = student_picker.selected_id()
+        if picked is not None:
+            add_picked_student(picked)
+
     # Load attendance rows for a session id into the table.
-    def search_by_session():
-        rows = execute("""
-            SELECT st.name, a.status, a.checkin_time
-            FROM t_attendance a
-            JOIN t_students st ON a.student_id = st.id
-            WHERE a.session_id = %s
-            ORDER BY st.name
-        """, (query_value.get(),))
-        fill_attendance_table(rows)
+    def search_by_session(value=None):
+        nonlocal last_search
+        value = query_value.get() if value is None else value
+        last_search = ("session", value)
+        attendance_tree.set_source(QuerySource(
+            "st.name, a.status, a.checkin_time, st.id",
+            "t_attendance a JOIN t_students st ON a.student_id = st.id",
+            "WHERE a.session_id = %s",
+            [value],
+            ("st.name", "st.id"),
+            key_of=lambda r: (r[0], r[3]),
+        ))
 
     # Load attendance rows for a student id into the table.
-    def search_by_student():
-        rows = execute("""
-            SELECT c.name, cs.session_date, a.status
-            FROM t_attendance a
+    def search_by_student(value=None):
+        nonlocal last_search
+        value = query_value.get() if value is None else value
+        last_search = ("student", value)
+        attendance_tree.set_source(QuerySource(
+            "c.name, cs.session_date, a.status, cs.id",
+            """t_attendance a
             JOIN t_class_sessions cs ON a.session_id = cs.id
-            JOIN t_classes c ON cs.class_id = c.id
-            WHERE a.student_id = %s
-            ORDER BY cs.session_date DESC
-        """, (query_value.get(),))
-        fill_attendance_table(rows)
-
-    # Replace the attendance table rows with the provided dataset.
-    def fill_attendance_table(rows):
-        for r in attendance_tree.get_children():
-            attendance_tree.delete(r)
-        if not rows:
-            attendance_tree.insert("", tk.END, values=(t("label.no_data"), "", ""))
+            JOIN t_classes c ON cs.class_id = c.id""",
+            "WHERE a.student_id = %s",
+            [value],
+            ("cs.session_date", "cs.id"),
+            key_of=lambda r: (r[1], r[3]),
+            descending=True,
+            count_from="t_attendance a",
+        ))
+
+    # Re-read the shown search and roster when attendance for one of `session_ids` changed.
+    # Notifications carry the session id only, so a per-student view always refreshes.
+    def refresh_attendance_rows(session_ids=None):
+        roster_sid = roster_state["session_id"]
+        if roster_sid is not None and (session_ids is None or roster_sid in session_ids):
+            load_roster()
+        if last_search is None:
+            return
+        mode, value = last_search
+        if mode == "student" or session_ids is None or value in session_ids:
+            attendance_tree.refresh()
+
+    # ---------- Roster check-in ----------
+    roster_session = tk.StringVar()
+    roster_state = {"lookup": lookups.Lookup([]), "session_id": None, "saving": False}
+    # Ids of the roster students ticked but not yet saved.
+    roster_ticked = set()
+
+    # Roster row -> (values, tags); already registered students stay ticked and greyed.
+    def roster_item(row):
+        st_id, name, belt, registered = row
+        if registered:
+            return (TICK_ON, name, belt or "", t("label.registered")), ("registered",)
+        return (TICK_ON if st_id in roster_ticked else TICK_OFF, name, belt or "", ""), ()
+
+    # Offer the sessions around today in the picker; read in the background (and
+    # cached until a session changes), the values are filled in on delivery.
+    def refresh_roster_sessions(event=None):
+        today = date.today()
+        params = (today - timedelta(days=ROSTER_DAYS_BACK), today + timedelta(days=ROSTER_DAYS_AHEAD))
+
+        def loaded(rows):
+            roster_state["lookup"] = lookups.Lookup(session_label_rows(rows))
+            roster_session_cb["values"] = roster_state["lookup"].labels
+
+        background.submit(
+            lambda: db.execute(_ROSTER_SESSIONS, params, cache_ttl=db.LOOKUP_CACHE_TTL),
+            loaded,
+            key="attendance_roster_sessions",
+        )
+
+    # Read the eligible students of the picked session in the background.
+    def load_roster(event=None):
+        sid = roster_state["lookup"].id(roster_session.get())
+        if sid != roster_state["session_id"]:
+            roster_ticked.clear()
+        roster_state["session_id"] = sid
+        if sid is None:
+            roster_rows.sync([])
+            update_roster_count()
             return
-        for row in rows:
-            attendance_tree.insert("", tk.END, values=row)
+        params = (sid, sid, ROSTER_RECENT_WEEKS * 7)
+
+        def loaded(rows):
+            if sid != roster_state["session_id"]:
+                return
+            registered = {r[0] for r in rows if r[3]}
+            roster_ticked.difference_update(registered)
+            roster_ticked.intersection_update(r[0] for r in rows)
+            roster_rows.sync(rows)
+            update_roster_count()
+
+        background.submit(lambda: db.execute(_ROSTER_STUDENTS, params), loaded, key="attendance_roster", busy=busy)
+
+    # Flip the tick of the given roster items.
+    def toggle_roster(iids):
+        for iid in iids:
+            row = roster_rows.row(iid)
+            if row is None or row[3]:
+                continue
+            if row[0] in roster_ticked:
+                roster_ticked.discard(row[0])
+            else:
+                roster_ticked.add(row[0])
+            roster_rows.patch([row[0]], [row])
+        update_roster_count()
+
+    # Click toggles the row under the pointer; Space toggles the selection.
+    def on_roster_click(event):
+        iid = roster_tree.identify_row(event.y)
+        if iid:
+            toggle_roster([iid])
+
+    # Tick (or untick) every student not yet registered.
+    def tick_all_roster(ticked):
+        rows = [roster_rows.row(iid) for iid in roster_tree.get_children()]
+        rows = [row for row in rows if row is not None]
+        roster_ticked.clear()
+        if ticked:
+            roster_ticked.update(row[0] for row in rows if not row[3])
+        roster_rows.patch([row[0] for row in rows], rows)
+        update_roster_count()
+
+    def update_roster_count():
+        checkin_btn.config(text=t("button.check_in", count=len(roster_ticked)))
+        checkin_btn.state(["!disabled"] if roster_ticked and not roster_state["saving"] else ["disabled"])
+
+    # Register every ticked student with one INSERT ... SELECT unnest(...).
+    def check_in_roster():
+        sid = roster_state["session_id"]
+        ids = sorted(roster_ticked)
+        if sid is None or not ids:
+            return
+        query, params = build_roster_checkin(sid, ids, status.get(), source.get())
+
+        def saved(rows):
+            roster_state["saving"] = False
+            roster_ticked.clear()
+            update_roster_count()
+            skipped = len(ids) - len(rows)
+            message = f"Attendance registered: {len(rows)}"
+            if skipped:
+                message += f" (already registered: {skipped})"
+            messagebox.showinfo("OK", message)
+            refresh_attendance_rows({sid})
+
+        def failed(exc):
+            roster_state["saving"] = False
+            update_roster_count()
+            handle_db_error(exc, "attendance_roster_checkin")
+
+        # No second INSERT while this one is in flight.
+        roster_state["saving"] = True
+        update_roster_count()
+        background.submit(lambda: db.execute(query, params), saved, failed, key="attendance_roster_checkin", busy=busy)
+
+    roster_frame = ttk.LabelFrame(tab_attendance, text=t("label.roster_checkin"), padding=10)
+    roster_frame.grid(row=1, column=1, sticky="nsew", padx=10, pady=10)
+    tab_attendance.grid_columnconfigure(1, weight=1)
+    roster_frame.columnconfigure(1, weight=1)
+    roster_frame.rowconfigure(1, weight=1)
+
+    ttk.Label(roster_frame, text=t("label.session")).grid(row=0, column=0, sticky="w")
+    roster_session_cb = ttk.Combobox(roster_frame, textvariable=roster_session, state="readonly", width=36)
+    roster_session_cb.grid(row=0, column=1, sticky="ew", padx=5)
+    roster_session_cb.bind("<Button-1>", refresh_roster_sessions, add="+")
+    roster_session_cb.bind("<<ComboboxSelected>>", load_roster)
+
+    roster_tree = ttk.Treeview(
+        roster_frame,
+        columns=("tick", "name", "belt", "status"),
+        show="headings",
+        selectmode="extended",
+        height=14,
+    )
+    roster_tree.heading("tick", text="")
+    roster_tree.heading("name", text=t("label.name"))
+    roster_tree.heading("belt", text=t("label.belt"))
+    roster_tree.heading("status", text=t("label.status"))
+    roster_tree.column("tick", width=30, anchor="center", stretch=False)
+    roster_tree.column("belt", width=80)
+    roster_tree.column("status", width=90)
+    roster_tree.tag_configure("registered", foreground="gray")
+    roster_tree.grid(row=1, column=0, columnspan=2, sticky="nsew", pady=5)
+    roster_tree.bind("<ButtonRelease-1>", on_roster_click)
+    roster_tree.bind("<space>", lambda event: toggle_roster(roster_tree.selection()))
+
+    roster_scroll = ttk.Scrollbar(roster_frame, orient="vertical", command=roster_tree.yview)
+    roster_tree.configure(yscrollcommand=roster_scroll.set)
+    roster_scroll.grid(row=1, column=2, sticky="ns", pady=5)
+
+    roster_rows = KeyedTree(roster_tree, roster_item, empty_item=(("", t("label.no_data"), "", ""), ()))
+
+    roster_buttons = ttk.Frame(roster_frame)
+    roster_buttons.grid(row=2, column=0, columnspan=3, sticky="ew")
+    ttk.Button(roster_buttons, text=t("button.select_all"), command=lambda: tick_all_roster(True)) \
+        .pack(side="left", padx=(0, 5))
+    ttk.Button(roster_buttons, text=t("button.clear"), command=lambda: tick_all_roster(False)) \
+        .pack(side="left", padx=5)
+    checkin_btn = ttk.Button(roster_buttons, command=check_in_roster)
+    checkin_btn.pack(side="right")
+    update_roster_count()
+    refresh_roster_sessions()
 
     register_frame = ttk.LabelFrame(attendance_frame, text=t("label.register_attendance"), padding=10)
     register_frame.grid(row=0, column=0, sticky="ew", pady=5)
@@ -80,30 +364,35 @@ def build(tab_attendance):
     ttk.Label(register_frame, text=t("label.session_id")).grid(row=0, column=0, sticky="w")
     ttk.Entry(register_frame, textvariable=session_id).grid(row=0, column=1, sticky="ew")
 
-    ttk.Label(register_frame, text=t("label.student_id")).grid(row=1, column=0, sticky="w")
-    ttk.Entry(register_frame, textvariable=student_id).grid(row=1, column=1, sticky="ew")
+    ttk.Label(register_frame, text=t("label.student_ids")).grid(row=1, column=0, sticky="w")
+    ttk.Entry(register_frame, textvariable=student_ids).grid(row=1, column=1, sticky="ew")
+
+    ttk.Label(register_frame, text=t("label.find_student")).grid(row=2, column=0, sticky="w")
+    student_picker = StudentCombobox(register_frame, on_pick=add_picked_student)
+    student_picker.grid(row=2, column=1, sticky="ew")
+    student_picker.bind("<Return>", add_typed_student)
 
-    ttk.Label(register_frame, text=t("label.status")).grid(row=2, column=0, sticky="w")
+    ttk.Label(register_frame, text=t("label.status")).grid(row=3, column=0, sticky="w")
     ttk.Combobox(
         register_frame,
         textvariable=status,
         values=["present", "late", "absent", "no_show"],
         state="readonly"
-    ).grid(row=2, column=1, sticky="ew")
+    ).grid(row=3, column=1, sticky="ew")
 
-    ttk.Label(register_frame, text=t("label.source")).grid(row=3, column=0, sticky="w")
+    ttk.Label(register_frame, text=t("label.source")).grid(row=4, column=0, sticky="w")
     ttk.Combobox(
         register_frame,
         textvariable=source,
         values=["coach", "qr", "kiosk", "admin"],
         state="readonly"
-    ).grid(row=3, column=1, sticky="ew")
+    ).grid(row=4, column=1, sticky="ew")
 
     ttk.Button(
         register_frame,
         text=t("button.register"),
         command=register_attendance
-    ).grid(row=4, column=0, columnspan=2, pady=5)
+    ).grid(row=5, column=0, columnspan=2, pady=5)
 
     register_frame.columnconfigure(1, weight=1)
 
@@ -120,8 +409,12 @@ def build(tab_attendance):
 
     search_frame.columnconfigure(0, weight=1)
 
-    attendance_tree = ttk.Treeview(
+    # A student's full history can be long; only the rows in view are materialized.
+    attendance_tree = VirtualTreeview(
         attendance_frame,
+        make_item=lambda r: (r[:3], ()),
+        busy=busy,
+        empty_item=((t("label.no_data"), "", ""), ()),
         columns=("c1", "c2", "c3"),
         show="headings",
         height=12
@@ -133,4 +426,8 @@ def build(tab_attendance):
 
     attendance_tree.grid(row=3, column=0, sticky="nsew", pady=10)
 
-    return {}
+    attendance_scroll = ttk.Scrollbar(attendance_frame, orient="vertical", command=attendance_tree.yview)
+    attendance_tree.configure(yscrollcommand=attendance_scroll.set)
+    attendance_scroll.grid(row=3, column=1, sticky="ns", pady=10)
+
+    return {"refresh_attendance_rows": refresh_attendance_rows}
@@ -0,0 +1,26 @@
+from tkinter import ttk
+
+
+class BusyIndicator:
+    """
+    Indeterminate progress bar shown while a tab has background requests in
+    flight. Placed with grid(**grid_options) when the first request starts and
+    removed when the last one ends.
+    """
+
+    def __init__(self, parent, **grid_options):
+        self._count = 0
+        self._grid_options = grid_options
+        self._bar = ttk.Progressbar(parent, mode="indeterminate", length=120)
+
+    def begin(self):
+        self._count += 1
+        if self._count == 1:
+            self._bar.grid(**self._grid_options)
+            self._bar.start(15)
+
+    def end(self):
+        self._count = max(0, self._count - 1)
+        if self._count == 0:
+            self._bar.stop()
+            self._bar.grid_remove()
@@ -1,50 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+import background
 from db import execute
 from i18n import t
+from ui.busy_indicator import BusyIndicator
+from ui.tree_rows import KeyedTree
 from validation_middleware import ValidationError, validate_required
 from error_middleware import handle_db_error, log_validation_error
 
 
-def ensure_locations_schema():
-    # Create locations table and add optional student FK if missing.
-    execute("""
-        CREATE TABLE IF NOT EXISTS t_locations (
-            id serial PRIMARY KEY,
-            name text NOT NULL UNIQUE,
-            phone text,
-            address text,
-            active boolean NOT NULL DEFAULT true,
-            created_at timestamp NOT NULL DEFAULT now(),
-            updated_at timestamp
-        )
-    """)
-
-    execute("""
-        ALTER TABLE t_students
-        ADD COLUMN IF NOT EXISTS location_id integer
-    """)
-
-    execute("""
-        DO $$
-        BEGIN
-            ALTER TABLE t_students
-            ADD CONSTRAINT fk_students_location
-            FOREIGN KEY (location_id)
-            REFERENCES t_locations(id);
-        EXCEPTION
-            WHEN duplicate_object THEN NULL;
-        END $$;
-    """)
-
-
 def build(tab_locations):
    # ttk.Label(tab_locations, text="LOCATIONS TAB OK", foreground="green").grid(
     #    row=0, column=0, columnspan=3, sticky="w", padx=10, pady=10
     #)
     # Build the Locations tab UI and bind handlers.
-    ensure_locations_schema()
 
     loc_name = tk.StringVar()
     loc_phone = tk.StringVar()
@@ -62,6 +32,8 @@ def build(tab_locations):
     tab_locations.grid_rowconfigure(2, weight=1)
     tab_locations.grid_columnconfigure(0, weight=1)
 
+    busy = BusyIndicator(tab_locations, row=0, column=0, sticky="w", padx=10, pady=(0, 5))
+
     fields = [
         ("Name", loc_name),
         ("Phone", loc_phone),
@@ -119,29 +91,53 @@ def build(tab_locations):
     locations_tree.configure(xscrollcommand=x_scroll.set)
     x_scroll.pack(fill=tk.X)
 
-    # Load locations into the grid.
-    def load_locations():
-        locations_tree.delete(*locations_tree.get_children())
-        rows = execute("""
+    # Build Treeview values and tags for one location row.
+    def location_item(r):
+        status = t("label.active") if r[4] else t("label.inactive")
+        tag = "active" if r[4] else "inactive"
+        return (r[0], r[1], r[2], r[3], status), (tag,)
+
+    location_rows = KeyedTree(locations_tree, location_item, empty_item=(("", t("label.no_data"), "", "", ""), ("inactive",)))
+
+    # Fetch all locations ordered by name.
+    def fetch_locations():
+        return execute("""
             SELECT id, name, phone, address, active
             FROM t_locations
             ORDER BY name
         """)
-        if not rows:
-            locations_tree.insert(
-                "", tk.END,
-                values=("", t("label.no_data"), "", "", ""),
-                tags=("inactive",)
-            )
+
+    # Load locations into the grid in the background.
+    def load_locations():
+        background.submit(fetch_locations, show_locations, key="locations.list", busy=busy)
+
+    # Fill the grid with fetched rows.
+    def show_locations(rows):
+        location_rows.sync(rows)
+
+    # Apply changes made by other clients to the shown rows.
+    def refresh_location_rows(ids=None):
+        if ids is None:
+            load_locations()
             return
-        for r in rows:
-            status = t("label.active") if r[4] else t("label.inactive")
-            tag = "active" if r[4] else "inactive"
-            locations_tree.insert(
-                "", tk.END,
-                values=(r[0], r[1], r[2], r[3], status),
-                tags=(tag,)
+
+        def fetch():
+            return execute("""
+                SELECT id, name, phone, address, active
+                FROM t_locations
+                WHERE id = ANY(%s)
+            """, (list(ids),))
+
+        def apply(rows):
+            # A renamed or new location may change the sort order; reload in that case.
+            renamed = any(
+                locations_tree.exists(str(r[0])) and locations_tree.set(str(r[0]), "name") != r[1]
+                for r in rows
             )
+            if location_rows.patch(ids, rows) or renamed:
+                load_locations()
+
+        background.submit(fetch, apply, busy=busy)
 
     # Enable/disable buttons based on selection state.
     def update_location_button_states():
@@ -160,6 +156,8 @@ def build(tab_locations):
         nonlocal selected_location_id, selected_location_active
         selected_location_id = None
         selected_location_active = None
+        # Rows survive reloads now, so drop the highlight explicitly.
+        locations_tree.selection_remove(*locations_tree.selection())
         loc_name.set("")
         loc_phone.set("")
         loc_address.set("")
@@ -220,7 +218,7 @@ def build(tab_locations):
                 loc_address.get().strip() or None,
                 selected_location_id
             ))
-            load_locations()
+            refresh_location_rows([selected_location_id])
             clear_location_form()
         except ValidationError as ve:
             log_validation_error(ve, "update_location")
@@ -237,7 +235,7 @@ def build(tab_locations):
         execute("""
             UPDATE t_locations SET active=false WHERE id=%s
         """, (selected_location_id,))
-        load_locations()
+        refresh_location_rows([selected_location_id])
         clear_location_form()
 
     # Mark the selected location active.
@@ -249,7 +247,7 @@ def build(tab_locations):
         execute("""
             UPDATE t_locations SET active=true WHERE id=%s
         """, (selected_location_id,))
-        load_locations()
+        refresh_location_rows([selected_location_id])
         clear_location_form()
 
     btn_loc_add.config(command=register_location)
@@ -260,4 +258,7 @@ def build(tab_locations):
 
     locations_tree.bind("<<TreeviewSelect>>", on_location_select)
 
-    return {"load_locations": load_locations}
+    return {
+        "load_locations": load_locations,
+        "refresh_location_rows": refresh_location_rows,
+    }
@@ -1,8 +1,11 @@
 import tkinter as tk
 from tkinter import ttk
 
+import background
 from db import execute
 from i18n import t
+from ui.busy_indicator import BusyIndicator
+from ui.tree_rows import KeyedTree
 
 
 def build(tab_news):
@@ -43,38 +46,34 @@ def build(tab_news):
     birthdays_tree.configure(xscrollcommand=x_scroll.set)
     x_scroll.pack(fill=tk.X)
 
-    def load_birthdays():
-        for r in birthdays_tree.get_children():
-            birthdays_tree.delete(r)
+    busy = BusyIndicator(header, row=0, column=3, sticky="e", padx=(10, 0))
 
-        rows = execute("""
-            SELECT name, belt, birthday, active
+    # Fetch students with a birthday this month.
+    def fetch_birthdays():
+        return execute("""
+            SELECT id, name, belt, birthday, active
             FROM t_students
             WHERE birthday IS NOT NULL
               AND EXTRACT(MONTH FROM birthday) = EXTRACT(MONTH FROM CURRENT_DATE)
             ORDER BY EXTRACT(DAY FROM birthday), name
         """)
 
-        if not rows:
-            birthdays_tree.insert(
-                "",
-                tk.END,
-                values=(t("label.no_data"), "", ""),
-            )
-            count_var.set(t("label.results", count=0))
-            return
-
-        for name, belt, birthday, active in rows:
-            tag = "active" if active else "inactive"
-            birthdays_tree.insert(
-                "",
-                tk.END,
-                values=(name, belt, str(birthday)),
-                tags=(tag,)
-            )
+    # Reload the birthday list in the background.
+    def load_birthdays():
+        background.submit(fetch_birthdays, show_birthdays, key="news.birthdays", busy=busy)
 
+    # Fill the birthday list with fetched rows.
+    def show_birthdays(rows):
+        birthday_rows.sync(rows)
         count_var.set(t("label.results", count=len(rows)))
 
+    # Build Treeview values and tags for one birthday row.
+    def birthday_item(row):
+        _, name, belt, birthday, active = row
+        return (name, belt, str(birthday)), ("active" if active else "inactive",)
+
+    birthday_rows = KeyedTree(birthdays_tree, birthday_item, empty_item=((t("label.no_data"), "", ""), ()))
+
     ttk.Button(header, text=t("button.refresh"), command=load_birthdays).grid(
         row=0, column=2, sticky="e", padx=(10, 0)
     )
@@ -4,17 +4,45 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 
-from db import execute
+import background
+import lazy_imports
+import lookups
+from db import cancel_query, cancellable, execute, execute_iter
 from i18n import t
+from paging import KeysetPager, fetch_page, page_count, seek_where
+from ui.busy_indicator import BusyIndicator
+from ui.student_combobox import StudentCombobox
+from error_middleware import handle_db_error
 
 
-def build_student_filters(term, location_id, consent_value, status_value, is_minor_only, member_for_days):
+# Search-as-you-type waits for this pause (ms) before querying.
+SEARCH_DEBOUNCE_MS = 300
+# Recent search pages are served from the db result cache; writes to the students
+# or locations tables evict them.
+SEARCH_CACHE_TTL = 60
+
+
+# All contact fields the smart search looks at, as one string. Must match the
+# expression indexed by migrations/0006_student_search_trgm.sql.
+STUDENT_SEARCH_TEXT = (
+    "bjj_student_search_text(s.name, s.email, s.phone, s.phone2, "
+    "s.guardian_name, s.guardian_email, s.guardian_phone)"
+)
+
+
+def build_student_filters(term, location_id, consent_value, status_value, is_minor_only, member_for_days,
+                          student_id=None):
     term = (term or "").strip()
     params = []
     where_clauses = []
-    if term:
-        where_clauses.append("s.name ILIKE %s")
-        params.append(f"%{term}%")
+    if student_id is not None:
+        # A student picked from the suggestions: a primary key lookup instead of a text search.
+        where_clauses.append("s.id = %s")
+        params.append(student_id)
+    elif term:
+        # Substring match, or a close word match for typos; both use the trigram index.
+        where_clauses.append(f"({STUDENT_SEARCH_TEXT} ILIKE %s OR %s <%% {STUDENT_SEARCH_TEXT})")
+        params.extend([f"%{term}%", term])
 
     if consent_value is not None:
         where_clauses.append("s.newsletter_opt_in = %s")
@@ -46,6 +74,22 @@ def build_student_filters(term, location_id, consent_value, status_value, is_min
     return base_where + location_filter, params
 
 
+def build_student_ranking(term):
+    """
+    Return (join_sql, params, order_by) for ordering search results. With a term
+    the best matches come first (word-similarity distance over all search fields,
+    then name and id); without one results stay in name order.
+    """
+    term = (term or "").strip()
+    if not term:
+        return "", [], ("s.name", "s.id")
+    join_sql = (
+        "CROSS JOIN LATERAL (SELECT (1 - word_similarity(%s, "
+        f"{STUDENT_SEARCH_TEXT}))::double precision AS distance) m"
+    )
+    return join_sql, [term], ("m.distance", "s.name", "s.id")
+
+
 def build(tab_reports):
     #ttk.Label(tab_reports, text="REPORTS TAB OK", foreground="green").grid(
      #   row=0, column=0, columnspan=3, sticky="w", padx=10, pady=10
@@ -56,6 +100,8 @@ def build(tab_reports):
     tab_reports.grid_rowconfigure(1, weight=1)
     tab_reports.grid_columnconfigure(0, weight=1)
 
+    busy = BusyIndicator(tab_reports, row=0, column=0, sticky="w", padx=10, pady=(0, 5))
+
     report_frame.columnconfigure(0, weight=1)
     report_frame.rowconfigure(3, weight=1)
 
@@ -64,15 +110,23 @@ def build(tab_reports):
     no_location_label = t("label.no_location")
     location_var = tk.StringVar(value=all_locations_label)
     location_map = {all_locations_label: None, no_location_label: "NONE"}
-    current_page = {"value": 0}
     total_rows = {"value": 0}
     last_filter_data = {"value": None}
+    # Pending debounce timer and the cancel token of the page query in flight.
+    search_state = {"after_id": None, "token": None}
     PAGE_SIZE = 50
+    page_keys = KeysetPager(PAGE_SIZE)
 
     ttk.Label(report_frame, text=t("label.name")).grid(row=0, column=0, sticky="w")
     ttk.Label(report_frame, text=t("label.location")).grid(row=0, column=1, sticky="w", padx=(8, 0))
 
-    search_entry = ttk.Entry(report_frame, textvariable=search_var)
+    # Name suggestions come from the in-memory directory; picking one searches by id.
+    search_entry = StudentCombobox(
+        report_frame,
+        on_pick=lambda student_id: run_search(),
+        active_only=False,
+        textvariable=search_var,
+    )
     search_entry.grid(row=1, column=0, sticky="ew", padx=(0, 8))
 
     location_cb = ttk.Combobox(
@@ -176,10 +230,15 @@ def build(tab_reports):
         term = search_var.get().strip()
 
         location_key = location_var.get()
-        location_id = location_map.get(location_key)
+        if location_key in location_map:
+            location_id = location_map[location_key]
+        else:
+            location_id = lookups.get("locations_all").id(location_key)
         consent_value = consent_options.get(consent_var.get())
         status_value = status_options.get(status_var.get())
         membership_duration_days = membership_duration_options.get(membership_duration_var.get())
+        # Only a suggestion label names one student; a typed number may be a phone search.
+        picked_id = search_entry.selected_id() if term in tuple(search_entry.cget("values") or ()) else None
 
         where_sql, params = build_student_filters(
             term,
@@ -188,12 +247,14 @@ def build(tab_reports):
             status_value,
             is_minor_only_var.get(),
             membership_duration_days,
+            student_id=picked_id,
         )
 
         return term, (where_sql, params)
 
+    # Stream export rows through a server-side cursor so memory stays flat for any result size.
     def _export_query_rows(where_sql, params):
-        return execute(f"""
+        return execute_iter(f"""
             SELECT 'Student' AS type,
                    s.name AS student_name,
                    CASE
@@ -214,51 +275,8 @@ def build(tab_reports):
     def _project_root():
         return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-    def _export_csv(rows):
-        filename = f"reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        path = os.path.join(_project_root(), filename)
-        with open(path, "w", newline="", encoding="utf-8") as handle:
-            writer = csv.writer(handle)
-            writer.writerow([
-                t("label.type"),
-                t("label.name"),
-                t("label.contact_name"),
-                t("label.contact_email"),
-                t("label.contact_phone"),
-                t("label.location"),
-                t("label.newsletter"),
-                t("label.status"),
-            ])
-            for r in rows:
-                writer.writerow([
-                    r[0],
-                    r[1],
-                    r[2],
-                    r[3],
-                    r[4],
-                    r[5],
-                    t("label.yes") if r[6] else t("label.no"),
-                    t("label.active") if r[7] else t("label.inactive"),
-                ])
-        return path
-
-    def _export_pdf(rows):
-        try:
-            from reportlab.lib.pagesizes import letter
-            from reportlab.pdfgen import canvas
-        except Exception:
-            messagebox.showerror(t("label.export"), t("label.export_pdf_missing"))
-            return None
-        filename = f"reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        path = os.path.join(_project_root(), filename)
-        c = canvas.Canvas(path, pagesize=letter)
-        width, height = letter
-        y = height - 40
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(40, y, t("label.export_title"))
-        y -= 24
-        c.setFont("Helvetica", 9)
-        headers = [
+    def _export_headers():
+        return [
             t("label.type"),
             t("label.name"),
             t("label.contact_name"),
@@ -268,97 +286,201 @@ def build(tab_reports):
             t("label.newsletter"),
             t("label.status"),
         ]
-        c.drawString(40, y, " | ".join(headers))
+
+    def _export_values(r):
+        return [
+            r[0],
+            r[1],
+            r[2],
+            r[3],
+            r[4],
+            r[5],
+            t("label.yes") if r[6] else t("label.no"),
+            t("label.active") if r[7] else t("label.inactive"),
+        ]
+
+    # Export sinks are generators: prime with next(), send() each row, close() to finish the file.
+    def _csv_sink(path):
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(_export_headers())
+            while True:
+                writer.writerow(_export_values((yield)))
+
+    def _pdf_sink(path, letter, canvas):
+        c = canvas.Canvas(path, pagesize=letter)
+        width, height = letter
+        y = height - 40
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(40, y, t("label.export_title"))
+        y -= 24
+        c.setFont("Helvetica", 9)
+        c.drawString(40, y, " | ".join(_export_headers()))
         y -= 14
-        for r in rows:
-            line = " | ".join([
-                str(r[0]),
-                str(r[1]),
-                str(r[2]),
-                str(r[3]),
-                str(r[4]),
-                str(r[5]),
-                t("label.yes") if r[6] else t("label.no"),
-                t("label.active") if r[7] else t("label.inactive"),
-            ])
-            if y < 50:
-                c.showPage()
-                y = height - 40
-                c.setFont("Helvetica", 9)
-            c.drawString(40, y, line[:180])
-            y -= 12
-        c.save()
-        return path
-
-    def _export_xlsx(rows):
         try:
-            from openpyxl import Workbook
-        except Exception:
-            messagebox.showerror(t("label.export"), t("label.export_xlsx_missing"))
-            return None
-        filename = f"reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        path = os.path.join(_project_root(), filename)
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Reports"
-        ws.append([
-            t("label.type"),
-            t("label.name"),
-            t("label.contact_name"),
-            t("label.contact_email"),
-            t("label.contact_phone"),
-            t("label.location"),
-            t("label.newsletter"),
-            t("label.status"),
-        ])
-        for r in rows:
-            ws.append([
-                r[0],
-                r[1],
-                r[2],
-                r[3],
-                r[4],
-                r[5],
-                t("label.yes") if r[6] else t("label.no"),
-                t("label.active") if r[7] else t("label.inactive"),
-            ])
-        wb.save(path)
-        return path
+            while True:
+                line = " | ".join(str(value) for value in _export_values((yield)))
+                if y < 50:
+                    c.showPage()
+                    y = height - 40
+                    c.setFont("Helvetica", 9)
+                c.drawString(40, y, line[:180])
+                y -= 12
+        finally:
+            c.save()
+
+    def _xlsx_sink(path, Workbook):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Reports")
+        ws.append(_export_headers())
+        try:
+            while True:
+                ws.append(_export_values((yield)))
+        finally:
+            wb.save(path)
+
+    # Resolve the selected formats to (path, sink factory) on the Tk thread, before any
+    # query runs: missing optional packages are reported here, not mid-export.
+    def _export_targets():
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        def path_for(extension):
+            return os.path.join(_project_root(), f"reports_{stamp}.{extension}")
+
+        targets = []
+        if export_csv.get():
+            targets.append((path_for("csv"), _csv_sink))
+        if export_pdf.get():
+            try:
+                letter = lazy_imports.load("reportlab.lib.pagesizes").letter
+                canvas = lazy_imports.load("reportlab.pdfgen.canvas")
+            except Exception:
+                messagebox.showerror(t("label.export"), t("label.export_pdf_missing"))
+            else:
+                targets.append((path_for("pdf"), lambda path: _pdf_sink(path, letter, canvas)))
+        if export_xlsx.get():
+            try:
+                Workbook = lazy_imports.load("openpyxl").Workbook
+            except Exception:
+                messagebox.showerror(t("label.export"), t("label.export_xlsx_missing"))
+            else:
+                targets.append((path_for("xlsx"), lambda path: _xlsx_sink(path, Workbook)))
+        return targets
 
     def export_results():
         if last_filter_data["value"] is None:
             return
-        where_sql, params = last_filter_data["value"]
-        rows = _export_query_rows(where_sql, params)
-        if not rows:
-            messagebox.showinfo(t("label.export"), t("label.no_data"))
+        where_sql, params, _ = last_filter_data["value"]
+        targets = _export_targets()
+        if not targets:
             return
-        saved = []
-        if export_csv.get():
-            path = _export_csv(rows)
-            if path:
-                saved.append(path)
-        if export_pdf.get():
-            path = _export_pdf(rows)
-            if path:
-                saved.append(path)
-        if export_xlsx.get():
-            path = _export_xlsx(rows)
-            if path:
-                saved.append(path)
-        if saved:
-            messagebox.showinfo(t("label.export"), t("label.export_done", files="\n".join(saved)))
+        paths = [path for path, _ in targets]
+
+        # One pass over the server-side cursor on a worker, each row fanned out to every file.
+        def work():
+            sinks = []
+            count = 0
+            rows = _export_query_rows(where_sql, params)
+            try:
+                for path, make_sink in targets:
+                    sink = make_sink(path)
+                    next(sink)
+                    sinks.append(sink)
+                for r in rows:
+                    for sink in sinks:
+                        sink.send(r)
+                    count += 1
+            finally:
+                rows.close()
+                for sink in sinks:
+                    sink.close()
+            if not count:
+                for path in paths:
+                    if os.path.exists(path):
+                        os.remove(path)
+            return count
+
+        def done(count):
+            export_btn.config(state="normal")
+            if not count:
+                messagebox.showinfo(t("label.export"), t("label.no_data"))
+                return
+            messagebox.showinfo(t("label.export"), t("label.export_done", files="\n".join(paths)))
+
+        def failed(exc):
+            export_btn.config(state="normal")
+            handle_db_error(exc, "reports export")
+
+        export_btn.config(state="disabled")
+        background.submit(work, done, failed, busy=busy)
 
     export_btn.config(command=export_results)
 
     def _update_pager():
-        total = total_rows["value"]
-        pages = max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
-        page_label.config(text=t("label.page", page=current_page["value"] + 1, pages=pages))
-        btn_prev.config(state="normal" if current_page["value"] > 0 else "disabled")
-        btn_next.config(state="normal" if current_page["value"] + 1 < pages else "disabled")
+        pages = page_count(total_rows["value"], PAGE_SIZE)
+        page_label.config(text=t("label.page", page=page_keys.page + 1, pages=pages))
+        btn_prev.config(state="normal" if page_keys.page > 0 else "disabled")
+        btn_next.config(state="normal" if page_keys.page + 1 < pages else "disabled")
+
+    # Fetch report page `page` after the sort key `after_key`, with the total count.
+    def _fetch_page(search, after_key, page):
+        location_filter, params, (rank_join, rank_params, order_by) = search
+        distance = ", m.distance" if rank_join else ""
+        rows, total, _ = fetch_page(
+            f"""
+            'Student' AS type,
+            s.name AS student_name,
+            CASE
+                WHEN s.is_minor THEN COALESCE(NULLIF(s.guardian_name, ''), s.name)
+                ELSE s.name
+            END AS contact_name,
+            CASE WHEN s.is_minor THEN s.guardian_email ELSE s.email END AS contact_email,
+            CASE WHEN s.is_minor THEN s.guardian_phone ELSE s.phone END AS contact_phone,
+            l.name AS location,
+            s.newsletter_opt_in,
+            s.is_minor,
+            s.active,
+            s.id{distance}
+            """,
+            f"t_students s LEFT JOIN t_locations l ON s.location_id = l.id {rank_join}",
+            location_filter,
+            rank_params + params,
+            order_by,
+            after_key,
+            page * PAGE_SIZE,
+            PAGE_SIZE,
+            count_from=f"t_students s {rank_join}",
+            cache_ttl=SEARCH_CACHE_TTL,
+        )
+        return rows, total
+
+    # Find the page boundary `skip` rows past `after_key`; None when past the end.
+    def _find_boundary(search, after_key, skip):
+        location_filter, params, (rank_join, rank_params, order_by) = search
+        where_sql, seek_params = seek_where(location_filter, order_by, after_key)
+        rows = execute(f"""
+            SELECT {", ".join(order_by)}
+            FROM t_students s {rank_join}
+            {where_sql}
+            ORDER BY {", ".join(order_by)}
+            OFFSET %s LIMIT 1
+        """, tuple(rank_params + params + seek_params + [skip - 1]))
+        return tuple(rows[0]) if rows else None
+
+    # Sort key of a result row: (distance, name, id) for ranked searches, else (name, id).
+    def _row_key(row):
+        return (row[10], row[1], row[9]) if len(row) > 10 else (row[1], row[9])
+
+    # Remember the boundary a fetched page starts at and the one after it.
+    def _record_page(page, key, rows):
+        if rows:
+            page_keys.remember(page, key)
+            page_keys.record_page(page, rows, _row_key)
 
     def run_search():
+        if search_state["after_id"] is not None:
+            tab_reports.after_cancel(search_state["after_id"])
+            search_state["after_id"] = None
         term, filter_data = _build_filters()
         if filter_data is None:
             return
@@ -366,46 +488,44 @@ def build(tab_reports):
             results_tree.delete(*results_tree.get_children())
             results_btn.config(text=t("label.results", count=0))
             last_query_lbl.config(text=t("label.last_query", time="--"))
-        location_filter, params = filter_data
-        last_filter_data["value"] = (location_filter, params)
-        current_page["value"] = 0
-
-        count = execute(f"""
-            SELECT COUNT(*)
-            FROM t_students s
-            {location_filter}
-        """, tuple(params))
-        total_rows["value"] = count[0][0] if count else 0
-        export_btn.config(state="normal" if total_rows["value"] > 0 else "disabled")
+        last_filter_data["value"] = filter_data + (build_student_ranking(term),)
+        page_keys.reset()
         _load_page()
 
+    # Page through the last search; rows and total come back in one statement.
     def _load_page():
-        term, filter_data = _build_filters()
-        if filter_data is None:
+        if last_filter_data["value"] is None:
             return
-        location_filter, params = filter_data
-        offset = current_page["value"] * PAGE_SIZE
-
-        rows = execute(f"""
-            SELECT 'Student' AS type,
-                   s.name AS student_name,
-                   CASE
-                       WHEN s.is_minor THEN COALESCE(NULLIF(s.guardian_name, ''), s.name)
-                       ELSE s.name
-                   END AS contact_name,
-                   CASE WHEN s.is_minor THEN s.guardian_email ELSE s.email END AS contact_email,
-                   CASE WHEN s.is_minor THEN s.guardian_phone ELSE s.phone END AS contact_phone,
-                   l.name AS location,
-                   s.newsletter_opt_in,
-                   s.is_minor,
-                   s.active
-            FROM t_students s
-            LEFT JOIN t_locations l ON s.location_id = l.id
-            {location_filter}
-            ORDER BY s.name
-            LIMIT %s OFFSET %s
-        """, tuple(params + [PAGE_SIZE, offset]))
-
+        search = last_filter_data["value"]
+        page = page_keys.page
+        known_page, after_key = page_keys.nearest(page)
+        previous_total = total_rows["value"]
+
+        # A newer request supersedes the one in flight: its result would be
+        # dropped anyway, so stop it on the server too.
+        previous_token = search_state["token"]
+        if previous_token is not None:
+            background.submit(lambda: cancel_query(previous_token))
+        token = search_state["token"] = object()
+
+        def fetch():
+            with cancellable(token):
+                key = after_key
+                if known_page < page:
+                    key = _find_boundary(search, key, (page - known_page) * PAGE_SIZE)
+                    if key is None:
+                        return key, [], previous_total
+                return (key,) + _fetch_page(search, key, page)
+
+        def show(result):
+            key, rows, total_rows["value"] = result
+            _record_page(page, key, rows)
+            export_btn.config(state="normal" if total_rows["value"] > 0 else "disabled")
+            _show_page(rows)
+
+        background.submit(fetch, show, key="reports.page", busy=busy)
+
+    def _show_page(rows):
         results_tree.delete(*results_tree.get_children())
         if not rows:
             results_tree.insert("", tk.END, values=(t("label.no_data"), "", "", "", "", "", "", "", ""))
@@ -475,26 +595,37 @@ def build(tab_reports):
     page_label.grid(row=0, column=1, padx=10)
     btn_next.grid(row=0, column=2, padx=5)
 
+    jump_page_var = tk.StringVar()
+    jump_entry = ttk.Entry(pager, textvariable=jump_page_var, width=5)
+    jump_entry.grid(row=0, column=3, padx=(15, 5))
+    jump_entry.bind("<Return>", lambda event: _jump_to_page())
+    ttk.Button(pager, text=t("button.go_to_page"), command=lambda: _jump_to_page()).grid(row=0, column=4, padx=5)
+
     def _change_page(delta):
-        current_page["value"] = max(0, current_page["value"] + delta)
+        page_keys.page = max(0, page_keys.page + delta)
+        _load_page()
+
+    def _jump_to_page():
+        try:
+            target = int(jump_page_var.get())
+        except ValueError:
+            return
+        page_keys.page = min(max(target, 1), page_count(total_rows["value"], PAGE_SIZE)) - 1
         _load_page()
 
     def refresh_locations():
-        rows = execute("""
-            SELECT id, name
-            FROM t_locations
-            ORDER BY name
-        """)
-        options = [all_locations_label, no_location_label]
-        for loc_id, name in rows:
-            label = f"{name} (#{loc_id})"
-            location_map[label] = loc_id
-            options.append(label)
-        location_cb["values"] = options
+        location_cb["values"] = [all_locations_label, no_location_label] + lookups.load("locations_all").labels
 
     refresh_locations()
     location_cb.bind("<Button-1>", lambda event: refresh_locations())
 
+    # Search as the user types, once typing pauses.
+    def schedule_search(*args):
+        if search_state["after_id"] is not None:
+            tab_reports.after_cancel(search_state["after_id"])
+        search_state["after_id"] = tab_reports.after(SEARCH_DEBOUNCE_MS, run_search)
+
+    search_var.trace_add("write", schedule_search)
     search_entry.bind("<Return>", lambda event: run_search())
 
     return {}
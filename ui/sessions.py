@@ -1,39 +1,52 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import date
+from datetime import date, time, timedelta
 
-from tkcalendar import DateEntry
-
-from db import execute
+import background
+import lazy_imports
+import lookups
+from db import execute, insert_values
 from i18n import t
+from ui.busy_indicator import BusyIndicator
+from ui.tree_rows import KeyedTree
+from ui.virtual_tree import QuerySource, VirtualTreeview
 from validation_middleware import ValidationError, validate_required
 from error_middleware import handle_db_error, log_validation_error
 
 
-def _ensure_session_location_schema():
-    execute("""
-        ALTER TABLE t_class_sessions
-        ADD COLUMN IF NOT EXISTS location_id integer
-    """)
+# The sessions list shows this week plus/minus this many weeks by default.
+SESSION_WINDOW_WEEKS = 2
+# Sort/seek key of the sessions list: a session without a start time sorts as 00:00
+# (a NULL would never satisfy the row comparison of the keyset seek). Must match the
+# expression indexed by migrations/0009_class_sessions_start_key_index.sql.
+SESSION_START_KEY = "COALESCE(cs.start_time, TIME '00:00')"
+
+
+def session_window(anchor, weeks):
+    """(first, last) date of the window: `weeks` weeks either side of the week containing `anchor`."""
+    monday = anchor - timedelta(days=anchor.weekday())
+    return monday - timedelta(weeks=weeks), monday + timedelta(weeks=weeks, days=6)
+
 
-    execute("""
-        DO $$
-        BEGIN
-            ALTER TABLE t_class_sessions
-            ADD CONSTRAINT fk_sessions_location
-            FOREIGN KEY (location_id)
-            REFERENCES t_locations(id);
-        EXCEPTION
-            WHEN duplicate_object THEN NULL;
-        END $$;
-    """)
+def build_session_filters(first, last, location_id=None, class_id=None, cancelled=None):
+    where_clauses = ["cs.session_date BETWEEN %s AND %s"]
+    params = [first, last]
+    if location_id is not None:
+        where_clauses.append("cs.location_id = %s")
+        params.append(location_id)
+    if class_id is not None:
+        where_clauses.append("cs.class_id = %s")
+        params.append(class_id)
+    if cancelled is not None:
+        where_clauses.append("cs.cancelled = %s")
+        params.append(cancelled)
+    return "WHERE " + " AND ".join(where_clauses), params
 
 
 def build(tab_sessions):
    # ttk.Label(tab_sessions, text="SESSIONS TAB OK", foreground="green").grid(
     #    row=0, column=0, columnspan=3, sticky="w", padx=10, pady=10
     #)
-    _ensure_session_location_schema()
     sessions_form_frame = ttk.LabelFrame(tab_sessions, text=t("label.sessions"), padding=10)
     sessions_form_frame.grid(row=1, column=1, sticky="ne", padx=10, pady=5)
 
@@ -51,6 +64,8 @@ def build(tab_sessions):
     tab_sessions.grid_columnconfigure(0, weight=1)
     tab_sessions.grid_columnconfigure(1, weight=1)
 
+    busy = BusyIndicator(tab_sessions, row=0, column=0, sticky="w", padx=10, pady=(0, 5))
+
     # ---------- Class Variables ----------
     class_name = tk.StringVar()
     class_belt = tk.StringVar()
@@ -60,16 +75,12 @@ def build(tab_sessions):
     selected_class_id = None
     selected_class_active = None
 
-    coach_option_map = {}
-    class_option_map = {}
-
     # ---------- Session Variables ----------
     session_class = tk.StringVar()
     session_start = tk.StringVar()
     session_end = tk.StringVar()
     session_location = tk.StringVar()
-
-    location_option_map = {}
+    session_repeat_weeks = tk.StringVar(value="1")
 
     selected_session_id = None
     selected_session_cancelled = None
@@ -149,7 +160,7 @@ def build(tab_sessions):
     session_class_cb.grid(row=0, column=1)
 
     ttk.Label(sessions_form_frame, text=t("label.date")).grid(row=1, column=0, sticky="w")
-    session_date = DateEntry(sessions_form_frame, date_pattern="yyyy-mm-dd", width=22)
+    session_date = lazy_imports.load("tkcalendar").DateEntry(sessions_form_frame, date_pattern="yyyy-mm-dd", width=22)
     session_date.grid(row=1, column=1)
 
     ttk.Label(sessions_form_frame, text=t("label.start_time")).grid(row=2, column=0, sticky="w")
@@ -167,8 +178,17 @@ def build(tab_sessions):
     )
     session_location_cb.grid(row=4, column=1)
 
+    ttk.Label(sessions_form_frame, text=t("label.repeat_weeks")).grid(row=5, column=0, sticky="w")
+    ttk.Spinbox(
+        sessions_form_frame,
+        textvariable=session_repeat_weeks,
+        from_=1,
+        to=52,
+        width=23
+    ).grid(row=5, column=1)
+
     session_btns = ttk.Frame(sessions_form_frame)
-    session_btns.grid(row=5, column=0, columnspan=2, pady=10)
+    session_btns.grid(row=6, column=0, columnspan=2, pady=10)
 
     btn_session_add = ttk.Button(session_btns, text=t("button.add"))
     btn_session_update = ttk.Button(session_btns, text=t("button.update"))
@@ -185,9 +205,52 @@ def build(tab_sessions):
     btn_session_cancel.config(state="disabled")
     btn_session_restore.config(state="disabled")
 
+    # ---------- Sessions Filters ----------
+    all_locations_label = t("label.all_locations")
+    all_classes_label = t("label.all_classes")
+    status_options = {
+        t("label.all"): None,
+        t("label.scheduled"): False,
+        t("label.cancelled"): True,
+    }
+    window_anchor = {"date": date.today()}
+    window_weeks = tk.StringVar(value=str(SESSION_WINDOW_WEEKS))
+    filter_location = tk.StringVar(value=all_locations_label)
+    filter_class = tk.StringVar(value=all_classes_label)
+    filter_status = tk.StringVar(value=t("label.all"))
+
+    sessions_filter_bar = ttk.Frame(sessions_list_frame)
+    sessions_filter_bar.pack(side=tk.TOP, fill=tk.X, pady=(0, 6))
+
+    ttk.Button(sessions_filter_bar, text=t("button.prev"), command=lambda: shift_window(-1)).grid(row=0, column=0, padx=2)
+    ttk.Button(sessions_filter_bar, text=t("button.today"), command=lambda: shift_window(0)).grid(row=0, column=1, padx=2)
+    ttk.Button(sessions_filter_bar, text=t("button.next"), command=lambda: shift_window(1)).grid(row=0, column=2, padx=2)
+    window_lbl = ttk.Label(sessions_filter_bar, text="")
+    window_lbl.grid(row=0, column=3, padx=(8, 12))
+
+    ttk.Label(sessions_filter_bar, text=t("label.weeks_around")).grid(row=0, column=4, sticky="w")
+    weeks_spin = ttk.Spinbox(
+        sessions_filter_bar, from_=0, to=52, width=4, textvariable=window_weeks, command=lambda: load_sessions()
+    )
+    weeks_spin.grid(row=0, column=5, padx=(4, 12))
+    weeks_spin.bind("<Return>", lambda event: load_sessions())
+
+    filter_location_cb = ttk.Combobox(sessions_filter_bar, textvariable=filter_location, state="readonly", width=22)
+    filter_location_cb.grid(row=0, column=6, padx=4)
+    filter_class_cb = ttk.Combobox(sessions_filter_bar, textvariable=filter_class, state="readonly", width=22)
+    filter_class_cb.grid(row=0, column=7, padx=4)
+    filter_status_cb = ttk.Combobox(
+        sessions_filter_bar, textvariable=filter_status, values=list(status_options), state="readonly", width=12
+    )
+    filter_status_cb.grid(row=0, column=8, padx=4)
+
     # ---------- Sessions Tree ----------
-    sessions_tree = ttk.Treeview(
+    # Only the sessions in view are materialized; rows load in blocks on scroll.
+    sessions_tree = VirtualTreeview(
         sessions_list_frame,
+        make_item=lambda r: session_item(r),
+        busy=busy,
+        empty_item=(("", t("label.no_data"), "", "", "", "", ""), ("cancelled",)),
         columns=("id", "class", "date", "start", "end", "location", "status"),
         show="headings"
     )
@@ -205,63 +268,27 @@ def build(tab_sessions):
 
     sessions_tree.tag_configure("scheduled", foreground="green")
     sessions_tree.tag_configure("cancelled", foreground="red")
+
+    sessions_scroll = ttk.Scrollbar(sessions_list_frame, orient="vertical", command=sessions_tree.yview)
+    sessions_tree.configure(yscrollcommand=sessions_scroll.set)
+    sessions_scroll.pack(side=tk.RIGHT, fill=tk.Y)
     sessions_tree.pack(fill=tk.BOTH, expand=True)
 
     # ---------- Helpers ----------
     # Populate the coach combobox with active coaches from the database.
     def refresh_coach_options(show_empty_message=False):
-        nonlocal coach_option_map
-        rows = execute("""
-            SELECT id, name
-            FROM public.t_coaches
-            WHERE active = true
-            ORDER BY name
-        """)
-        options = []
-        option_map = {}
-        for coach_id, name in rows:
-            label = f"{name} (#{coach_id})"
-            options.append(label)
-            option_map[label] = coach_id
-        coach_option_map = option_map
+        options = lookups.load("coaches").labels
         coach_cb["values"] = options
         if show_empty_message and not options:
             messagebox.showinfo("No coaches", "No active coaches found. Please add a coach first.")
 
     # Populate the class combobox with active classes from the database.
     def refresh_class_options():
-        nonlocal class_option_map
-        rows = execute("""
-            SELECT id, name
-            FROM t_classes
-            WHERE active = true
-            ORDER BY name
-        """)
-        options = []
-        option_map = {}
-        for class_id, name in rows:
-            label = f"{name} (#{class_id})"
-            options.append(label)
-            option_map[label] = class_id
-        class_option_map = option_map
-        session_class_cb["values"] = options
+        session_class_cb["values"] = lookups.load("classes").labels
 
     # Populate the location combobox with active locations from the database.
     def refresh_location_options(show_empty_message=False):
-        nonlocal location_option_map
-        rows = execute("""
-            SELECT id, name
-            FROM t_locations
-            WHERE active = true
-            ORDER BY name
-        """)
-        options = []
-        option_map = {}
-        for loc_id, name in rows:
-            label = f"{name} (#{loc_id})"
-            options.append(label)
-            option_map[label] = loc_id
-        location_option_map = option_map
+        options = lookups.load("locations").labels
         session_location_cb["values"] = options
         if show_empty_message and not options:
             messagebox.showinfo("No locations", "No active locations found. Please add a location first.")
@@ -291,58 +318,123 @@ def build(tab_sessions):
             btn_session_restore.config(state="disabled")
 
     # ---------- Loaders ----------
-    # Load classes from the database into the classes tree and refresh options.
-    def load_classes():
-        classes_tree.delete(*classes_tree.get_children())
-        rows = execute("""
-            SELECT c.id, c.name, c.belt_level, c.duration_min, c.active, t.name
+    # Build Treeview values and tags for one class row.
+    def class_item(r):
+        status = t("label.active") if r[4] else t("label.inactive")
+        tag = "active" if r[4] else "inactive"
+        return (r[0], r[1], r[2], r[5], r[3], status), (tag,)
+
+    class_rows = KeyedTree(classes_tree, class_item, empty_item=(("", t("label.no_data"), "", "", "", ""), ("inactive",)))
+
+    # Build Treeview values and tags for one session row.
+    def session_item(r):
+        status = t("label.cancelled") if r[6] else t("label.scheduled")
+        tag = "cancelled" if r[6] else "scheduled"
+        return (r[0], r[1], r[2], r[3], r[4], r[5] or "", status), (tag,)
+
+    # Fetch classes with their coach name; all of them when ids is None.
+    def fetch_classes(ids=None):
+        if ids is None:
+            return execute("""
+                SELECT c.id, c.name, c.belt_level, c.duration_min, c.active, t.name, c.coach_id
+                FROM t_classes c
+                JOIN public.t_coaches t ON c.coach_id = t.id
+                ORDER BY c.name
+            """)
+        return execute("""
+            SELECT c.id, c.name, c.belt_level, c.duration_min, c.active, t.name, c.coach_id
             FROM t_classes c
             JOIN public.t_coaches t ON c.coach_id = t.id
-            ORDER BY c.name
-        """)
-        if not rows:
-            classes_tree.insert(
-                "", tk.END,
-                values=("", t("label.no_data"), "", "", "", ""),
-                tags=("inactive",)
-            )
-            refresh_class_options()
-            return
-        for r in rows:
-            status = t("label.active") if r[4] else t("label.inactive")
-            tag = "active" if r[4] else "inactive"
-            classes_tree.insert(
-                "", tk.END,
-                values=(r[0], r[1], r[2], r[5], r[3], status),
-                tags=(tag,)
-            )
+            WHERE c.id = ANY(%s)
+        """, (list(ids),))
+
+    # Load classes in the background into the classes tree and refresh options.
+    def load_classes():
+        background.submit(fetch_classes, show_classes, key="sessions.classes", busy=busy)
+
+    # Fill the classes tree with fetched rows.
+    def show_classes(rows):
+        class_rows.sync(rows)
+        sync_class_selection()
         refresh_class_options()
 
-    # Load class sessions from the database into the sessions tree.
+    # Keep the selected class state in step with the rows on screen after a reload.
+    def sync_class_selection():
+        nonlocal selected_class_id, selected_class_active
+        if selected_class_id and classes_tree.exists(str(selected_class_id)):
+            selected_class_active = "active" in classes_tree.item(str(selected_class_id), "tags")
+        else:
+            selected_class_id = None
+            selected_class_active = None
+        update_class_button_states()
+
+    # Fill the filter comboboxes; inactive locations and classes still have sessions.
+    def refresh_session_filter_options():
+        filter_location_cb["values"] = [all_locations_label] + lookups.load("locations_all").labels
+        filter_class_cb["values"] = [all_classes_label] + lookups.load("classes_all").labels
+
+    # Move the date window by whole windows (0 = back to this week).
+    def shift_window(direction):
+        if direction == 0:
+            window_anchor["date"] = date.today()
+        else:
+            weeks = current_window_weeks()
+            window_anchor["date"] += timedelta(weeks=direction * (2 * weeks + 1))
+        load_sessions()
+
+    def current_window_weeks():
+        try:
+            return min(max(int(window_weeks.get()), 0), 52)
+        except ValueError:
+            return SESSION_WINDOW_WEEKS
+
+    # Point the sessions list at the sessions in the date window that match the filters, newest first.
     def load_sessions():
-        sessions_tree.delete(*sessions_tree.get_children())
-        rows = execute("""
-            SELECT cs.id, c.name, cs.session_date, cs.start_time, cs.end_time, l.name, cs.cancelled
-            FROM t_class_sessions cs
+        first, last = session_window(window_anchor["date"], current_window_weeks())
+        window_lbl.config(text=t("label.date_window", first=first.isoformat(), last=last.isoformat()))
+        where, params = build_session_filters(
+            first,
+            last,
+            lookups.get("locations_all").id(filter_location.get()),
+            lookups.get("classes_all").id(filter_class.get()),
+            status_options.get(filter_status.get()),
+        )
+        sessions_tree.set_source(QuerySource(
+            "cs.id, c.name, cs.session_date, cs.start_time, cs.end_time, l.name, cs.cancelled, cs.class_id, cs.location_id",
+            """t_class_sessions cs
             JOIN t_classes c ON cs.class_id = c.id
-            LEFT JOIN t_locations l ON cs.location_id = l.id
-            ORDER BY cs.session_date DESC, cs.start_time DESC
-        """)
-        if not rows:
-            sessions_tree.insert(
-                "", tk.END,
-                values=("", t("label.no_data"), "", "", "", "", ""),
-                tags=("cancelled",)
-            )
+            LEFT JOIN t_locations l ON cs.location_id = l.id""",
+            where,
+            params,
+            ("cs.session_date", SESSION_START_KEY, "cs.id"),
+            key_of=lambda r: (r[2], r[3] or time.min, r[0]),
+            descending=True,
+            count_from="t_class_sessions cs",
+        ))
+
+    # Apply changes made by other clients to the shown class rows.
+    def refresh_class_rows(ids=None):
+        if ids is None:
+            load_classes()
             return
-        for r in rows:
-            status = t("label.cancelled") if r[6] else t("label.scheduled")
-            tag = "cancelled" if r[6] else "scheduled"
-            sessions_tree.insert(
-                "", tk.END,
-                values=(r[0], r[1], r[2], r[3], r[4], r[5] or "", status),
-                tags=(tag,)
+
+        def apply(rows):
+            # A renamed or new class changes the sort order; reload in that case.
+            renamed = any(
+                classes_tree.exists(str(r[0])) and classes_tree.set(str(r[0]), "name") != r[1]
+                for r in rows
             )
+            if class_rows.patch(ids, rows) or renamed:
+                load_classes()
+            else:
+                sync_class_selection()
+                refresh_class_options()
+
+        background.submit(lambda: fetch_classes(ids), apply, busy=busy)
+
+    # Apply changes made by other clients: re-read the count and the rows in view.
+    def refresh_session_rows(ids=None):
+        sessions_tree.refresh()
 
     # ---------- Actions ----------
     # Reset class form fields and selection state.
@@ -370,7 +462,7 @@ def build(tab_sessions):
             except ValueError:
                 raise ValidationError("Duration must be a positive number")
 
-            coach_id = coach_option_map.get(class_coach.get())
+            coach_id = lookups.get("coaches").id(class_coach.get())
             if not coach_id:
                 raise ValidationError("Select a valid coach")
 
@@ -393,7 +485,7 @@ def build(tab_sessions):
         except Exception as e:
             handle_db_error(e, "register_class")
 
-    # Validate and update the selected class, then reload the list.
+    # Validate and update the selected class, then refresh its row.
     def update_class():
         nonlocal selected_class_id
         try:
@@ -411,7 +503,7 @@ def build(tab_sessions):
             except ValueError:
                 raise ValidationError("Duration must be a positive number")
 
-            coach_id = coach_option_map.get(class_coach.get())
+            coach_id = lookups.get("coaches").id(class_coach.get())
             if not coach_id:
                 raise ValidationError("Select a valid coach")
 
@@ -427,7 +519,7 @@ def build(tab_sessions):
                 selected_class_id
             ))
 
-            load_classes()
+            refresh_class_rows([selected_class_id])
             messagebox.showinfo("OK", "Class updated")
 
         except ValidationError as ve:
@@ -445,7 +537,7 @@ def build(tab_sessions):
         execute("""
             UPDATE t_classes SET active=false WHERE id=%s
         """, (selected_class_id,))
-        load_classes()
+        refresh_class_rows([selected_class_id])
 
     # Mark the selected class active after confirmation.
     def reactivate_class():
@@ -456,7 +548,7 @@ def build(tab_sessions):
         execute("""
             UPDATE t_classes SET active=true WHERE id=%s
         """, (selected_class_id,))
-        load_classes()
+        refresh_class_rows([selected_class_id])
 
     # Populate class form fields when a class row is selected.
     def on_class_select(event):
@@ -472,13 +564,8 @@ def build(tab_sessions):
         class_name.set(v[1])
         class_belt.set(v[2])
         class_duration.set(v[4])
-
-        coach_label = ""
-        for label, coach_id in coach_option_map.items():
-            if v[3] and label.startswith(f"{v[3]} ("):
-                coach_label = label
-                break
-        class_coach.set(coach_label)
+        row = class_rows.row(sel[0])
+        class_coach.set(lookups.get("coaches").label(row[6]) if row else "")
 
         update_class_button_states()
 
@@ -492,9 +579,10 @@ def build(tab_sessions):
         session_start.set("")
         session_end.set("")
         session_location.set("")
+        session_repeat_weeks.set("1")
         update_session_button_states()
 
-    # Validate and insert a new class session, then reload the list.
+    # Validate and insert a new class session (optionally repeated weekly), then reload the list.
     def register_session():
         try:
             validate_required(session_class.get(), "Class")
@@ -502,27 +590,39 @@ def build(tab_sessions):
             validate_required(session_end.get(), "End time")
             validate_required(session_location.get(), "Location")
 
-            class_id = class_option_map.get(session_class.get())
+            class_id = lookups.get("classes").id(session_class.get())
             if not class_id:
                 raise ValidationError("Select a valid class")
 
-            location_id = location_option_map.get(session_location.get())
+            location_id = lookups.get("locations").id(session_location.get())
             if not location_id:
                 raise ValidationError("Select a valid location")
 
-            execute("""
-                INSERT INTO t_class_sessions (class_id, session_date, start_time, end_time, location_id)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                class_id,
-                session_date.get_date(),
-                session_start.get().strip(),
-                session_end.get().strip(),
-                location_id
-            ))
+            try:
+                weeks = int(session_repeat_weeks.get() or 1)
+                if weeks < 1 or weeks > 52:
+                    raise ValueError()
+            except ValueError:
+                raise ValidationError("Repeat weeks must be between 1 and 52")
+
+            first_date = session_date.get_date()
+            insert_values(
+                "t_class_sessions",
+                ("class_id", "session_date", "start_time", "end_time", "location_id"),
+                [
+                    (
+                        class_id,
+                        first_date + timedelta(weeks=week),
+                        session_start.get().strip(),
+                        session_end.get().strip(),
+                        location_id
+                    )
+                    for week in range(weeks)
+                ],
+            )
 
             load_sessions()
-            messagebox.showinfo("OK", "Session created")
+            messagebox.showinfo("OK", "Session created" if weeks == 1 else f"{weeks} sessions created")
 
         except ValidationError as ve:
             log_validation_error(ve, "register_session")
@@ -542,11 +642,11 @@ def build(tab_sessions):
             validate_required(session_end.get(), "End time")
             validate_required(session_location.get(), "Location")
 
-            class_id = class_option_map.get(session_class.get())
+            class_id = lookups.get("classes").id(session_class.get())
             if not class_id:
                 raise ValidationError("Select a valid class")
 
-            location_id = location_option_map.get(session_location.get())
+            location_id = lookups.get("locations").id(session_location.get())
             if not location_id:
                 raise ValidationError("Select a valid location")
 
@@ -597,31 +697,19 @@ def build(tab_sessions):
     # Populate session form fields when a session row is selected.
     def on_session_select(event):
         nonlocal selected_session_id, selected_session_cancelled
-        sel = sessions_tree.selection()
-        if not sel:
+        # Nothing selected, or a row still being loaded ("…").
+        row = sessions_tree.selected_row()
+        if row is None:
             return
-        item = sessions_tree.item(sel[0])
-        v = item["values"]
-        selected_session_id = v[0]
-        selected_session_cancelled = ("cancelled" in item.get("tags", ()))
-
-        session_class_label = ""
-        for label, class_id in class_option_map.items():
-            if v[1] and label.startswith(f"{v[1]} ("):
-                session_class_label = label
-                break
-        session_class.set(session_class_label)
-        if v[2]:
-            session_date.set_date(v[2])
-        session_start.set(v[3] or "")
-        session_end.set(v[4] or "")
-        refresh_location_options()
-        location_label = ""
-        for label, loc_id in location_option_map.items():
-            if v[5] and label.startswith(f"{v[5]} ("):
-                location_label = label
-                break
-        session_location.set(location_label)
+        selected_session_id = row[0]
+        selected_session_cancelled = bool(row[6])
+
+        session_class.set(lookups.get("classes").label(row[7]))
+        if row[2]:
+            session_date.set_date(row[2])
+        session_start.set(row[3] or "")
+        session_end.set(row[4] or "")
+        session_location.set(lookups.get("locations").label(row[8]))
 
         update_session_button_states()
 
@@ -645,7 +733,13 @@ def build(tab_sessions):
     classes_tree.bind("<<TreeviewSelect>>", on_class_select)
     sessions_tree.bind("<<TreeviewSelect>>", on_session_select)
 
+    filter_location_cb.bind("<Button-1>", lambda event: refresh_session_filter_options())
+    filter_class_cb.bind("<Button-1>", lambda event: refresh_session_filter_options())
+    for filter_cb in (filter_location_cb, filter_class_cb, filter_status_cb):
+        filter_cb.bind("<<ComboboxSelected>>", lambda event: load_sessions())
+
     refresh_location_options()
+    refresh_session_filter_options()
 
     return {
         "load_classes": load_classes,
@@ -653,4 +747,6 @@ def build(tab_sessions):
         "refresh_coach_options": refresh_coach_options,
         "refresh_class_options": refresh_class_options,
         "refresh_location_options": refresh_location_options,
+        "refresh_class_rows": refresh_class_rows,
+        "refresh_session_rows": refresh_session_rows,
     }
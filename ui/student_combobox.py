@@ -0,0 +1,40 @@
+from tkinter import ttk
+
+import student_directory
+
+
+# Keys that move around the field or the list instead of changing the text.
+_NAVIGATION_KEYS = {
+    "Up", "Down", "Left", "Right", "Home", "End", "Prior", "Next", "Return", "KP_Enter",
+    "Escape", "Tab", "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R",
+}
+
+
+class StudentCombobox(ttk.Combobox):
+    """
+    Editable combobox that suggests "name (#id)" labels from the in-memory
+    student directory while typing, so no query runs per keystroke. Down opens
+    the suggestions; on_pick(student_id) is called when one is chosen.
+    selected_id() also accepts a typed member number.
+    """
+
+    def __init__(self, parent, on_pick=None, active_only=True, limit=20, **kw):
+        super().__init__(parent, **kw)
+        self._on_pick = on_pick
+        self._active_only = active_only
+        self._limit = limit
+        self.bind("<KeyRelease>", self._suggest, add="+")
+        self.bind("<<ComboboxSelected>>", self._picked, add="+")
+
+    def selected_id(self):
+        return student_directory.id_from_label(self.get())
+
+    def _suggest(self, event):
+        if event.keysym in _NAVIGATION_KEYS:
+            return
+        self["values"] = student_directory.labels(self.get(), self._limit, self._active_only)
+
+    def _picked(self, event):
+        student_id = self.selected_id()
+        if student_id is not None and self._on_pick is not None:
+            self._on_pick(student_id)
@@ -1,14 +1,17 @@
-﻿import tkinter as tk
+﻿import math
+import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import date
 
-import matplotlib
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from tkcalendar import DateEntry
-
+import background
+import lazy_imports
+import lookups
 from db import execute
 from i18n import t
+from paging import COUNT_CACHE_TTL, KeysetPager, fetch_page, page_count, seek_where
+from ui.busy_indicator import BusyIndicator
+from ui.student_combobox import StudentCombobox
+from ui.tree_rows import KeyedTree
 from validation_middleware import (
     ValidationError,
     validate_required,
@@ -22,7 +25,21 @@ from error_middleware import handle_db_error, log_validation_error
 
 PAGE_SIZE_STUDENTS = 100
 
-matplotlib.use("TkAgg")
+_STUDENT_LIST_COLUMNS = """
+    s.id, s.name, s.sex, s.direction, s.postalcode, s.belt, s.email, s.phone, s.phone2,
+    s.weight, s.country, s.taxid, l.name AS location, s.birthday, s.active, s.is_minor, s.newsletter_opt_in,
+    s.guardian_name, s.guardian_email, s.guardian_phone, s.guardian_phone2, s.guardian_relationship,
+    s.location_id
+"""
+_STUDENT_LIST_FROM = "t_students s LEFT JOIN t_locations l ON s.location_id = l.id"
+
+def _chart_backend():
+    """Load matplotlib with the Tk backend on first use; returns (Figure, FigureCanvasTkAgg)."""
+    matplotlib = lazy_imports.load("matplotlib")
+    matplotlib.use("TkAgg")
+    figure = lazy_imports.load("matplotlib.figure")
+    backend = lazy_imports.load("matplotlib.backends.backend_tkagg")
+    return figure.Figure, backend.FigureCanvasTkAgg
 
 
 def default_newsletter_opt_in():
@@ -56,28 +73,15 @@ def build(tab_students):
      #   row=0, column=0, columnspan=3, sticky="w", padx=10, pady=10
     #)
 
-    execute("""
-        ALTER TABLE t_students
-        ADD COLUMN IF NOT EXISTS newsletter_opt_in boolean NOT NULL DEFAULT true
-    """)
-    execute("""
-        ALTER TABLE t_students
-        ADD COLUMN IF NOT EXISTS is_minor boolean NOT NULL DEFAULT false
-    """)
-    execute("""
-        ALTER TABLE t_students
-        ADD COLUMN IF NOT EXISTS guardian_name varchar(120),
-        ADD COLUMN IF NOT EXISTS guardian_email varchar(120),
-        ADD COLUMN IF NOT EXISTS guardian_phone varchar(50),
-        ADD COLUMN IF NOT EXISTS guardian_phone2 varchar(50),
-        ADD COLUMN IF NOT EXISTS guardian_relationship varchar(50)
-    """)
-
-    current_student_page = 0
+    pager = KeysetPager(PAGE_SIZE_STUDENTS)
+    student_total = 0
     selected_student_id = None
     selected_student_active = None
+    # Rows of the page on screen (full form projection), keyed by student id.
+    student_rows = {}
 
     filter_active = tk.StringVar(value="Active")
+    busy = BusyIndicator(tab_students, row=0, column=0, sticky="w", padx=10, pady=(0, 5))
 
     # =====================================================
     # DB HELPERS FOR CHARTS
@@ -94,41 +98,52 @@ def build(tab_students):
             data[active] = cnt
         return data
 
-    # Return the total number of students.
-    def count_students_total():
-        return execute("SELECT COUNT(id) FROM t_students")[0][0]
-
     # =====================================================
     # LOADERS
     # =====================================================
-    # Fetch a page of students based on the active filter.
-    def load_students_paged(page):
+    # Return the WHERE clause for the active filter.
+    def student_filter_where():
         if filter_active.get() == "Active":
-            where = "WHERE s.active = true"
-        elif filter_active.get() == "Inactive":
-            where = "WHERE s.active = false"
-        else:
-            where = ""
+            return "WHERE s.active = true"
+        if filter_active.get() == "Inactive":
+            return "WHERE s.active = false"
+        return ""
+
+    # Fetch page `page` of students matching `where` after id `after_key`, with the total count.
+    def load_students_paged(where, after_key, page):
+        return fetch_page(
+            _STUDENT_LIST_COLUMNS,
+            _STUDENT_LIST_FROM,
+            where,
+            [],
+            ("s.id",),
+            after_key,
+            page * PAGE_SIZE_STUDENTS,
+            PAGE_SIZE_STUDENTS,
+            count_from="t_students s",
+            approx_table="t_students",
+        )
 
-        return execute(f"""
-            SELECT s.id, s.name, s.sex, s.direction, s.postalcode, s.belt, s.email, s.phone, s.phone2,
-                   s.weight, s.country, s.taxid, l.name AS location, s.birthday, s.active, s.is_minor, s.newsletter_opt_in
+    # Find the page boundary `skip` rows past `after_key`; None when past the end.
+    def find_student_boundary(where, after_key, skip):
+        where, params = seek_where(where, ("s.id",), after_key)
+        rows = execute(f"""
+            SELECT s.id
             FROM t_students s
-            LEFT JOIN t_locations l ON s.location_id = l.id
             {where}
             ORDER BY s.id
-            LIMIT %s OFFSET %s
-        """, (PAGE_SIZE_STUDENTS, page * PAGE_SIZE_STUDENTS))
+            OFFSET %s LIMIT 1
+        """, tuple(params + [skip - 1]))
+        return tuple(rows[0]) if rows else None
 
-    # Count students based on the active filter for pagination.
-    def count_students():
-        if filter_active.get() == "Active":
-            where = "WHERE s.active = true"
-        elif filter_active.get() == "Inactive":
-            where = "WHERE s.active = false"
-        else:
-            where = ""
-        return execute(f"SELECT COUNT(s.id) FROM t_students s {where}")[0][0]
+    # Fetch the given students if they still match `where`.
+    def load_students_by_id(ids, where):
+        where = f"{where} AND s.id = ANY(%s)" if where else "WHERE s.id = ANY(%s)"
+        return execute(f"SELECT {_STUDENT_LIST_COLUMNS} FROM {_STUDENT_LIST_FROM} {where}", (list(ids),))
+
+    # Count students matching `where`; shares the count cache with fetch_page.
+    def count_students(where):
+        return execute(f"SELECT COUNT(*) FROM t_students s {where}", (), cache_ttl=COUNT_CACHE_TTL)[0][0]
 
     # ---------- Form ----------
     form = ttk.LabelFrame(tab_students, text=t("label.student_form"), padding=10)
@@ -165,6 +180,11 @@ def build(tab_students):
     )
     cmb_filter.grid(row=0, column=1)
 
+    ttk.Label(filter_frame, text=t("label.find_student")).grid(row=0, column=2, padx=(15, 5))
+    # Searches every student, so inactive ones can be found to reactivate them.
+    student_finder = StudentCombobox(filter_frame, on_pick=lambda sid: show_student(sid), active_only=False, width=30)
+    student_finder.grid(row=0, column=3)
+
     # ---------- Tree ----------
     tree_frame = ttk.LabelFrame(tab_students, text=t("label.students_list"), padding=10)
     tree_frame.grid(row=3, column=0, columnspan=3, sticky="nsew")
@@ -199,25 +219,9 @@ def build(tab_students):
     st_guardian_phone2 = tk.StringVar()
     st_guardian_relationship = tk.StringVar()
 
-    location_option_map = {}
-
-    # Populate the location combobox with active locations.
+    # Return the active location labels for the combobox.
     def refresh_location_options():
-        nonlocal location_option_map
-        rows = execute("""
-            SELECT id, name
-            FROM t_locations
-            WHERE active = true
-            ORDER BY name
-        """)
-        options = []
-        option_map = {}
-        for loc_id, name in rows:
-            label = f"{name} (#{loc_id})"
-            options.append(label)
-            option_map[label] = loc_id
-        location_option_map = option_map
-        return options
+        return lookups.load("locations").labels
 
     # =====================================================
     # FORM FIELDS
@@ -279,7 +283,7 @@ def build(tab_students):
             ttk.Entry(form, textvariable=var, width=30).grid(row=i, column=1)
 
     ttk.Label(form, text=t("label.birthday")).grid(row=len(fields), column=0, sticky="w")
-    st_birthday = DateEntry(form, date_pattern="yyyy-mm-dd", width=27)
+    st_birthday = lazy_imports.load("tkcalendar").DateEntry(form, date_pattern="yyyy-mm-dd", width=27)
     st_birthday.grid(row=len(fields), column=1)
 
     guardian_fields = [
@@ -339,71 +343,107 @@ def build(tab_students):
     # =====================================================
     # CHARTS
     # =====================================================
-    # Render the active vs inactive pie chart.
-    def draw_active_gauge():
-        stats = count_students_by_status()
-        active = stats.get(True, 0)
-        inactive = stats.get(False, 0)
-
-        fig = Figure(figsize=(3.2, 3.2), dpi=100)
-        ax = fig.add_subplot(111)
+    # Figures are created with the first count (matplotlib is loaded then, not
+    # at startup); later refreshes update the artists in place.
+    chart_state = {"stats": None}
+    charts = {}
+
+    # Build both figures and keep their artists in `charts`.
+    def create_charts():
+        Figure, FigureCanvasTkAgg = _chart_backend()
+
+        gauge_fig = Figure(figsize=(3.2, 3.2), dpi=100)
+        gauge_ax = gauge_fig.add_subplot(111)
+        gauge_ax.set_title(t("label.students_status"))
+        charts["gauge_wedges"], charts["gauge_labels"], charts["gauge_pcts"] = gauge_ax.pie(
+            [1, 0],
+            labels=[t("label.active"), t("label.inactive")],
+            autopct="%1.0f%%",
+            startangle=90,
+            colors=["green", "red"],
+            wedgeprops=dict(width=0.4)
+        )
+        charts["gauge_empty"] = gauge_ax.text(
+            0.5, 0.5, t("label.no_data"), ha="center", va="center", transform=gauge_ax.transAxes
+        )
+        charts["gauge_canvas"] = FigureCanvasTkAgg(gauge_fig, master=chart_left)
+        charts["gauge_canvas"].get_tk_widget().pack()
+
+        line_fig = Figure(figsize=(3.2, 3.2), dpi=100)
+        line_ax = line_fig.add_subplot(111)
+        line_ax.set_title(t("label.total_students"))
+        line_ax.set_ylabel(t("label.count"))
+        line_ax.set_xticks([])
+        charts["line_ax"] = line_ax
+        charts["line_total"], = line_ax.plot([0, 1], [0, 0], marker="o", color="blue")
+        charts["line_inactive"], = line_ax.plot([0, 1], [0, 0], marker="o", color="red")
+        charts["line_active"], = line_ax.plot([0, 1], [0, 0], marker="o", color="green")
+        charts["line_empty"] = line_ax.text(
+            0.5, 0.5, t("label.no_data"), ha="center", va="center", transform=line_ax.transAxes
+        )
+        charts["line_canvas"] = FigureCanvasTkAgg(line_fig, master=chart_right)
+        charts["line_canvas"].get_tk_widget().pack()
 
+    # Move the pie wedges, labels and percentages to the new split.
+    def update_active_gauge(active, inactive):
         total = active + inactive
-        if total == 0:
-            ax.text(0.5, 0.5, t("label.no_data"), ha="center", va="center")
-            ax.set_title(t("label.students_status"))
-            ax.axis("off")
-        else:
-            ax.pie(
-                [active, inactive],
-                labels=[t("label.active"), t("label.inactive")],
-                autopct="%1.0f%%",
-                startangle=90,
-                colors=["green", "red"],
-                wedgeprops=dict(width=0.4)
-            )
-            ax.set_title(t("label.students_status"))
-
-        canvas = FigureCanvasTkAgg(fig, master=chart_left)
-        canvas.draw()
-        canvas.get_tk_widget().pack()
-
-    # Render the total students line chart.
-    def draw_total_line():
-        stats = count_students_by_status()
+        has_data = total > 0
+        charts["gauge_empty"].set_visible(not has_data)
+        theta = 90
+        parts = zip((active, inactive), charts["gauge_wedges"], charts["gauge_labels"], charts["gauge_pcts"])
+        for value, wedge, label, pct in parts:
+            share = value / total if has_data else 0
+            end = theta + 360 * share
+            wedge.set_theta1(theta)
+            wedge.set_theta2(end)
+            middle = math.radians((theta + end) / 2)
+            label.set_position((1.1 * math.cos(middle), 1.1 * math.sin(middle)))
+            label.set_horizontalalignment("left" if math.cos(middle) > 0 else "right")
+            pct.set_position((0.6 * math.cos(middle), 0.6 * math.sin(middle)))
+            pct.set_text(f"{share * 100:.0f}%")
+            for artist in (wedge, label, pct):
+                artist.set_visible(has_data)
+            theta = end
+        charts["gauge_canvas"].draw_idle()
+
+    # Update the total/active/inactive lines and their legend.
+    def update_total_line(active, inactive):
+        total = active + inactive
+        has_data = total > 0
+        line_ax = charts["line_ax"]
+        charts["line_empty"].set_visible(not has_data)
+        lines = (
+            (charts["line_total"], total, t("label.total_students")),
+            (charts["line_inactive"], inactive, t("label.inactive")),
+            (charts["line_active"], active, t("label.active")),
+        )
+        for line, value, label in lines:
+            line.set_data([0, 1], [0, value])
+            line.set_label(f"{label} ({value})")
+            line.set_visible(has_data)
+        line_ax.yaxis.set_visible(has_data)
+        line_ax.set_frame_on(has_data)
+        line_ax.relim()
+        line_ax.autoscale_view()
+        legend = line_ax.legend(loc="best")
+        legend.set_visible(has_data)
+        charts["line_canvas"].draw_idle()
+
+    # Update the dashboard charts from one status count; unchanged counts skip the redraw.
+    def show_charts(stats):
         active = stats.get(True, 0)
         inactive = stats.get(False, 0)
-        total = active + inactive
-
-        fig = Figure(figsize=(3.2, 3.2), dpi=100)
-        ax = fig.add_subplot(111)
+        if chart_state["stats"] == (active, inactive):
+            return
+        chart_state["stats"] = (active, inactive)
+        if not charts:
+            create_charts()
+        update_active_gauge(active, inactive)
+        update_total_line(active, inactive)
 
-        if total == 0:
-            ax.text(0.5, 0.5, t("label.no_data"), ha="center", va="center")
-            ax.set_title(t("label.total_students"))
-            ax.axis("off")
-        else:
-            x = [0, 1]
-            ax.plot(x, [0, total], marker="o", color="blue", label=f"{t('label.total_students')} ({total})")
-            ax.plot(x, [0, inactive], marker="o", color="red", label=f"{t('label.inactive')} ({inactive})")
-            ax.plot(x, [0, active], marker="o", color="green", label=f"{t('label.active')} ({active})")
-            ax.set_title(t("label.total_students"))
-            ax.set_ylabel(t("label.count"))
-            ax.set_xticks([])
-            ax.legend(loc="best")
-
-        canvas = FigureCanvasTkAgg(fig, master=chart_right)
-        canvas.draw()
-        canvas.get_tk_widget().pack()
-
-    # Clear and redraw the dashboard charts.
+    # Reload the chart data in the background.
     def refresh_charts():
-        for w in chart_left.winfo_children():
-            w.destroy()
-        for w in chart_right.winfo_children():
-            w.destroy()
-        draw_active_gauge()
-        draw_total_line()
+        background.submit(count_students_by_status, show_charts, key="students.charts", busy=busy)
 
     # =====================================================
     # ACTIONS
@@ -447,7 +487,7 @@ def build(tab_students):
                 st_country.get(),
                 st_taxid.get(),
                 st_birthday.get_date(),
-                location_option_map.get(st_location.get()),
+                lookups.get("locations").id(st_location.get()),
                 st_newsletter.get(),
                 st_is_minor.get(),
                 st_guardian_name.get(),
@@ -511,7 +551,7 @@ def build(tab_students):
                 float(st_weight.get()) if st_weight.get() else None,
                 st_country.get(),
                 st_taxid.get(),
-                location_option_map.get(st_location.get()),
+                lookups.get("locations").id(st_location.get()),
                 st_newsletter.get(),
                 st_is_minor.get(),
                 st_guardian_name.get(),
@@ -523,7 +563,7 @@ def build(tab_students):
                 selected_student_id
             ))
 
-            load_students_view()
+            refresh_student_rows([selected_student_id])
             refresh_charts()
             messagebox.showinfo("OK", "Student updated")
 
@@ -564,6 +604,8 @@ def build(tab_students):
         nonlocal selected_student_id, selected_student_active
         selected_student_id = None
         selected_student_active = None
+        # Rows survive reloads now, so drop the highlight explicitly.
+        students_tree.selection_remove(*students_tree.selection())
 
         st_name.set("")
         st_sex.set("")
@@ -673,45 +715,59 @@ def build(tab_students):
         selected_student_id = v[0]
         selected_student_active = ("active" in item.get("tags", ()))
 
-        row = execute("""
-            SELECT s.name, s.sex, s.direction, s.postalcode, s.belt, s.email, s.phone, s.phone2,
-                   s.weight, s.country, s.taxid, l.name AS location, s.birthday, s.newsletter_opt_in,
-                   s.is_minor, s.guardian_name, s.guardian_email, s.guardian_phone, s.guardian_phone2,
-                   s.guardian_relationship
-            FROM t_students s
-            LEFT JOIN t_locations l ON s.location_id = l.id
-            WHERE s.id = %s
-        """, (selected_student_id,))
-        if not row:
+        # The page query already fetched every form field; only a row that is
+        # not cached (e.g. selected before its page finished loading) needs a query.
+        row = student_rows.get(selected_student_id)
+        if row is None and selected_student_id:
+            rows = load_students_by_id([selected_student_id], "")
+            if rows:
+                row = student_rows[selected_student_id] = rows[0]
+        if row is not None:
+            fill_student_form(row)
+
+    # Open a student picked by name: select it when on this page, else load it into the form.
+    def show_student(student_id):
+        student_finder.set("")
+        if students_tree.exists(str(student_id)):
+            students_tree.selection_set(str(student_id))
+            students_tree.see(str(student_id))
             return
-        row = row[0]
-
-        st_name.set(row[0])
-        st_sex.set(sex_from_db(row[1]))
-        st_direction.set(row[2])
-        st_postalcode.set(row[3])
-        st_belt.set(row[4])
-        st_email.set(row[5] or "")
-        st_phone.set(row[6] or "")
-        st_phone2.set(row[7] or "")
-        st_weight.set("" if row[8] is None else str(row[8]))
-        st_country.set(row[9] or "")
-        st_taxid.set(row[10] or "")
-        location_label = ""
-        for label, loc_id in location_option_map.items():
-            if row[11] and label.startswith(f"{row[11]} ("):
-                location_label = label
-                break
-        st_location.set(location_label)
-        if row[12]:
-            st_birthday.set_date(row[12])
-        st_newsletter.set(row[13] if row[13] is not None else True)
-        st_is_minor.set(bool(row[14]))
-        st_guardian_name.set(row[15] or "")
-        st_guardian_email.set(row[16] or "")
-        st_guardian_phone.set(row[17] or "")
-        st_guardian_phone2.set(row[18] or "")
-        st_guardian_relationship.set(row[19] or "")
+
+        def loaded(rows):
+            nonlocal selected_student_id, selected_student_active
+            if not rows:
+                return
+            students_tree.selection_remove(*students_tree.selection())
+            student_rows[rows[0][0]] = rows[0]
+            selected_student_id = rows[0][0]
+            selected_student_active = bool(rows[0][14])
+            fill_student_form(rows[0])
+
+        background.submit(lambda: load_students_by_id([student_id], ""), loaded, busy=busy)
+
+    # Copy a student row (list projection) into the form fields.
+    def fill_student_form(row):
+        st_name.set(row[1])
+        st_sex.set(sex_from_db(row[2]))
+        st_direction.set(row[3])
+        st_postalcode.set(row[4])
+        st_belt.set(row[5])
+        st_email.set(row[6] or "")
+        st_phone.set(row[7] or "")
+        st_phone2.set(row[8] or "")
+        st_weight.set("" if row[9] is None else str(row[9]))
+        st_country.set(row[10] or "")
+        st_taxid.set(row[11] or "")
+        st_location.set(lookups.get("locations").label(row[22]))
+        if row[13]:
+            st_birthday.set_date(row[13])
+        st_newsletter.set(row[16] if row[16] is not None else True)
+        st_is_minor.set(bool(row[15]))
+        st_guardian_name.set(row[17] or "")
+        st_guardian_email.set(row[18] or "")
+        st_guardian_phone.set(row[19] or "")
+        st_guardian_phone2.set(row[20] or "")
+        st_guardian_relationship.set(row[21] or "")
 
         update_button_states()
 
@@ -720,81 +776,151 @@ def build(tab_students):
     # =====================================================
     # PAGINATION
     # =====================================================
-    # Load the current page of students into the tree and update paging label.
-    def load_students_view():
+    # Build Treeview values and tags for one student row.
+    def student_item(row):
+        active = row[14]
+        is_minor = row[15]
+        status = t("label.active") if active else t("label.inactive")
+        tag = "active" if active else "inactive"
+        values = (
+            row[0],
+            "🙂" if is_minor else "",
+            row[1],
+            row[2],
+            row[3],
+            row[4],
+            row[5],
+            row[6],
+            row[7],
+            row[8],
+            row[9],
+            row[10],
+            row[11],
+            row[12],
+            row[13],
+            status,
+            t("label.yes") if row[16] else t("label.no"),
+        )
+        return values, (tag,)
+
+    student_tree_rows = KeyedTree(
+        students_tree,
+        student_item,
+        empty_item=(("", "", t("label.no_data"), "", "", "", "", "", "", "", "", "", "", "", "", "", ""), ("inactive",)),
+    )
+
+    # Keep the selection state in step with the rows on screen after a reload.
+    def sync_selection():
         nonlocal selected_student_id, selected_student_active
-        nonlocal current_student_page
-        selected_student_id = None
-        selected_student_active = None
+        row = student_rows.get(selected_student_id)
+        if row is None:
+            selected_student_id = None
+            selected_student_active = None
+        else:
+            selected_student_active = bool(row[14])
         update_button_states()
 
-        for r in students_tree.get_children():
-            students_tree.delete(r)
+    # Load the current page of students in the background.
+    def load_students_view():
+        page = pager.page
+        known_page, after_key = pager.nearest(page)
+        where = student_filter_where()
+
+        def fetch():
+            key = after_key
+            if known_page < page:
+                key = find_student_boundary(where, key, (page - known_page) * PAGE_SIZE_STUDENTS)
+                if key is None:
+                    return page, None, [], count_students(where), True
+            rows, total, exact = load_students_paged(where, key, page)
+            return page, key, rows, total, exact
+
+        background.submit(fetch, show_students_page, key="students.page", busy=busy)
+
+    # Fill the tree with a fetched page and update the paging label.
+    def show_students_page(result):
+        nonlocal student_total
+        page, key, rows, total, exact = result
+        student_total = total
+        if rows:
+            pager.remember(page, key)
+            pager.record_page(page, rows, lambda row: (row[0],))
+        student_rows.clear()
+        student_rows.update((row[0], row) for row in rows)
+        student_tree_rows.sync(rows)
+        sync_selection()
 
-        rows = load_students_paged(current_student_page)
         if not rows:
-            students_tree.insert(
-                "", tk.END,
-                values=("", "", t("label.no_data"), "", "", "", "", "", "", "", "", "", "", "", "", "", ""),
-                tags=("inactive",)
-            )
             lbl_page.config(text=t("label.page", page=1, pages=1))
             return
 
-        for row in rows:
-            active = row[14]
-            is_minor = row[15]
-            status = t("label.active") if active else t("label.inactive")
-            tag = "active" if active else "inactive"
-            students_tree.insert(
-                "", tk.END,
-                values=(
-                    row[0],
-                    "🙂" if is_minor else "",
-                    row[1],
-                    row[2],
-                    row[3],
-                    row[4],
-                    row[5],
-                    row[6],
-                    row[7],
-                    row[8],
-                    row[9],
-                    row[10],
-                    row[11],
-                    row[12],
-                    row[13],
-                    status,
-                    t("label.yes") if row[16] else t("label.no"),
-                ),
-                tags=(tag,)
-            )
-
-        total = count_students()
-        pages = max(1, (total + PAGE_SIZE_STUDENTS - 1) // PAGE_SIZE_STUDENTS)
-        lbl_page.config(text=t("label.page", page=current_student_page + 1, pages=pages))
+        pages = page_count(total, PAGE_SIZE_STUDENTS)
+        lbl_page.config(text=t("label.page" if exact else "label.page_approx", page=page + 1, pages=pages))
 
     # Advance to the next page of students.
     def next_student():
-        nonlocal current_student_page
-        current_student_page += 1
-        load_students_view()
+        if pager.page + 1 < page_count(student_total, PAGE_SIZE_STUDENTS):
+            pager.page += 1
+            load_students_view()
 
     # Move back to the previous page of students.
     def prev_student():
-        nonlocal current_student_page
-        if current_student_page > 0:
-            current_student_page -= 1
+        if pager.page > 0:
+            pager.page -= 1
             load_students_view()
 
+    # Jump to the page number typed next to the pager.
+    def jump_to_student_page():
+        try:
+            target = int(jump_page.get())
+        except ValueError:
+            return
+        pager.page = min(max(target, 1), page_count(student_total, PAGE_SIZE_STUDENTS)) - 1
+        load_students_view()
+
+    # Start over from the first page when the filter changes.
+    def on_filter_change(*args):
+        pager.reset()
+        load_students_view()
+
     ttk.Button(nav, text=t("button.prev"), command=prev_student).grid(row=0, column=0, padx=5)
     lbl_page = ttk.Label(nav, text=t("label.page", page=1, pages=1))
     lbl_page.grid(row=0, column=1, padx=10)
     ttk.Button(nav, text=t("button.next"), command=next_student).grid(row=0, column=2, padx=5)
 
-    filter_active.trace_add("write", lambda *args: load_students_view())
+    jump_page = tk.StringVar()
+    jump_entry = ttk.Entry(nav, textvariable=jump_page, width=5)
+    jump_entry.grid(row=0, column=3, padx=(15, 5))
+    jump_entry.bind("<Return>", lambda event: jump_to_student_page())
+    ttk.Button(nav, text=t("button.go_to_page"), command=jump_to_student_page).grid(row=0, column=4, padx=5)
+
+    # Apply changes made by other clients to the rows shown on this page.
+    def refresh_student_rows(ids=None):
+        if ids is None:
+            load_students_view()
+            return
+        where = student_filter_where()
+
+        def apply(rows):
+            not_shown = student_tree_rows.patch(ids, rows)
+            for student_id in ids:
+                student_rows.pop(student_id, None)
+            # A student opened through the finder stays selected even when it is not on this page.
+            student_rows.update(
+                (row[0], row) for row in rows
+                if students_tree.exists(str(row[0])) or row[0] == selected_student_id
+            )
+            sync_selection()
+            # New ids sort last, so they only belong on a page that still has room.
+            if not_shown and len(student_tree_rows) < PAGE_SIZE_STUDENTS:
+                load_students_view()
+
+        background.submit(lambda: load_students_by_id(ids, where), apply, busy=busy)
+
+    filter_active.trace_add("write", on_filter_change)
 
     return {
         "load_students_view": load_students_view,
         "refresh_charts": refresh_charts,
+        "refresh_student_rows": refresh_student_rows,
     }
@@ -1,11 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from tkcalendar import DateEntry
 
+import lazy_imports
 from db import execute
 from i18n import t
 from validation_middleware import ValidationError, validate_required, validate_email
 from error_middleware import handle_db_error, log_validation_error
+from ui.tree_rows import KeyedTree
 
 
 def build(tab_teachers):
@@ -72,7 +73,7 @@ def build(tab_teachers):
                 width=25
             ).grid(row=i, column=1)
         elif lbl == "Hire Date":
-            nonlocal_hire = DateEntry(teachers_form, date_pattern="yyyy-mm-dd", width=27)
+            nonlocal_hire = lazy_imports.load("tkcalendar").DateEntry(teachers_form, date_pattern="yyyy-mm-dd", width=27)
             nonlocal_hire.grid(row=i, column=1)
             hire_date_entry = nonlocal_hire
         else:
@@ -130,30 +131,23 @@ def build(tab_teachers):
     # =====================================================
     # Load teachers from the database into the teachers tree.
     def load_teachers():
-        teachers_tree.delete(*teachers_tree.get_children())
-
         rows = execute("""
             SELECT id, name, sex, email, phone, belt, hire_date, active
             FROM public.t_coaches
             ORDER BY name
         """)
-
-        if not rows:
-            teachers_tree.insert(
-                "", tk.END,
-                values=("", t("label.no_data"), "", "", "", "", "", ""),
-                tags=("inactive",)
-            )
-            return
-
-        for r in rows:
-            status = t("label.active") if r[7] else t("label.inactive")
-            tag = "active" if r[7] else "inactive"
-            teachers_tree.insert(
-                "", tk.END,
-                values=(r[0], r[1], r[2], r[3], r[4], r[5], r[6], status),
-                tags=(tag,)
-            )
+        teacher_rows.sync(rows)
+        # The selection survives the reload; re-read it so the buttons match the row.
+        if teachers_tree.selection():
+            on_teacher_select(None)
+
+    # Build Treeview values and tags for one teacher row.
+    def teacher_item(r):
+        status = t("label.active") if r[7] else t("label.inactive")
+        tag = "active" if r[7] else "inactive"
+        return (r[0], r[1], r[2], r[3], r[4], r[5], r[6], status), (tag,)
+
+    teacher_rows = KeyedTree(teachers_tree, teacher_item, empty_item=(("", t("label.no_data"), "", "", "", "", "", ""), ("inactive",)))
 
     # =====================================================
     # SELECTION
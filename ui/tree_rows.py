@@ -0,0 +1,89 @@
+class KeyedTree:
+    """
+    Keeps a ttk.Treeview in step with query results by primary key. Items use
+    str(key_of(row)) as iid (default: first column) and make_item(row) returns
+    (values, tags). sync() only inserts, updates, moves or deletes what changed,
+    so selection and scroll position survive a reload; empty_item (values,
+    tags) is shown when there are no rows.
+
+    Rows of the tree should only be changed through the adapter: it remembers
+    what each item shows to skip unchanged ones.
+    """
+
+    EMPTY_IID = "empty"
+
+    def __init__(self, tree, make_item, key_of=None, empty_item=None):
+        self.tree = tree
+        self._make_item = make_item
+        self._key_of = key_of or (lambda row: row[0])
+        self._empty_item = empty_item
+        self._shown = {}
+        self._rows = {}
+
+    def __len__(self):
+        return sum(1 for iid in self._shown if iid != self.EMPTY_IID)
+
+    def row(self, iid):
+        """The source row shown as item `iid`, or None."""
+        return self._rows.get(str(iid))
+
+    def sync(self, rows):
+        """Make the tree show exactly `rows`, in order."""
+        self._rows = {str(self._key_of(row)): row for row in rows}
+        wanted = [(str(self._key_of(row)), self._make_item(row)) for row in rows]
+        if not wanted and self._empty_item is not None:
+            wanted = [(self.EMPTY_IID, self._empty_item)]
+
+        wanted_ids = {iid for iid, _ in wanted}
+        stale = [iid for iid in self.tree.get_children() if iid not in wanted_ids]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                self._shown.pop(iid, None)
+
+        order = list(self.tree.get_children())
+        for position, (iid, item) in enumerate(wanted):
+            if iid in self._shown and self.tree.exists(iid):
+                self._update(iid, item)
+                if order[position] != iid:
+                    self.tree.move(iid, "", position)
+                    order.remove(iid)
+                    order.insert(position, iid)
+            else:
+                self._insert(position, iid, item)
+                order.insert(position, iid)
+
+    def patch(self, ids, rows):
+        """
+        Refresh the items whose key is one of `ids` from freshly fetched `rows`.
+        Shown items that were not fetched again are removed. Returns the ids
+        that were fetched but are not shown, so the caller can decide whether a
+        full reload is needed.
+        """
+        fetched = {str(self._key_of(row)): row for row in rows}
+        not_shown = set()
+        for iid in {str(i) for i in ids}:
+            row = fetched.get(iid)
+            if self.tree.exists(iid):
+                if row is None:
+                    self.tree.delete(iid)
+                    self._shown.pop(iid, None)
+                    self._rows.pop(iid, None)
+                else:
+                    self._update(iid, self._make_item(row))
+                    self._rows[iid] = row
+            elif row is not None:
+                not_shown.add(iid)
+        return not_shown
+
+    def _insert(self, position, iid, item):
+        values, tags = item
+        self.tree.insert("", position, iid=iid, values=values, tags=tags)
+        self._shown[iid] = (tuple(values), tuple(tags))
+
+    def _update(self, iid, item):
+        values, tags = item
+        shown = (tuple(values), tuple(tags))
+        if self._shown.get(iid) != shown:
+            self.tree.item(iid, values=values, tags=tags)
+            self._shown[iid] = shown
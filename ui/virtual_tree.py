@@ -0,0 +1,272 @@
+from collections import OrderedDict
+from tkinter import ttk
+
+import background
+import db
+from error_middleware import handle_db_error
+from paging import COUNT_CACHE_TTL, seek_where
+
+
+class QuerySource:
+    """
+    Row source for VirtualTreeview over one SELECT. A block is read with a
+    keyset seek past the previous block when that block is loaded (plain
+    scrolling), and with OFFSET otherwise (dragging the scrollbar far away).
+    key_of(row) returns the values of the order_by columns for a row.
+    """
+
+    def __init__(self, columns, from_sql, where, params, order_by, key_of, descending=False, count_from=None):
+        self.columns = columns
+        self.from_sql = from_sql
+        self.where = where
+        self.params = list(params)
+        self.order_by = tuple(order_by)
+        self.key_of = key_of
+        self.descending = descending
+        self.count_from = count_from or from_sql
+
+    def count(self):
+        return db.execute(
+            f"SELECT COUNT(*) FROM {self.count_from} {self.where}",
+            tuple(self.params),
+            cache_ttl=COUNT_CACHE_TTL,
+        )[0][0]
+
+    def fetch(self, offset, limit, after_row=None):
+        order_sql = ", ".join(f"{c} DESC" if self.descending else c for c in self.order_by)
+        if after_row is not None:
+            where, seek_params = seek_where(self.where, self.order_by, self.key_of(after_row), self.descending)
+            return db.execute(
+                f"SELECT {self.columns} FROM {self.from_sql} {where} ORDER BY {order_sql} LIMIT %s",
+                tuple(self.params + seek_params + [limit]),
+            )
+        return db.execute(
+            f"SELECT {self.columns} FROM {self.from_sql} {self.where} ORDER BY {order_sql} LIMIT %s OFFSET %s",
+            tuple(self.params + [limit, offset]),
+        )
+
+
+class VirtualTreeview(ttk.Treeview):
+    """
+    Drop-in ttk.Treeview for long lists: only the rows in view exist as Tk
+    items. Rows come from a source with count() and fetch(offset, limit,
+    after_row) and are loaded in blocks through background.submit; at most
+    max_blocks blocks are kept. make_item(row) returns (values, tags), and
+    empty_item is shown when the source has no rows.
+
+    Item iids are row indexes. Attach a scrollbar the usual way
+    (command=tree.yview, yscrollcommand=scrollbar.set).
+    """
+
+    def __init__(self, parent, make_item, block_size=200, max_blocks=20, busy=None, empty_item=None, **kw):
+        self._yscrollcommand = kw.pop("yscrollcommand", None)
+        super().__init__(parent, **kw)
+        self._make_item = make_item
+        self._block_size = block_size
+        self._max_blocks = max_blocks
+        self._busy = busy
+        self._empty_item = empty_item
+        self._source = None
+        self._generation = 0
+        self._blocks = OrderedDict()
+        self._loading = set()
+        self._total = 0
+        self._top = 0
+        self._visible = int(kw.get("height", 10))
+
+        self.bind("<Configure>", self._on_configure, add="+")
+        self.bind("<MouseWheel>", self._on_mousewheel)
+        self.bind("<Button-4>", lambda event: self._scroll_to(self._top - 3))
+        self.bind("<Button-5>", lambda event: self._scroll_to(self._top + 3))
+        self.bind("<Up>", lambda event: self._step_selection(-1))
+        self.bind("<Down>", lambda event: self._step_selection(1))
+        self.bind("<Prior>", lambda event: self._scroll_to(self._top - self._visible))
+        self.bind("<Next>", lambda event: self._scroll_to(self._top + self._visible))
+
+    # ---------- Public API ----------
+    def set_source(self, source):
+        """Show a new source from the top."""
+        self._source = source
+        self._top = 0
+        self._blocks.clear()
+        self._reload()
+
+    def refresh(self):
+        """Re-read the row count and the rows in view, keeping the scroll position."""
+        if self._source is not None:
+            self._reload()
+
+    @property
+    def row_count(self):
+        return self._total
+
+    def selected_row(self):
+        """The source row of the selected item, or None."""
+        sel = self.selection()
+        if not sel or not sel[0].isdigit():
+            return None
+        return self._row(int(sel[0]), request=False)
+
+    # ---------- Scrolling (virtual) ----------
+    def configure(self, cnf=None, **kw):
+        if isinstance(cnf, dict) and "yscrollcommand" in cnf:
+            cnf = dict(cnf)
+            kw["yscrollcommand"] = cnf.pop("yscrollcommand")
+        if "yscrollcommand" in kw:
+            self._yscrollcommand = kw.pop("yscrollcommand")
+            self._update_scrollbar()
+            if not cnf and not kw:
+                return None
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def yview(self, *args):
+        if not args:
+            return self._fractions()
+        if args[0] == "moveto":
+            self._scroll_to(round(float(args[1]) * self._total))
+        elif args[0] == "scroll":
+            step = self._visible if args[2].startswith("page") else 1
+            self._scroll_to(self._top + int(args[1]) * step)
+        return None
+
+    def _fractions(self):
+        if not self._total:
+            return 0.0, 1.0
+        return self._top / self._total, min(1.0, (self._top + self._visible) / self._total)
+
+    def _update_scrollbar(self):
+        if self._yscrollcommand:
+            self._yscrollcommand(*self._fractions())
+
+    def _scroll_to(self, top):
+        top = max(0, min(top, self._total - self._visible))
+        if top != self._top:
+            self._top = top
+            self._render()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        steps = -int(event.delta / 120) or (-1 if event.delta > 0 else 1)
+        return self._scroll_to(self._top + steps * 3)
+
+    def _step_selection(self, delta):
+        sel = self.selection()
+        if not sel or not sel[0].isdigit():
+            return None
+        target = int(sel[0]) + delta
+        if self._top <= target < self._top + self._visible:
+            return None  # Still in view: default Treeview handling.
+        if not 0 <= target < self._total:
+            return "break"
+        self._scroll_to(target if delta < 0 else target - self._visible + 1)
+        self.selection_set(str(target))
+        self.focus(str(target))
+        return "break"
+
+    def _on_configure(self, event):
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        header = rowheight + 5 if "headings" in str(self.cget("show")) else 0
+        visible = max(1, (event.height - header) // rowheight)
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
+
+    # ---------- Data ----------
+    def _reload(self):
+        # Count and the blocks in view are read in one job, so a refresh swaps
+        # the rows in place instead of flashing placeholders.
+        self._generation += 1
+        self._loading.clear()
+        generation = self._generation
+        source = self._source
+        block_size = self._block_size
+        first = self._top // block_size
+        last = (self._top + self._visible - 1) // block_size
+
+        def fetch():
+            total = source.count()
+            blocks = {}
+            for block in range(first, last + 1):
+                if block * block_size < total:
+                    blocks[block] = source.fetch(block * block_size, block_size)
+            return total, blocks
+
+        def loaded(result):
+            if generation != self._generation:
+                return
+            self._total, blocks = result
+            self._blocks.clear()
+            self._blocks.update(blocks)
+            self._render()
+
+        background.submit(fetch, loaded, busy=self._busy)
+
+    def _row(self, index, request=True):
+        block = index // self._block_size
+        rows = self._blocks.get(block)
+        if rows is None:
+            if request:
+                self._request_block(block)
+            return None
+        self._blocks.move_to_end(block)
+        offset = index % self._block_size
+        return rows[offset] if offset < len(rows) else None
+
+    def _request_block(self, block):
+        if block in self._loading or self._source is None:
+            return
+        self._loading.add(block)
+        previous = self._blocks.get(block - 1)
+        after_row = previous[-1] if previous and len(previous) == self._block_size else None
+        generation = self._generation
+        source = self._source
+        offset = block * self._block_size
+        limit = self._block_size
+
+        def loaded(rows):
+            if generation != self._generation:
+                return
+            self._loading.discard(block)
+            self._blocks[block] = rows
+            while len(self._blocks) > self._max_blocks:
+                self._blocks.popitem(last=False)
+            self._render()
+
+        def failed(exc):
+            if generation == self._generation:
+                self._loading.discard(block)
+            handle_db_error(exc, "VirtualTreeview block")
+
+        background.submit(lambda: source.fetch(offset, limit, after_row), loaded, failed, busy=self._busy)
+
+    # ---------- Rendering ----------
+    def _render(self):
+        self._top = max(0, min(self._top, self._total - self._visible))
+        if self._total == 0:
+            self.delete(*self.get_children())
+            if self._empty_item is not None:
+                values, tags = self._empty_item
+                self.insert("", "end", iid="empty", values=values, tags=tags)
+            self._update_scrollbar()
+            return
+
+        wanted = [str(i) for i in range(self._top, min(self._total, self._top + self._visible))]
+        wanted_set = set(wanted)
+        stale = [iid for iid in self.get_children() if iid not in wanted_set]
+        if stale:
+            self.delete(*stale)
+        for position, iid in enumerate(wanted):
+            row = self._row(int(iid))
+            if row is None:
+                values, tags = ("…",), ("loading",)
+            else:
+                values, tags = self._make_item(row)
+            if self.exists(iid):
+                self.item(iid, values=values, tags=tags)
+                if self.index(iid) != position:
+                    self.move(iid, "", position)
+            else:
+                self.insert("", position, iid=iid, values=values, tags=tags)
+        self._update_scrollbar()